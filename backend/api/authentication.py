@@ -0,0 +1,85 @@
+import hashlib
+from functools import partial
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import (
+    TokenAuthentication,
+    get_authorization_header,
+)
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from backend.constant import TOKEN_CACHE_TIMEOUT
+from .metrics import increment
+
+
+def get_token_cache_key(key):
+    """Возвращает ключ кэша для токена, не раскрывая сам токен."""
+    return 'auth-token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def invalidate_tokens(*keys):
+    """
+    Удаляет токены из кэша сразу и ещё раз после фиксации транзакции.
+
+    Сигналы приходят до фиксации, и параллельный запрос, ещё видящий
+    удаляемый токен, мог бы успеть вернуть его в кэш.
+    """
+    cache_keys = [get_token_cache_key(key) for key in keys]
+    cache.delete_many(cache_keys)
+    transaction.on_commit(partial(cache.delete_many, cache_keys))
+
+
+def has_cached_token(request):
+    """
+    Проверяет, что заголовок Authorization содержит токен из кэша.
+
+    База не читается: токен попадает в кэш после первого запроса
+    с ним, поэтому произвольный заголовок проверку не проходит.
+    """
+    auth = get_authorization_header(request).split()
+    keyword = CachedTokenAuthentication.keyword.lower().encode()
+    if len(auth) != 2 or auth[0].lower() != keyword:
+        return False
+    try:
+        key = auth[1].decode()
+    except UnicodeError:
+        return False
+    token = cache.get(get_token_cache_key(key))
+    return token is not None and token.user.is_active
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Аутентификация по токену с кэшированием пары токен-пользователь.
+
+    Запись в кэше удаляется при удалении токена, а также при любом
+    сохранении пользователя: смене пароля, деактивации, правке профиля.
+    Чтобы выход и деактивация действовали во всех процессах, кэш должен
+    быть общим (CACHE_BACKEND). QuerySet.update() сигналов
+    не отправляет: деактивированный так пользователь теряет доступ
+    не позже чем через TOKEN_CACHE_TIMEOUT секунд.
+    """
+
+    def authenticate_credentials(self, key):
+        """Возвращает пользователя и токен из кэша или из базы."""
+        cache_key = get_token_cache_key(key)
+        token = cache.get(cache_key)
+        if token is None:
+            increment('auth_token_cache_miss')
+            user, token = super().authenticate_credentials(key)
+            if cache.add(cache_key, token, TOKEN_CACHE_TIMEOUT):
+                # Токен мог быть удалён после чтения, а его запись
+                # в кэше — до добавления; проверяем по основной базе.
+                if not Token.objects.using(DEFAULT_DB_ALIAS).filter(
+                    key=key, user__is_active=True
+                ).exists():
+                    cache.delete(cache_key)
+                    raise AuthenticationFailed(_('Invalid token.'))
+            return user, token
+        increment('auth_token_cache_hit')
+        if not token.user.is_active:
+            raise AuthenticationFailed(_('User inactive or deleted.'))
+        return token.user, token
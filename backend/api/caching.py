@@ -0,0 +1,295 @@
+import contextvars
+import hashlib
+import logging
+import threading
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+
+from backend.constant import (
+    RESPONSE_CACHE_LOCK_TIMEOUT,
+    RESPONSE_CACHE_POLL_INTERVAL,
+    RESPONSE_CACHE_TIMEOUT,
+    RESPONSE_CACHE_WAIT,
+    SWR_HARD_TIMEOUT,
+    SWR_SOFT_TIMEOUT,
+)
+from backend.db import statement_timeout
+from recipes.generation import get_user_generation
+from .deadlines import get_db_deadline
+from .metrics import increment
+
+logger = logging.getLogger(__name__)
+
+
+def get_response_cache_key(request, prefix='anonymous-response'):
+    """
+    Возвращает ключ кэша ответа по адресу и параметрам запроса.
+
+    Параметры сортируются по имени, поэтому их порядок в адресе
+    не влияет на ключ. В ключ входят хост, от которого зависят
+    абсолютные ссылки в ответе, выбранный формат ответа
+    и пользователь.
+    """
+    signature = repr((
+        request.accepted_renderer.format,
+        request.build_absolute_uri(request.path),
+        sorted(request.query_params.lists()),
+        request.user.pk,
+    ))
+    digest = hashlib.blake2b(signature.encode(), digest_size=20).hexdigest()
+    return f'{prefix}:{digest}'
+
+
+def build_cached_response(entry):
+    """Возвращает ответ из сохранённых в кэше байтов."""
+    return HttpResponse(entry['content'], content_type=entry['content_type'])
+
+
+def wait_for_entry(key, lock_key, generation):
+    """
+    Ждёт ответ текущего поколения, который собирает другой процесс.
+
+    Ожидание длится не дольше RESPONSE_CACHE_WAIT секунд
+    и прекращается, если другой процесс снял блокировку, не сохранив
+    ответ. Возвращает запись кэша или None.
+    """
+    deadline = time.monotonic() + RESPONSE_CACHE_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(RESPONSE_CACHE_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None and entry['generation'] == generation:
+            return entry
+        if cache.get(lock_key) is None:
+            return None
+    return None
+
+
+def cache_anonymous_response(get_generation):
+    """
+    Кэширует целиком ответы действия на GET-запросы анонимов.
+
+    Ответ хранится вместе с поколением данных, которое возвращает
+    get_generation, и считается устаревшим, когда поколение
+    изменилось. Устаревший или отсутствующий ответ пересобирает только
+    один процесс: остальные в это время отдают устаревшую копию,
+    а если её нет — ждут новую через wait_for_entry и собирают ответ
+    сами, только если не дождались. Без общего кэша поколения нет,
+    и ответы не кэшируются.
+    """
+
+    def decorator(method):
+
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            if request.method != 'GET' or request.user.is_authenticated:
+                return method(self, request, *args, **kwargs)
+            generation = get_generation()
+            if generation is None:
+                return method(self, request, *args, **kwargs)
+            key = get_response_cache_key(request)
+            entry = cache.get(key)
+            if entry is not None and entry['generation'] == generation:
+                increment('response_cache_hit')
+                return build_cached_response(entry)
+            lock_key = f'{key}:lock'
+            locked = cache.add(lock_key, True, RESPONSE_CACHE_LOCK_TIMEOUT)
+            if not locked:
+                if entry is not None:
+                    increment('response_cache_stale')
+                    return build_cached_response(entry)
+                entry = wait_for_entry(key, lock_key, generation)
+                if entry is not None:
+                    increment('response_cache_wait')
+                    return build_cached_response(entry)
+            increment('response_cache_miss')
+            try:
+                response = self.finalize_response(
+                    request,
+                    method(self, request, *args, **kwargs),
+                    *args,
+                    **kwargs,
+                )
+                response.render()
+                if response.status_code == 200:
+                    cache.set(key, {
+                        'generation': generation,
+                        'content': response.content,
+                        'content_type': response['Content-Type'],
+                    }, RESPONSE_CACHE_TIMEOUT)
+            finally:
+                if locked:
+                    cache.delete(lock_key)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def render_entry(view, request, response):
+    """
+    Доводит ответ действия до байтов и возвращает запись для кэша.
+
+    Потоковые ответы, например FileResponse, читаются целиком.
+    """
+    response = view.finalize_response(
+        request, response, *view.args, **view.kwargs
+    )
+    if response.streaming:
+        content = b''.join(response.streaming_content)
+    else:
+        response.render()
+        content = response.content
+    return {
+        'created': time.time(),
+        'status': response.status_code,
+        'content': content,
+        'headers': [
+            (header, value) for header, value in response.items()
+            if header != 'Content-Length'
+        ],
+    }
+
+
+def build_refresh_view(view, request):
+    """
+    Возвращает новый экземпляр view для пересчёта ответа в фоне.
+
+    Исходный запрос к этому времени уже завершён, поэтому запрос
+    собирается заново из адреса, строковых заголовков и учётных
+    данных исходного, а view — из класса и параметров маршрута,
+    как это делает as_view.
+    """
+    source = request._request
+    fresh = HttpRequest()
+    fresh.method = 'GET'
+    fresh.path = source.path
+    fresh.path_info = source.path_info
+    fresh.META = {
+        name: value for name, value in source.META.items()
+        if isinstance(value, str)
+    }
+    fresh.GET = source.GET.copy()
+    fresh.COOKIES = dict(source.COOKIES)
+    fresh.resolver_match = source.resolver_match
+    handler = source.resolver_match.func
+    refresh_view = handler.cls(**handler.initkwargs)
+    refresh_view.action_map = getattr(handler, 'actions', None)
+    refresh_view.args = view.args
+    refresh_view.kwargs = view.kwargs
+    refresh_view.headers = {}
+    refresh_view.format_kwarg = view.format_kwarg
+    fresh_request = refresh_view.initialize_request(
+        fresh, *view.args, **view.kwargs
+    )
+    fresh_request.user = request.user
+    fresh_request.auth = request.auth
+    (
+        fresh_request.accepted_renderer,
+        fresh_request.accepted_media_type,
+    ) = refresh_view.perform_content_negotiation(fresh_request)
+    (
+        fresh_request.version,
+        fresh_request.versioning_scheme,
+    ) = refresh_view.determine_version(
+        fresh_request, *view.args, **view.kwargs
+    )
+    refresh_view.request = fresh_request
+    return refresh_view
+
+
+def build_entry_response(entry):
+    """Возвращает ответ из записи кэша с сохранёнными заголовками."""
+    response = HttpResponse(entry['content'], status=entry['status'])
+    for header, value in entry['headers']:
+        response[header] = value
+    return response
+
+
+def stale_while_revalidate(
+    soft_timeout=SWR_SOFT_TIMEOUT,
+    hard_timeout=SWR_HARD_TIMEOUT,
+):
+    """
+    Кэширует ответы дорогого действия с фоновым обновлением.
+
+    Ответ моложе soft_timeout секунд отдаётся из кэша. Более старый,
+    но моложе hard_timeout, тоже отдаётся сразу, а один процесс
+    пересчитывает его в фоновом потоке. Ответ старше hard_timeout
+    пересчитывается во время запроса. Ключ зависит от пользователя,
+    поколения его корзины, избранного и подписок и параметров
+    запроса, поэтому собственные изменения пользователь видит сразу.
+    Кэшируются только ответы 200; без общего кэша ответы
+    не кэшируются.
+    Счётчики swr_<действие>_hit, _stale, _refresh и _miss
+    доступны в /api/metrics/.
+    """
+
+    def decorator(method):
+        metric = f'swr_{method.__name__}'
+
+        def compute(view, request, key):
+            entry = render_entry(
+                view, request,
+                method(view, request, *view.args, **view.kwargs),
+            )
+            if entry['status'] == 200:
+                cache.set(key, entry, hard_timeout)
+            return entry
+
+        def refresh(view, key, lock_key):
+            # Фоновый поток работает в своих соединениях, поэтому
+            # предел, заданный в middleware, к ним не применяется.
+            deadline = get_db_deadline(
+                type(view), getattr(type(view), method.__name__, None)
+            )
+            try:
+                with statement_timeout(deadline):
+                    compute(view, view.request, key)
+            except Exception:
+                increment(f'{metric}_refresh_error')
+                logger.exception(
+                    'Не удалось обновить ответ %s в фоне.', method.__name__
+                )
+            finally:
+                cache.delete(lock_key)
+                connections.close_all()
+
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            if request.method != 'GET':
+                return method(self, request, *args, **kwargs)
+            generation = get_user_generation(request.user.pk)
+            if generation is None:
+                return method(self, request, *args, **kwargs)
+            key = get_response_cache_key(
+                request, prefix=f'{metric}:{generation}'
+            )
+            entry = cache.get(key)
+            age = time.time() - entry['created'] if entry else None
+            if age is not None and age < soft_timeout:
+                increment(f'{metric}_hit')
+                return build_entry_response(entry)
+            if age is not None and age < hard_timeout:
+                increment(f'{metric}_stale')
+                lock_key = f'{key}:refresh'
+                if cache.add(lock_key, True, RESPONSE_CACHE_LOCK_TIMEOUT):
+                    increment(f'{metric}_refresh')
+                    view = build_refresh_view(self, request)
+                    context = contextvars.copy_context()
+                    threading.Thread(
+                        target=context.run,
+                        args=(refresh, view, key, lock_key),
+                        daemon=True,
+                    ).start()
+                return build_entry_response(entry)
+            increment(f'{metric}_miss')
+            return build_entry_response(compute(self, request, key))
+
+        return wrapper
+
+    return decorator
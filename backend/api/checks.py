@@ -0,0 +1,25 @@
+from django.core.checks import Tags, Warning, register
+
+from backend.caches import has_shared_cache
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Предупреждает о кэше, не общем для процессов gunicorn.
+
+    Через кэш процессы узнают о выходе пользователей, поколениях
+    рецептов и справочников; с локальным кэшем изменения, сделанные
+    в одном процессе, другие не видят, поэтому кэширование ответов
+    и наличия рецептов по поколениям отключается.
+    """
+    if has_shared_cache():
+        return []
+    return [Warning(
+        'Кэш по умолчанию не общий для процессов.',
+        hint=(
+            'Укажите CACHE_BACKEND и CACHE_LOCATION общего кэша, '
+            'например memcached.'
+        ),
+        id='api.W001',
+    )]
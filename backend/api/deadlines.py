@@ -0,0 +1,44 @@
+from django.conf import settings
+
+# Код ошибки PostgreSQL query_canceled, в том числе по statement_timeout.
+QUERY_CANCELED = '57014'
+
+
+def db_deadline(milliseconds):
+    """
+    Задаёт действию view свой предел времени запросов к базе.
+
+    Переопределяет атрибут db_deadline view и DB_STATEMENT_TIMEOUT;
+    0 снимает ограничение.
+    """
+
+    def decorator(method):
+        method.db_deadline = milliseconds
+        return method
+
+    return decorator
+
+
+def get_handler(view_class, method, actions=None):
+    """Возвращает метод view, обрабатывающий HTTP-метод запроса."""
+    name = (actions or {}).get(method.lower(), method.lower())
+    return name, getattr(view_class, name, None)
+
+
+def get_db_deadline(view_class, handler):
+    """
+    Возвращает предел времени запросов к базе для действия view.
+
+    Предел берётся из декоратора db_deadline действия, затем
+    из атрибута db_deadline view, затем из DB_STATEMENT_TIMEOUT.
+    """
+    for source in (handler, view_class):
+        deadline = getattr(source, 'db_deadline', None)
+        if deadline is not None:
+            return deadline
+    return settings.DB_STATEMENT_TIMEOUT
+
+
+def is_query_canceled(exc):
+    """Проверяет, что запрос к базе прерван по statement_timeout."""
+    return getattr(exc.__cause__, 'pgcode', None) == QUERY_CANCELED
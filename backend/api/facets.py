@@ -0,0 +1,99 @@
+from django.db.models import Case, Count, IntegerField, Value, When
+from rest_framework.exceptions import ValidationError
+
+from backend.constant import COOKING_TIME_FACET_BOUNDS, MIN_COOKING_TIME
+
+
+def get_cooking_time_buckets(bounds=COOKING_TIME_FACET_BOUNDS):
+    """
+    Возвращает интервалы времени приготовления для фасета.
+
+    Интервалы заданы включительными границами (min, max), как
+    параметры cooking_time_min и cooking_time_max; у последнего
+    интервала max равен None.
+    """
+    lows = (MIN_COOKING_TIME, *bounds)
+    highs = tuple(bound - 1 for bound in bounds) + (None,)
+    return tuple(zip(lows, highs))
+
+
+COOKING_TIME_BUCKETS = get_cooking_time_buckets()
+
+
+def count_tags(queryset):
+    """Возвращает количество рецептов queryset по slug тэгов."""
+    return dict(
+        queryset.order_by()
+        .filter(tags__isnull=False)
+        .values('tags__slug')
+        .annotate(count=Count('pk', distinct=True))
+        .values_list('tags__slug', 'count')
+    )
+
+
+def count_cooking_time(queryset):
+    """Возвращает количество рецептов queryset по интервалам времени."""
+    bucket = Case(
+        *(
+            When(cooking_time__lte=high, then=Value(index))
+            for index, (low, high) in enumerate(COOKING_TIME_BUCKETS)
+            if high is not None
+        ),
+        default=Value(len(COOKING_TIME_BUCKETS) - 1),
+        output_field=IntegerField(),
+    )
+    counts = dict(
+        queryset.order_by()
+        .annotate(bucket=bucket)
+        .values('bucket')
+        .annotate(count=Count('pk', distinct=True))
+        .values_list('bucket', 'count')
+    )
+    return [
+        {'min': low, 'max': high, 'count': counts.get(index, 0)}
+        for index, (low, high) in enumerate(COOKING_TIME_BUCKETS)
+    ]
+
+
+# Фасет, функция подсчёта и параметры фильтра, которые он заменяет.
+FACETS = {
+    'tags': (count_tags, ('tags',)),
+    'cooking_time': (
+        count_cooking_time, ('cooking_time_min', 'cooking_time_max')
+    ),
+}
+
+
+def get_requested_facets(request):
+    """Возвращает фасеты из параметра facets в порядке FACETS."""
+    value = request.query_params.get('facets')
+    if value is None:
+        return ()
+    names = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = names.difference(FACETS)
+    if unknown:
+        raise ValidationError(
+            {'facets': f'Неизвестные фасеты: {", ".join(sorted(unknown))}.'}
+        )
+    return tuple(name for name in FACETS if name in names)
+
+
+def count_facets(request, queryset, filterset_class, names):
+    """
+    Считает рецепты по фасетам для текущего фильтра.
+
+    Каждый фасет считается одним запросом с группировкой по выборке,
+    отфильтрованной всеми параметрами, кроме параметров самого фасета:
+    так рядом с каждым тэгом видно, сколько рецептов будет найдено,
+    если добавить его к уже выбранным.
+    """
+    facets = {}
+    for name in names:
+        count, params = FACETS[name]
+        data = request.query_params.copy()
+        for param in params:
+            data.pop(param, None)
+        facets[name] = count(
+            filterset_class(data, queryset=queryset, request=request).qs
+        )
+    return facets
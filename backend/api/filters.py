@@ -19,7 +19,10 @@ class IngredientFilter(FilterSet):
 
 
 class RecipeFilter(FilterSet):
-    """Фильтр для рецептов по автору, тегам и статусу избранного."""
+    """
+    Фильтр для рецептов по автору, тегам, статусу избранного
+    и времени приготовления (cooking_time_min и cooking_time_max).
+    """
     author = filters.ModelChoiceFilter(
         queryset=User.objects.all())
     tags = filters.ModelMultipleChoiceFilter(
@@ -33,10 +36,14 @@ class RecipeFilter(FilterSet):
     is_in_shopping_cart = filters.BooleanFilter(
         method='get_is_in_shopping_cart'
     )
+    cooking_time = filters.RangeFilter()
 
     class Meta:
         model = Recipe
-        fields = ('author', 'tags', 'is_favorited', 'is_in_shopping_cart')
+        fields = (
+            'author', 'tags', 'is_favorited', 'is_in_shopping_cart',
+            'cooking_time',
+        )
 
     def get_is_favorited(self, queryset, name, value):
         """Фильтрует рецепты по статусу избранного пользователя."""
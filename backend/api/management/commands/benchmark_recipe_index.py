@@ -0,0 +1,192 @@
+import random
+import statistics
+import sys
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.filters import RecipeFilter
+from api.projections import RECIPE_COLUMNS
+from api.recipe_index import recipe_index, search_recipes
+from backend.constant import PAGE_SIZE
+from recipes.generation import bump_recipes_generation
+from recipes.importers import iter_batches
+from recipes.models import FavoriteRecipe, Recipe, ShoppingCart, Tag
+
+User = get_user_model()
+
+
+def get_index_size(index):
+    """Возвращает примерный объём памяти индекса в байтах."""
+    size = sum(
+        sys.getsizeof(values) for values in (
+            index.ids, index.keys, index.authors,
+            index.sorted_ids, index.sorted_positions,
+        )
+    )
+    size += sum(map(sys.getsizeof, index.by_author.values()))
+    size += sum(map(sys.getsizeof, index.by_tag.values()))
+    return size + sys.getsizeof(index.alive)
+
+
+def measure(func, repeat):
+    """Возвращает медиану времени выполнения func в миллисекундах."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает поиск рецептов по индексу в памяти с запросом '
+        'к базе на частых сочетаниях фильтров.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Количество повторов каждого замера.',
+        )
+        parser.add_argument(
+            '--create',
+            type=int,
+            default=0,
+            help=(
+                'Сначала создать столько случайных рецептов, а также '
+                'избранное и корзину пользователя. Только для тестовой '
+                'базы.'
+            ),
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10_000,
+            help='Количество рецептов, создаваемых за раз.',
+        )
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--repeat и --batch-size должны быть больше 0.')
+        if options['create']:
+            self.create_recipes(options['create'], options['batch_size'])
+        started = time.perf_counter()
+        with recipe_index.lock:
+            recipe_index.load()
+        self.stdout.write(
+            f'Индекс: {len(recipe_index.ids)} рецептов, сборка '
+            f'{time.perf_counter() - started:.1f} с, '
+            f'{get_index_size(recipe_index) / 2 ** 20:.1f} МБ.'
+        )
+        user = User.objects.annotate(
+            favorites=Count('favorite')
+        ).order_by('-favorites').first()
+        self.stdout.write(
+            f'{"Фильтр":<40} {"Найдено":>9} {"SQL, мс":>9} '
+            f'{"Индекс, мс":>11} {"Ускорение":>10}'
+        )
+        for label, params in self.get_combinations():
+            request = Request(APIRequestFactory().get('/', params))
+            request.user = user
+            self.compare(label, request, options['repeat'])
+
+    @staticmethod
+    def get_combinations():
+        """Возвращает сочетания фильтров для замера."""
+        slugs = list(
+            Tag.objects.annotate(recipes_count=Count('recipes'))
+            .order_by('-recipes_count').values_list('slug', flat=True)[:3]
+        )
+        return (
+            ('без фильтра', {}),
+            ('1 тэг', {'tags': slugs[:1]}),
+            ('3 тэга', {'tags': slugs}),
+            ('избранное', {'is_favorited': 1}),
+            ('2 тэга + избранное', {'tags': slugs[:2], 'is_favorited': 1}),
+            ('2 тэга + корзина', {
+                'tags': slugs[:2], 'is_in_shopping_cart': 1,
+            }),
+            ('1 тэг, страница 1000', {'tags': slugs[:1], 'page': 1000}),
+        )
+
+    def compare(self, label, request, repeat):
+        """Замеряет количество и первую страницу обоими способами."""
+        queryset = Recipe.objects.values_list(*RECIPE_COLUMNS)
+        offset = (int(request.query_params.get('page', 1)) - 1) * PAGE_SIZE
+
+        def run_sql():
+            recipes = RecipeFilter(
+                request.query_params, queryset=queryset, request=request
+            ).qs
+            return recipes.count(), list(
+                recipes[offset:offset + PAGE_SIZE]
+            )
+
+        def run_index():
+            recipes = search_recipes(request, RecipeFilter, queryset)
+            return recipes.count(), recipes[offset:offset + PAGE_SIZE]
+
+        count, page = run_sql()
+        if run_index() != (count, page):
+            self.stderr.write(f'{label}: результаты различаются.')
+        sql = measure(run_sql, repeat)
+        index = measure(run_index, repeat)
+        self.stdout.write(
+            f'{label:<40} {count:>9} {sql:>9.2f} {index:>11.2f} '
+            f'{sql / index:>9.1f}x'
+        )
+
+    def create_recipes(self, count, batch_size):
+        """Создаёт случайные рецепты, избранное и корзину пользователя."""
+        authors = list(User.objects.values_list('id', flat=True)[:1000])
+        tags = list(Tag.objects.values_list('id', flat=True))
+        if not authors or not tags:
+            raise CommandError(
+                'Для создания рецептов нужны пользователи и тэги.'
+            )
+        user_id = authors[0]
+        for batch in iter_batches(range(count), batch_size):
+            with transaction.atomic():
+                last_id = Recipe.objects.order_by('-id').values_list(
+                    'id', flat=True
+                ).first() or 0
+                Recipe.objects.bulk_create(
+                    Recipe(
+                        name=f'Рецепт {number}',
+                        text='Тестовый рецепт.',
+                        cooking_time=random.randint(1, 180),
+                        author_id=random.choice(authors),
+                    )
+                    for number in batch
+                )
+                ids = list(Recipe.objects.filter(id__gt=last_id).values_list(
+                    'id', flat=True
+                ))
+                Recipe.tags.through.objects.bulk_create(
+                    Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+                    for recipe_id in ids
+                    for tag_id in random.sample(
+                        tags, random.randint(1, min(3, len(tags)))
+                    )
+                )
+                for model in (FavoriteRecipe, ShoppingCart):
+                    model.objects.bulk_create(
+                        (
+                            model(user_id=user_id, recipe_id=recipe_id)
+                            for recipe_id in random.sample(
+                                ids, len(ids) // 100
+                            )
+                        ),
+                        ignore_conflicts=True,
+                    )
+            self.stdout.write(f'Создано рецептов: {batch[-1] + 1}.')
+        bump_recipes_generation()
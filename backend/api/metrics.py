@@ -0,0 +1,18 @@
+import os
+from collections import Counter
+from threading import Lock
+
+_counters = Counter()
+_lock = Lock()
+
+
+def increment(name, value=1):
+    """Увеличивает счётчик текущего процесса."""
+    with _lock:
+        _counters[name] += value
+
+
+def snapshot():
+    """Возвращает значения счётчиков текущего процесса."""
+    with _lock:
+        return {'pid': os.getpid(), 'counters': dict(_counters)}
@@ -0,0 +1,283 @@
+import gzip
+import hashlib
+import logging
+import math
+import random
+import re
+from contextlib import ExitStack
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import OperationalError
+from django.http import JsonResponse
+from django.utils.cache import patch_vary_headers
+
+from backend.constant import (
+    BROTLI_QUALITY,
+    COMPRESS_MIN_SIZE,
+    COMPRESSED_CACHE_TIMEOUT,
+    DB_DEADLINE_RETRY_AFTER,
+    GZIP_LEVEL,
+    LOAD_SHED_RETRY_AFTER,
+    LOAD_SHED_SMOOTHING,
+)
+from backend.db import statement_timeout
+from .deadlines import get_db_deadline, get_handler, is_query_canceled
+from .metrics import increment
+from .shedding import (
+    PRIORITY_NAMES,
+    SHED_PRESSURE,
+    get_load_priority,
+    get_queue_time,
+)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_TYPES = re.compile(r'^(text/|application/(json|javascript))')
+
+
+def compress_gzip(content):
+    """Сжимает данные gzip без метки времени в заголовке."""
+    return gzip.compress(content, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def compress_brotli(content):
+    """Сжимает данные brotli."""
+    return brotli.compress(content, quality=BROTLI_QUALITY)
+
+
+COMPRESSORS = {'gzip': compress_gzip}
+if brotli is not None:
+    COMPRESSORS = {'br': compress_brotli, **COMPRESSORS}
+
+
+def choose_encoding(accept_encoding):
+    """
+    Выбирает кодировку сжатия по заголовку Accept-Encoding.
+
+    При равном весе предпочтение отдаётся brotli. Кодировки
+    с некорректным весом q пропускаются.
+    """
+    weights = {}
+    for item in accept_encoding.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        match = re.search(r'q=([^;]*)', params)
+        if match:
+            try:
+                quality = float(match.group(1).strip())
+            except ValueError:
+                continue
+        weights[coding.strip().lower()] = quality
+    best, best_quality = None, 0
+    for coding in COMPRESSORS:
+        quality = weights.get(coding, weights.get('*', 0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+class CompressionMiddleware:
+    """
+    Сжимает ответы gzip или brotli в зависимости от Accept-Encoding.
+
+    Ответы меньше COMPRESS_MIN_SIZE байт не сжимаются. Для действий,
+    перечисленных во view в атрибуте compressed_cache_actions, сжатые
+    байты кэшируются по хэшу содержимого и не пересжимаются,
+    пока содержимое не изменится.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            response.streaming
+            or response.has_header('Content-Encoding')
+            or not COMPRESSIBLE_TYPES.match(response.get('Content-Type', ''))
+        ):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(response.content) < COMPRESS_MIN_SIZE:
+            return response
+        encoding = choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if encoding is None:
+            return response
+        if self.is_cacheable(response):
+            response.content = self.get_cached(response.content, encoding)
+        else:
+            response.content = COMPRESSORS[encoding](response.content)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        response['Content-Length'] = str(len(response.content))
+        return response
+
+    @staticmethod
+    def is_cacheable(response):
+        """Проверяет, разрешено ли view кэшировать сжатый ответ."""
+        view = getattr(response, 'renderer_context', {}).get('view')
+        return (
+            response.status_code == 200
+            and getattr(view, 'action', None)
+            in getattr(view, 'compressed_cache_actions', ())
+        )
+
+    @staticmethod
+    def get_cached(content, encoding):
+        """Возвращает сжатые байты из кэша или сжимает и сохраняет их."""
+        key = (
+            f'compressed:{encoding}:'
+            + hashlib.blake2b(content, digest_size=20).hexdigest()
+        )
+        compressed = cache.get(key)
+        if compressed is None:
+            increment('compressed_cache_miss')
+            compressed = COMPRESSORS[encoding](content)
+            cache.set(key, compressed, COMPRESSED_CACHE_TIMEOUT)
+        else:
+            increment('compressed_cache_hit')
+        return compressed
+
+
+class DatabaseDeadlineMiddleware:
+    """
+    Ограничивает время запросов к базе при обработке HTTP-запроса.
+
+    Предел для view определяет get_db_deadline. Если запрос к базе
+    прерван по statement_timeout, клиент получает 503 с заголовком
+    Retry-After, а счётчики db_deadline_exceeded
+    и db_deadline_exceeded_<действие> увеличиваются.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with ExitStack() as stack:
+            request._db_deadline_stack = stack
+            return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None)
+        name, handler = get_handler(
+            view_class, request.method, getattr(view_func, 'actions', None)
+        )
+        request._db_deadline_action = name
+        request._db_deadline_stack.enter_context(
+            statement_timeout(get_db_deadline(view_class, handler))
+        )
+
+    def process_exception(self, request, exception):
+        if not (
+            isinstance(exception, OperationalError)
+            and is_query_canceled(exception)
+        ):
+            return None
+        increment('db_deadline_exceeded')
+        increment(f'db_deadline_exceeded_{request._db_deadline_action}')
+        response = JsonResponse(
+            {'detail': 'Сервер перегружен, повторите запрос позже.'},
+            status=503,
+            json_dumps_params={'ensure_ascii': False},
+        )
+        response['Retry-After'] = str(DB_DEADLINE_RETRY_AFTER)
+        return response
+
+
+class LoadSheddingMiddleware:
+    """
+    Отбрасывает запросы с низким приоритетом при перегрузке.
+
+    Нагрузка процесса — наибольшее из отношений сглаженного времени
+    ожидания в очереди прокси к LOAD_SHEDDING_QUEUE_TARGET и числа
+    обрабатываемых запросов к LOAD_SHEDDING_MAX_IN_FLIGHT. Запрос
+    отбрасывается ответом 503, если нагрузка не ниже порога его
+    приоритета из SHED_PRESSURE: сначала низкий приоритет, при большей
+    перегрузке — обычный, критичный — никогда. Retry-After выбирается
+    случайно, чтобы клиенты не повторяли запросы одновременно.
+    Счётчики load_shed, load_shed_<приоритет>
+    и load_shed_<действие> доступны в /api/metrics/.
+
+    Синхронный процесс gunicorn обрабатывает один запрос за раз,
+    и при LOAD_SHEDDING_MAX_IN_FLIGHT, равном 0, нагрузка видна только
+    по X-Request-Start: о запросах без заголовка процесс один раз
+    предупреждает в журнале.
+    """
+
+    def __init__(self, get_response):
+        if not settings.LOAD_SHEDDING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.lock = Lock()
+        self.in_flight = 0
+        self.queue_time = 0.0
+        self.warned = False
+
+    def __call__(self, request):
+        queue_time = get_queue_time(request)
+        if (
+            not self.warned
+            and not settings.LOAD_SHEDDING_MAX_IN_FLIGHT
+            and 'HTTP_X_REQUEST_START' not in request.META
+        ):
+            self.warned = True
+            logger.warning(
+                'Запрос без заголовка X-Request-Start: при '
+                'LOAD_SHEDDING_MAX_IN_FLIGHT=0 перегрузка не определяется, '
+                'и запросы не отбрасываются. Задайте заголовок в прокси.'
+            )
+        with self.lock:
+            self.in_flight += 1
+            if queue_time is not None:
+                self.queue_time += LOAD_SHED_SMOOTHING * (
+                    queue_time - self.queue_time
+                )
+            request._load_pressure = self.get_pressure()
+        try:
+            return self.get_response(request)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def get_pressure(self):
+        """Возвращает нагрузку процесса относительно целевой."""
+        pressure = self.queue_time / settings.LOAD_SHEDDING_QUEUE_TARGET
+        if settings.LOAD_SHEDDING_MAX_IN_FLIGHT:
+            pressure = max(
+                pressure,
+                self.in_flight / settings.LOAD_SHEDDING_MAX_IN_FLIGHT,
+            )
+        return pressure
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None)
+        name, handler = get_handler(
+            view_class, request.method, getattr(view_func, 'actions', None)
+        )
+        priority = get_load_priority(request, view_class, handler)
+        if request._load_pressure < SHED_PRESSURE.get(priority, math.inf):
+            return None
+        increment('load_shed')
+        increment(f'load_shed_{PRIORITY_NAMES[priority]}')
+        increment(f'load_shed_{name}')
+        response = JsonResponse(
+            {'detail': 'Сервер перегружен, повторите запрос позже.'},
+            status=503,
+            json_dumps_params={'ensure_ascii': False},
+        )
+        response['Retry-After'] = str(
+            random.randint(1, LOAD_SHED_RETRY_AFTER)
+        )
+        return response
@@ -1,9 +1,33 @@
 from rest_framework.pagination import PageNumberPagination
 
 from backend.constant import PAGE_SIZE
+from backend.pagination import EstimatedCountPaginator
 
 
 class LimitPaginator(PageNumberPagination):
-    """Пагинатор с атрибутом количества объектов на странице."""
+    """
+    Пагинатор с атрибутом количества объектов на странице.
+
+    Большие выборки не пересчитываются на каждой странице, а поле
+    count_approximate ответа показывает, что count приблизителен.
+    """
     page_size_query_param = 'limit'
     page_size = PAGE_SIZE
+    django_paginator_class = EstimatedCountPaginator
+
+    def get_paginated_response(self, data):
+        """Добавляет к ответу признак приблизительного количества."""
+        response = super().get_paginated_response(data)
+        response.data['count_approximate'] = (
+            self.page.paginator.count_is_approximate
+        )
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        """Описывает поле count_approximate в схеме ответа."""
+        schema = super().get_paginated_response_schema(schema)
+        schema['properties']['count_approximate'] = {
+            'type': 'boolean',
+            'example': False,
+        }
+        return schema
@@ -0,0 +1,326 @@
+import re
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+from rest_framework.exceptions import ValidationError
+
+from backend.constant import MAX_RECIPES_LIMIT
+
+from recipes.models import Amount, FavoriteRecipe, Recipe, ShoppingCart
+from users.models import Follow
+
+User = get_user_model()
+
+
+class FieldPlan:
+    """
+    План сборки словаря ответа из строки .values_list().
+
+    Ключи идут в том же порядке, что и поля соответствующего
+    сериализатора, поэтому результат рендерится в те же байты.
+    Поле задаётся именем колонки (к нему добавляется prefix) или парой
+    (ключ, колонка). Вычисляемые поля передаются в build() отдельно.
+    """
+
+    def __init__(self, *fields, prefix='', computed=()):
+        self.fields = fields
+        self.prefix = prefix
+        self.computed = computed
+        self.columns = []
+        plan = []
+        for field in fields:
+            key, column = self.split(field)
+            if key in computed:
+                plan.append((key, None))
+                continue
+            plan.append((key, len(self.columns)))
+            self.columns.append(column)
+        self.plan = tuple(plan)
+        self.keys = tuple(key for key, index in plan)
+        self.columns = tuple(self.columns)
+        self.width = len(self.columns)
+
+    def split(self, field):
+        """Возвращает ключ и колонку поля."""
+        if isinstance(field, tuple):
+            return field
+        return field, self.prefix + field
+
+    def only(self, keys):
+        """Возвращает план только с ключами keys в прежнем порядке."""
+        return FieldPlan(
+            *(field for field in self.fields if self.split(field)[0] in keys),
+            prefix=self.prefix,
+            computed=self.computed,
+        )
+
+    def build(self, row, offset=0, **computed):
+        """Собирает словарь из строки, начиная с колонки offset."""
+        return {
+            key: computed[key] if index is None else row[offset + index]
+            for key, index in self.plan
+        }
+
+
+TAG_PLAN = FieldPlan('id', 'name', 'slug', prefix='tag__')
+INGREDIENT_PLAN = FieldPlan('id', 'name', 'measurement_unit')
+AMOUNT_PLAN = FieldPlan(
+    'id', 'name', 'measurement_unit', ('amount', 'amount'),
+    prefix='ingredient__',
+)
+USER_FIELDS = (
+    'email', 'id', 'username', 'first_name', 'last_name',
+    'is_subscribed', 'avatar',
+)
+USER_PLAN = FieldPlan(*USER_FIELDS, computed=('is_subscribed',))
+AUTHOR_PLAN = FieldPlan(
+    *USER_FIELDS, prefix='author__', computed=('is_subscribed',)
+)
+RECIPE_PLAN = FieldPlan(
+    'id', 'tags', 'author', 'ingredients', 'is_favorited',
+    'is_in_shopping_cart', 'name', 'image', 'text', 'cooking_time',
+    computed=(
+        'tags', 'author', 'ingredients', 'is_favorited',
+        'is_in_shopping_cart',
+    ),
+)
+RECIPE_FIELDS = RECIPE_PLAN.keys
+SHORT_RECIPE_PLAN = FieldPlan('id', 'name', 'image', 'cooking_time')
+RECIPE_IMAGE_STORAGE = Recipe._meta.get_field('image').storage
+AVATAR_STORAGE = User._meta.get_field('avatar').storage
+
+
+def file_url(request, storage, name):
+    """Возвращает ссылку на файл так же, как ImageField в DRF."""
+    if not name:
+        return None
+    url = storage.url(name)
+    if request is None:
+        return url
+    return request.build_absolute_uri(url)
+
+
+def get_user_ids(user, model, field, ids):
+    """Возвращает id из ids, связанные с пользователем через model."""
+    if not user.is_authenticated or not ids:
+        return set()
+    return set(model.objects.filter(
+        user=user, **{f'{field}__in': ids}
+    ).values_list(field, flat=True))
+
+
+def get_recipe_columns(fields=RECIPE_FIELDS):
+    """
+    Возвращает колонки values_list для выбранных полей рецепта.
+
+    Первой всегда идёт колонка id, колонки автора — последними
+    и только если выбрано поле author.
+    """
+    columns = RECIPE_PLAN.only(fields).columns
+    if 'id' not in fields:
+        columns = ('id',) + columns
+    if 'author' in fields:
+        columns += AUTHOR_PLAN.columns
+    return columns
+
+
+RECIPE_COLUMNS = get_recipe_columns()
+
+
+def build_ingredients(queryset):
+    """Собирает список ингредиентов как IngredientSerializer."""
+    return [
+        INGREDIENT_PLAN.build(row)
+        for row in queryset.values_list(*INGREDIENT_PLAN.columns)
+    ]
+
+
+def build_recipes(rows, request, fields=RECIPE_FIELDS):
+    """
+    Собирает рецепты как RecipeSerializer за постоянное число запросов.
+
+    Запросы тэгов, ингредиентов, избранного, корзины и подписок
+    выполняются, только если соответствующее поле выбрано.
+
+    Args:
+        rows: Строки queryset.values_list(*get_recipe_columns(fields)).
+        request: Текущий запрос.
+        fields: Выводимые поля рецепта.
+
+    Returns:
+        list: Список словарей рецептов.
+    """
+    rows = list(rows)
+    ids = [row[0] for row in rows]
+    plan = RECIPE_PLAN.only(fields)
+    offset = 0 if 'id' in fields else 1
+    tags = defaultdict(list)
+    if 'tags' in fields:
+        for row in Recipe.tags.through.objects.filter(
+            recipe_id__in=ids
+        ).order_by('tag__name', 'tag__id').values_list(
+            'recipe_id', *TAG_PLAN.columns
+        ):
+            tags[row[0]].append(TAG_PLAN.build(row, offset=1))
+    ingredients = defaultdict(list)
+    if 'ingredients' in fields:
+        for row in Amount.objects.filter(recipe_id__in=ids).order_by(
+            'id'
+        ).values_list('recipe_id', *AMOUNT_PLAN.columns):
+            ingredients[row[0]].append(AMOUNT_PLAN.build(row, offset=1))
+    user = request.user
+    favorited = in_cart = subscribed = set()
+    if 'is_favorited' in fields:
+        favorited = get_user_ids(user, FavoriteRecipe, 'recipe_id', ids)
+    if 'is_in_shopping_cart' in fields:
+        in_cart = get_user_ids(user, ShoppingCart, 'recipe_id', ids)
+    author_offset = offset + plan.width
+    author_id_index = author_offset + AUTHOR_PLAN.columns.index('author__id')
+    if 'author' in fields:
+        subscribed = get_user_ids(
+            user, Follow, 'is_following_id',
+            {row[author_id_index] for row in rows},
+        )
+    recipes = []
+    for row in rows:
+        author = None
+        if 'author' in fields:
+            author = AUTHOR_PLAN.build(
+                row,
+                offset=author_offset,
+                is_subscribed=row[author_id_index] in subscribed,
+            )
+            author['avatar'] = file_url(
+                request, AVATAR_STORAGE, author['avatar']
+            )
+        recipe = plan.build(
+            row,
+            offset=offset,
+            tags=tags[row[0]],
+            author=author,
+            ingredients=ingredients[row[0]],
+            is_favorited=row[0] in favorited,
+            is_in_shopping_cart=row[0] in in_cart,
+        )
+        if 'image' in recipe:
+            recipe['image'] = file_url(
+                request, RECIPE_IMAGE_STORAGE, recipe['image']
+            )
+        recipes.append(recipe)
+    return recipes
+
+
+def get_recipe_ordering():
+    """Возвращает сортировку рецептов по умолчанию в виде выражений."""
+    return [
+        F(field[1:]).desc() if field.startswith('-') else F(field).asc()
+        for field in Recipe._meta.ordering
+    ]
+
+
+def get_author_recipes(author_ids, recipes_limit=None):
+    """
+    Возвращает первые рецепты авторов и их общее количество.
+
+    Рецепты нумеруются внутри автора оконной функцией ROW_NUMBER(),
+    и из базы читаются только первые recipes_limit рецептов каждого
+    автора; количество считает оконный COUNT() в том же запросе.
+    Django 3.2 не умеет фильтровать по оконным функциям, поэтому
+    запрос оборачивается во внешний SELECT.
+
+    Returns:
+        tuple: Словари {id автора: строки SHORT_RECIPE_PLAN}
+        и {id автора: количество рецептов}.
+    """
+    recipes = defaultdict(list)
+    counts = {}
+    if not author_ids:
+        return recipes, counts
+    partition = [F('author_id')]
+    queryset = Recipe.objects.filter(author_id__in=author_ids).annotate(
+        recipes_count=Window(Count('id'), partition_by=partition),
+        recipe_position=Window(
+            RowNumber(),
+            partition_by=partition,
+            order_by=get_recipe_ordering(),
+        ),
+    ).values_list(
+        'author_id', *SHORT_RECIPE_PLAN.columns,
+        'recipes_count', 'recipe_position',
+    )
+    connection = connections[queryset.db]
+    quote = connection.ops.quote_name
+    columns = ('author_id', *SHORT_RECIPE_PLAN.columns, 'recipes_count')
+    sql, params = queryset.query.sql_with_params()
+    condition = ''
+    if recipes_limit is not None:
+        # Хотя бы одна строка автора нужна ради количества рецептов.
+        condition = f'WHERE {quote("recipe_position")} <= %s'
+        params = (*params, max(recipes_limit, 1))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT {", ".join(map(quote, columns))} '
+            f'FROM ({sql}) ranked {condition} '
+            f'ORDER BY {quote("recipe_position")}',
+            params,
+        )
+        for row in cursor.fetchall():
+            counts[row[0]] = row[-1]
+            if recipes_limit is None or len(recipes[row[0]]) < recipes_limit:
+                recipes[row[0]].append(row)
+    return recipes, counts
+
+
+def get_recipes_limit(request):
+    """
+    Возвращает число из параметра recipes_limit или None.
+
+    Значения больше MAX_RECIPES_LIMIT не меняют ответ и заменяются
+    им, чтобы не переполнить параметр запроса к базе.
+    """
+    recipes_limit = request.query_params.get('recipes_limit', None)
+    if recipes_limit is None:
+        return None
+    if not re.fullmatch(r'\d+', recipes_limit, re.ASCII):
+        raise ValidationError(
+            {'recipes_limit': 'Ожидается неотрицательное целое число.'}
+        )
+    digits = recipes_limit.lstrip('0')
+    if len(digits) > len(str(MAX_RECIPES_LIMIT)):
+        return MAX_RECIPES_LIMIT
+    return min(int(digits or 0), MAX_RECIPES_LIMIT)
+
+
+def build_subscriptions(rows, request):
+    """
+    Собирает подписки как FollowSerializer за постоянное число запросов.
+
+    Args:
+        rows: Строки queryset.values_list(*USER_PLAN.columns).
+        request: Текущий запрос.
+
+    Returns:
+        list: Список словарей авторов с их рецептами.
+    """
+    rows = list(rows)
+    id_index = USER_PLAN.columns.index('id')
+    recipes, counts = get_author_recipes(
+        [row[id_index] for row in rows], get_recipes_limit(request)
+    )
+    subscriptions = []
+    for row in rows:
+        data = USER_PLAN.build(row, is_subscribed=True)
+        data['avatar'] = file_url(request, AVATAR_STORAGE, data['avatar'])
+        data['recipes'] = []
+        for recipe_row in recipes[row[id_index]]:
+            recipe = SHORT_RECIPE_PLAN.build(recipe_row, offset=1)
+            recipe['image'] = file_url(
+                request, RECIPE_IMAGE_STORAGE, recipe['image']
+            )
+            data['recipes'].append(recipe)
+        data['recipes_count'] = counts.get(row[id_index], 0)
+        subscriptions.append(data)
+    return subscriptions
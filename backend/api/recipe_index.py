@@ -0,0 +1,404 @@
+import calendar
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+from threading import Lock
+
+from backend.constant import (
+    RECIPE_INDEX_LOAD_CHUNK,
+    RECIPE_INDEX_REBUILD_THRESHOLD,
+)
+from recipes.models import FavoriteRecipe, Recipe, ShoppingCart
+from sync.cursors import START, Cursor, committed_after
+from sync.models import ChangeLog
+
+# Количество установленных битов в каждом значении байта.
+POPCOUNT = bytes(bin(byte).count('1') for byte in range(256))
+# Номера установленных битов каждого значения байта от старшего.
+BYTE_BITS = tuple(
+    tuple(bit for bit in range(7, -1, -1) if byte >> bit & 1)
+    for byte in range(256)
+)
+# Размер блока битовой карты, пропускаемого целиком при поиске смещения.
+SCAN_CHUNK = 4096
+
+
+def to_microseconds(value):
+    """Переводит дату в целое число микросекунд для сортировки."""
+    return (
+        calendar.timegm(value.utctimetuple()) * 1_000_000 + value.microsecond
+    )
+
+
+def bitmap_from_positions(positions, size):
+    """Собирает битовую карту из номеров позиций за один проход."""
+    data = bytearray((size + 7) // 8)
+    for position in positions:
+        data[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(data, 'little')
+
+
+def count_bits(bitmap):
+    """Возвращает количество установленных битов."""
+    return bin(bitmap).count('1')
+
+
+def select_positions(bitmap, offset, limit):
+    """
+    Возвращает до limit установленных битов от старшего к младшему,
+    пропустив первые offset.
+
+    Блоки по SCAN_CHUNK байт, целиком попадающие в смещение,
+    пропускаются по количеству битов без перебора.
+    """
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+    positions = []
+    end = len(data)
+    while end > 0:
+        start = max(end - SCAN_CHUNK, 0)
+        count = sum(data[start:end].translate(POPCOUNT))
+        if count <= offset:
+            offset -= count
+            end = start
+            continue
+        for index in range(end - 1, start - 1, -1):
+            for bit in BYTE_BITS[data[index]]:
+                if offset:
+                    offset -= 1
+                    continue
+                positions.append(index * 8 + bit)
+                if len(positions) == limit:
+                    return positions
+        end = start
+    return positions
+
+
+class RecipeIndex:
+    """
+    Индекс рецептов процесса для частых сочетаний фильтров.
+
+    Рецепты занимают позиции в порядке (pub_date, id), поэтому старшие
+    биты — новые рецепты, как в списке. Для каждого тэга хранится
+    битовая карта позиций в виде целого числа Python, для авторов —
+    массивы позиций. Сочетание тэгов, автора, избранного и корзины
+    вычисляется операциями над битовыми картами, а из базы читается
+    только страница найденных рецептов.
+
+    Индекс догоняет изменения по журналу ленты синхронизации, который
+    пишется и в других процессах и читается в порядке фиксации
+    транзакций, а сигналы текущего процесса
+    отмечают рецепты для немедленного обновления. Рецепт с датой
+    публикации старше последней, а также больше
+    RECIPE_INDEX_REBUILD_THRESHOLD изменений сразу приводят
+    к полной перестройке.
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.loaded = False
+        self.pending = set()
+
+    def reset(self):
+        """Очищает индекс."""
+        self.ids = array('q')
+        self.keys = array('q')
+        self.authors = array('q')
+        self.sorted_ids = array('q')
+        self.sorted_positions = array('q')
+        self.by_author = defaultdict(lambda: array('q'))
+        self.by_tag = defaultdict(int)
+        self.alive = 0
+        self.cursor = START
+
+    def mark(self, recipe_ids):
+        """Отмечает рецепты, которые нужно перечитать из базы."""
+        with self.lock:
+            self.pending.update(recipe_ids)
+
+    def position_of(self, recipe_id):
+        """Возвращает позицию рецепта или None."""
+        index = bisect_left(self.sorted_ids, recipe_id)
+        if (
+            index < len(self.sorted_ids)
+            and self.sorted_ids[index] == recipe_id
+        ):
+            return self.sorted_positions[index]
+        return None
+
+    def append(self, recipe_id, author_id, key):
+        """Добавляет рецепт в конец индекса и возвращает его позицию."""
+        position = len(self.ids)
+        self.ids.append(recipe_id)
+        self.keys.append(key)
+        self.authors.append(author_id)
+        index = bisect_left(self.sorted_ids, recipe_id)
+        self.sorted_ids.insert(index, recipe_id)
+        self.sorted_positions.insert(index, position)
+        self.by_author[author_id].append(position)
+        self.alive |= 1 << position
+        return position
+
+    def load(self):
+        """Строит индекс по всем рецептам."""
+        self.reset()
+        self.cursor = get_log_cursor()
+        rows = Recipe.objects.order_by('pub_date', 'id').values_list(
+            'id', 'author_id', 'pub_date'
+        ).iterator(chunk_size=RECIPE_INDEX_LOAD_CHUNK)
+        positions = {}
+        for position, (recipe_id, author_id, pub_date) in enumerate(rows):
+            self.ids.append(recipe_id)
+            self.keys.append(to_microseconds(pub_date))
+            self.authors.append(author_id)
+            self.by_author[author_id].append(position)
+            positions[recipe_id] = position
+        for recipe_id in sorted(positions):
+            self.sorted_ids.append(recipe_id)
+            self.sorted_positions.append(positions[recipe_id])
+        tag_positions = defaultdict(list)
+        for recipe_id, tag_id in Recipe.tags.through.objects.values_list(
+            'recipe_id', 'tag_id'
+        ).iterator(chunk_size=RECIPE_INDEX_LOAD_CHUNK):
+            if recipe_id in positions:
+                tag_positions[tag_id].append(positions[recipe_id])
+        size = len(self.ids)
+        for tag_id, tagged in tag_positions.items():
+            self.by_tag[tag_id] = bitmap_from_positions(tagged, size)
+        self.alive = (1 << size) - 1
+        self.loaded = True
+
+    def apply(self, recipe_ids):
+        """
+        Перечитывает рецепты из базы.
+
+        Возвращает False, если индекс нужно перестроить целиком.
+        """
+        rows = {
+            recipe_id: (author_id, to_microseconds(pub_date))
+            for recipe_id, author_id, pub_date in Recipe.objects.filter(
+                id__in=recipe_ids
+            ).values_list('id', 'author_id', 'pub_date')
+        }
+        tags = defaultdict(set)
+        for recipe_id, tag_id in Recipe.tags.through.objects.filter(
+            recipe_id__in=rows
+        ).values_list('recipe_id', 'tag_id'):
+            tags[recipe_id].add(tag_id)
+        created = []
+        for recipe_id in recipe_ids:
+            position = self.position_of(recipe_id)
+            if recipe_id not in rows:
+                if position is not None:
+                    self.alive &= ~(1 << position)
+                continue
+            author_id, key = rows[recipe_id]
+            if position is None:
+                created.append((key, recipe_id))
+                continue
+            if self.keys[position] != key:
+                return False
+            if self.authors[position] != author_id:
+                self.authors[position] = author_id
+                self.by_author[author_id].append(position)
+            self.set_tags(position, tags[recipe_id])
+        for key, recipe_id in sorted(created):
+            if self.keys and key < self.keys[-1]:
+                return False
+            author_id = rows[recipe_id][0]
+            position = self.append(recipe_id, author_id, key)
+            self.set_tags(position, tags[recipe_id])
+        return True
+
+    def set_tags(self, position, tag_ids):
+        """Устанавливает тэги рецепта на позиции position."""
+        bit = 1 << position
+        for tag_id in set(self.by_tag).union(tag_ids):
+            if tag_id in tag_ids:
+                self.by_tag[tag_id] |= bit
+            elif self.by_tag[tag_id] & bit:
+                self.by_tag[tag_id] &= ~bit
+
+    def read_log(self):
+        """
+        Возвращает записи журнала рецептов после курсора индекса.
+
+        Журнал читается без блокировки индекса, чтобы запрос к базе
+        не задерживал поиск в других потоках. Для ещё не построенного
+        индекса возвращает None.
+        """
+        with self.lock:
+            if not self.loaded:
+                return None
+            cursor = self.cursor
+        return list(committed_after(
+            ChangeLog.objects.filter(model='recipes'), cursor
+        ).values_list('xid', 'id', 'object_id'))
+
+    def refresh(self, entries):
+        """
+        Догоняет изменения рецептов по записям журнала и сигналам.
+
+        Записи журнала отдаются только для зафиксированных транзакций
+        в порядке фиксации, поэтому курсор сдвигается за последнюю
+        из них. Пока журнал читался, другой поток мог сдвинуть курсор
+        дальше: повторное чтение тех же рецептов безвредно, а курсор
+        назад не возвращается.
+        """
+        if not self.loaded:
+            self.load()
+            return
+        entries = entries or ()
+        recipe_ids = self.pending | {entry[2] for entry in entries}
+        self.pending = set()
+        if entries:
+            self.cursor = max(self.cursor, Cursor(*entries[-1][:2]))
+        if not recipe_ids:
+            return
+        if (
+            len(recipe_ids) > RECIPE_INDEX_REBUILD_THRESHOLD
+            or not self.apply(recipe_ids)
+        ):
+            self.load()
+
+    def get_author_bitmap(self, author_id):
+        """Возвращает битовую карту рецептов автора."""
+        return bitmap_from_positions(
+            (
+                position for position in self.by_author.get(author_id, ())
+                if self.authors[position] == author_id
+            ),
+            len(self.ids),
+        )
+
+    def get_ids_bitmap(self, recipe_ids):
+        """Возвращает битовую карту рецептов с id из recipe_ids."""
+        return bitmap_from_positions(
+            filter(
+                lambda position: position is not None,
+                map(self.position_of, recipe_ids),
+            ),
+            len(self.ids),
+        )
+
+    def search(self, tag_ids=(), author_id=None, recipe_sets=()):
+        """
+        Возвращает битовую карту рецептов, подходящих под фильтр.
+
+        Args:
+            tag_ids: Тэги, хотя бы один из которых есть у рецепта.
+            author_id: Автор рецептов.
+            recipe_sets: Наборы id рецептов, например избранное,
+                в каждый из которых рецепт должен входить.
+        """
+        entries = self.read_log()
+        with self.lock:
+            self.refresh(entries)
+            bitmap = self.alive
+            if tag_ids:
+                bitmap &= reduce(
+                    or_, (self.by_tag.get(tag_id, 0) for tag_id in tag_ids)
+                )
+            if author_id is not None:
+                bitmap &= self.get_author_bitmap(author_id)
+            for recipe_ids in recipe_sets:
+                bitmap &= self.get_ids_bitmap(recipe_ids)
+            return bitmap
+
+    def get_page_ids(self, bitmap, offset, limit):
+        """Возвращает id рецептов страницы от новых к старым."""
+        positions = select_positions(bitmap, offset, limit)
+        with self.lock:
+            return [self.ids[position] for position in positions]
+
+
+class IndexedRecipes:
+    """
+    Выборка рецептов по битовой карте индекса для пагинатора.
+
+    Количество считается по битовой карте, а срез читает из базы
+    строки queryset только для рецептов страницы.
+    """
+
+    def __init__(self, index, bitmap, queryset):
+        self.index = index
+        self.bitmap = bitmap
+        self.queryset = queryset
+
+    def count(self):
+        """Возвращает количество найденных рецептов."""
+        return count_bits(self.bitmap)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice) or key.step is not None:
+            raise TypeError('Поддерживаются только срезы без шага.')
+        start = key.start or 0
+        if key.stop is None:
+            limit = self.count()
+        else:
+            limit = key.stop - start
+        if limit <= 0:
+            return []
+        ids = self.index.get_page_ids(self.bitmap, start, limit)
+        rows = {row[0]: row for row in self.queryset.filter(id__in=ids)}
+        return [rows[recipe_id] for recipe_id in ids if recipe_id in rows]
+
+
+def get_log_cursor():
+    """
+    Возвращает позицию последней зафиксированной записи журнала рецептов.
+
+    Все записи до неё уже видны, поэтому индекс, построенный после
+    её чтения, отражает их изменения.
+    """
+    last = committed_after(
+        ChangeLog.objects.filter(model='recipes'), START
+    ).reverse().values_list('xid', 'id').first()
+    return START if last is None else Cursor(*last)
+
+
+def search_recipes(request, filterset_class, queryset):
+    """
+    Ищет рецепты по индексу, если фильтр ему по силам.
+
+    Индекс обслуживает тэги, автора, избранное и корзину. Для прочих
+    параметров и некорректных значений возвращает None, и список
+    строится обычным запросом.
+
+    Args:
+        queryset: Рецепты в виде .values_list() с id в первой колонке.
+    """
+    filterset = filterset_class(
+        request.query_params, queryset=queryset, request=request
+    )
+    if not filterset.is_valid():
+        return None
+    data = filterset.form.cleaned_data
+    if data.get('cooking_time'):
+        return None
+    user = request.user
+    recipe_sets = []
+    if user.is_authenticated:
+        for param, model in (
+            ('is_favorited', FavoriteRecipe),
+            ('is_in_shopping_cart', ShoppingCart),
+        ):
+            if data.get(param) is not None:
+                recipe_sets.append(list(
+                    model.objects.filter(user=user)
+                    .values_list('recipe_id', flat=True)
+                ))
+    author = data.get('author')
+    bitmap = recipe_index.search(
+        tag_ids=[tag.id for tag in data.get('tags') or ()],
+        author_id=author.id if author else None,
+        recipe_sets=recipe_sets,
+    )
+    return IndexedRecipes(recipe_index, bitmap, queryset)
+
+
+recipe_index = RecipeIndex()
@@ -1,7 +1,4 @@
-import base64
-
 from django.contrib.auth import get_user_model
-from django.core.files.base import ContentFile
 from django.core.validators import (
     MaxValueValidator,
     MinValueValidator
@@ -19,21 +16,56 @@ from recipes.models import (
     Tag
 )
 from users.models import Follow
+from .uploads import (
+    check_image_pixels,
+    decode_base64_image,
+    multipart_to_dict,
+)
 
 User = get_user_model()
 
 
 class Base64ImageField(serializers.ImageField):
-    """Сериализатор для изображений."""
+    """
+    Сериализатор для изображений.
+
+    Принимает изображение строкой base64 в JSON или файлом
+    в multipart/form-data.
+    """
     def to_internal_value(self, data):
         """Преобразует данные из формата Base64 в объект изображения."""
         if isinstance(data, str) and data.startswith('data:image'):
-            format, imgstr = data.split(';base64,')
-            ext = format.split('/')[-1]
-            data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
+            data = decode_base64_image(data)
+        if hasattr(data, 'seek'):
+            check_image_pixels(data)
         return super().to_internal_value(data)
 
 
+class SparseFieldsMixin:
+    """
+    Оставляет в ответе только поля из context['fields'].
+
+    Применяется только к корневому сериализатору (или к элементам
+    корневого списка): вложенные сериализаторы получают тот же
+    контекст, но выводят все свои поля. Без fields в контексте
+    выводятся все поля.
+    """
+
+    def get_fields(self):
+        """Убирает поля, не выбранные в запросе."""
+        fields = super().get_fields()
+        selected = self.context.get('fields')
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        if selected is None or parent is not None:
+            return fields
+        for name in list(fields):
+            if name not in selected:
+                fields.pop(name)
+        return fields
+
+
 class AvatarSerializer(serializers.ModelSerializer):
     """Сериализатор аватара пользователя."""
     avatar = Base64ImageField(required=False, allow_null=True)
@@ -85,7 +117,13 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
 
     def get_is_subscribed(self, obj):
-        """Проверяет, подписан ли текущий пользователь на данного."""
+        """
+        Проверяет, подписан ли текущий пользователь на данного.
+
+        Если queryset аннотирован is_subscribed, запрос не выполняется.
+        """
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         user = self.context.get('request').user
         return user.is_authenticated and Follow.objects.filter(
             user=user,
@@ -93,6 +131,32 @@ class UserSerializer(serializers.ModelSerializer):
         ).exists()
 
 
+class UserCountsSerializer(SparseFieldsMixin, UserSerializer):
+    """
+    Сериализатор пользователя с количеством рецептов и подписчиков.
+
+    Количества берутся из аннотаций queryset; выводятся только поля,
+    перечисленные в контексте include.
+    """
+    recipes_count = serializers.IntegerField(read_only=True)
+    followers_count = serializers.IntegerField(read_only=True)
+
+    class Meta(UserSerializer.Meta):
+        fields = UserSerializer.Meta.fields + (
+            'recipes_count',
+            'followers_count',
+        )
+
+    def get_fields(self):
+        """Убирает количества, не запрошенные в include."""
+        fields = super().get_fields()
+        include = self.context.get('include', ())
+        for name in ('recipes_count', 'followers_count'):
+            if name not in include:
+                fields.pop(name, None)
+        return fields
+
+
 class FollowSerializer(UserSerializer):
     """Сериализатор для модели подписок."""
     recipes = serializers.SerializerMethodField()
@@ -269,7 +333,7 @@ class IngredientCreateSerializer(serializers.ModelSerializer):
         fields = ('id', 'amount')
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериализатор для модели рецептов."""
     tags = TagSerializer(many=True)
     ingredients = IngredientGetSerializer(many=True, read_only=True,
@@ -296,6 +360,8 @@ class RecipeSerializer(serializers.ModelSerializer):
 
     def get_is_favorited(self, obj):
         """Проверяет, добавлен ли рецепт в избранное."""
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         user = self.context.get('request').user
         return (user.is_authenticated and user.favorite.filter(
             recipe=obj
@@ -303,6 +369,8 @@ class RecipeSerializer(serializers.ModelSerializer):
 
     def get_is_in_shopping_cart(self, obj):
         """Проверяет, находится ли рецепт в корзине покупок."""
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         user = self.context.get('request').user
         return (user.is_authenticated and user.shopping_cart.filter(
             recipe=obj
@@ -313,6 +381,17 @@ class RecipeSerializer(serializers.ModelSerializer):
         return self.context.get('request')
 
 
+class RecipeDetailSerializer(RecipeSerializer):
+    """Сериализатор рецепта со счётчиками просмотров и переходов."""
+
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + (
+            'views_count',
+            'clicks_count',
+        )
+        read_only_fields = ('views_count', 'clicks_count')
+
+
 class ShortRecipeSerializer(serializers.ModelSerializer):
     """Сериализатор для краткой информации о рецепте."""
     class Meta():
@@ -344,6 +423,12 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
             'ingredients', 'tags', 'image', 'name', 'text', 'cooking_time'
         )
 
+    def to_internal_value(self, data):
+        """Принимает данные как из JSON, так и из multipart/form-data."""
+        return super().to_internal_value(multipart_to_dict(
+            data, json_fields=('ingredients',), list_fields=('tags',)
+        ))
+
     def validate_items(self, items, item_model, item_name):
         """Проверяет корректность элементов списка."""
         if not items:
@@ -0,0 +1,113 @@
+import math
+import time
+
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.views import APIView
+
+from backend.constant import (
+    LOAD_SHED_MAX_QUEUE_TIME,
+    LOAD_SHED_NORMAL_PRESSURE,
+)
+from .authentication import has_cached_token
+
+# Приоритеты запросов при перегрузке: низкие отбрасываются первыми,
+# критичные не отбрасываются никогда.
+PRIORITY_LOW = 0
+PRIORITY_NORMAL = 1
+PRIORITY_CRITICAL = 2
+PRIORITY_NAMES = {
+    PRIORITY_LOW: 'low',
+    PRIORITY_NORMAL: 'normal',
+    PRIORITY_CRITICAL: 'critical',
+}
+# Нагрузка относительно целевой, начиная с которой отбрасываются
+# запросы приоритета.
+SHED_PRESSURE = {
+    PRIORITY_LOW: 1,
+    PRIORITY_NORMAL: LOAD_SHED_NORMAL_PRESSURE,
+}
+
+
+def load_priority(priority):
+    """
+    Задаёт действию view приоритет при перегрузке.
+
+    Переопределяет атрибут load_priority view и приоритет
+    по умолчанию из get_load_priority.
+    """
+
+    def decorator(method):
+        method.load_priority = priority
+        return method
+
+    return decorator
+
+
+def has_credentials(request, view_class):
+    """
+    Проверяет, что у запроса есть действующие учётные данные.
+
+    Аутентификация DRF выполняется позже, внутри view, а проверка
+    токена по базе нагружала бы её именно при перегрузке, поэтому
+    токен ищется только в кэше аутентификации. Сессия учитывается
+    лишь для view вне DRF, например админки: DRF по ней
+    не аутентифицирует.
+    """
+    if has_cached_token(request):
+        return True
+    if view_class is not None and issubclass(view_class, APIView):
+        return False
+    return (
+        settings.SESSION_COOKIE_NAME in request.COOKIES
+        and request.user.is_authenticated
+    )
+
+
+def get_load_priority(request, view_class, handler):
+    """
+    Возвращает приоритет запроса при перегрузке.
+
+    Приоритет берётся из декоратора load_priority действия, затем
+    из атрибута load_priority view. Иначе чтение анонимным клиентом
+    имеет низкий приоритет, запись клиентом с учётными данными
+    из has_credentials — критичный, остальные запросы — обычный.
+    """
+    for source in (handler, view_class):
+        priority = getattr(source, 'load_priority', None)
+        if priority is not None:
+            return priority
+    authenticated = has_credentials(request, view_class)
+    if request.method in SAFE_METHODS:
+        return PRIORITY_NORMAL if authenticated else PRIORITY_LOW
+    return PRIORITY_CRITICAL if authenticated else PRIORITY_NORMAL
+
+
+def get_queue_time(request):
+    """
+    Возвращает время ожидания запроса в очереди в миллисекундах.
+
+    Время отсчитывается от заголовка X-Request-Start, который ставит
+    прокси: «t=1700000000.123» у nginx ($msec) или число секунд,
+    миллисекунд либо микросекунд с начала эпохи. Без заголовка,
+    при неразборчивом значении, а также при отрицательном времени
+    или времени больше LOAD_SHED_MAX_QUEUE_TIME возвращается None:
+    такие замеры — следствие расхождения часов или подделанного
+    заголовка, а настоящая очередь вызывает отбрасывание задолго
+    до этого предела.
+    """
+    value = request.META.get('HTTP_X_REQUEST_START', '')
+    try:
+        started = float(value.strip().removeprefix('t='))
+    except ValueError:
+        return None
+    if not math.isfinite(started):
+        return None
+    # Единицы определяются по величине: секунды с начала эпохи
+    # меньше 10 ** 11, миллисекунды и микросекунды — больше.
+    while started > 10 ** 11:
+        started /= 1000
+    queue_time = (time.time() - started) * 1000
+    if not 0 <= queue_time <= LOAD_SHED_MAX_QUEUE_TIME:
+        return None
+    return queue_time
@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from recipes.generation import bump_user_generation
+from recipes.models import FavoriteRecipe, Recipe, ShoppingCart
+from users.models import Follow
+from .authentication import invalidate_tokens
+from .recipe_index import recipe_index
+
+User = get_user_model()
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """Удаляет из кэша токен после выхода пользователя."""
+    invalidate_tokens(instance.key)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    """Удаляет из кэша токены изменённого пользователя."""
+    if not created:
+        invalidate_tokens(
+            *Token.objects.filter(user=instance).values_list('key', flat=True)
+        )
+
+
+@receiver(post_save, sender=FavoriteRecipe)
+@receiver(post_delete, sender=FavoriteRecipe)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def bump_owner_generation(sender, instance, **kwargs):
+    """
+    Сбрасывает закэшированные ответы пользователя.
+
+    Вызывается при изменении его избранного, корзины и подписок.
+    """
+    bump_user_generation(instance.user_id)
+
+
+def mark_recipes(recipe_ids):
+    """Отмечает рецепты для обновления индекса после фиксации."""
+    if settings.RECIPE_INDEX and recipe_ids:
+        transaction.on_commit(lambda: recipe_index.mark(recipe_ids))
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def mark_changed_recipe(sender, instance, **kwargs):
+    """Отмечает изменённый рецепт для индекса."""
+    mark_recipes({instance.id})
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def mark_retagged_recipes(
+    sender, instance, action, reverse, pk_set, using, **kwargs
+):
+    """
+    Отмечает для индекса рецепты с изменёнными тэгами.
+
+    При очистке рецептов тэга pk_set не передаётся, поэтому рецепты
+    тэга читаются из таблицы связей перед очисткой.
+    """
+    if not settings.RECIPE_INDEX:
+        return
+    if action in ('post_add', 'post_remove') and pk_set:
+        mark_recipes(set(pk_set) if reverse else {instance.id})
+    elif action == 'pre_clear' and reverse:
+        mark_recipes(set(
+            sender.objects.using(using).filter(
+                tag_id=instance.id
+            ).values_list('recipe_id', flat=True)
+        ))
+    elif action == 'post_clear' and not reverse:
+        mark_recipes({instance.id})
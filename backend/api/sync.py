@@ -0,0 +1,135 @@
+import re
+
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+from backend.constant import SYNC_MAX_PAGE_SIZE, SYNC_PAGE_SIZE
+from recipes.models import Ingredient, Recipe, Tag
+from sync.cursors import Cursor, committed_after, format_cursor, parse_cursor
+from sync.models import ChangeLog
+from sync.signals import TRACKED_MODELS
+from .projections import RECIPE_COLUMNS, build_ingredients, build_recipes
+from .serializers import TagSerializer
+
+# Разделы ленты, видимые только своему пользователю.
+USER_SECTIONS = ('favorites', 'shopping_cart', 'subscriptions')
+PUBLIC_SECTIONS = ('ingredients', 'tags', 'recipes')
+# Модель, поле с id объекта и поле с id владельца для разделов.
+SECTION_MODELS = {
+    section: (model, id_field, user_field)
+    for model, (section, id_field, user_field) in TRACKED_MODELS.items()
+}
+
+
+def get_int_param(request, name, default, maximum=None):
+    """Возвращает неотрицательный целый параметр запроса."""
+    value = request.query_params.get(name)
+    if value is None:
+        return default
+    if not re.fullmatch(r'\d{1,18}', value, re.ASCII):
+        raise ValidationError({name: 'Ожидалось неотрицательное число.'})
+    value = int(value)
+    if maximum is not None:
+        value = min(value, maximum)
+    return value
+
+
+def get_since(request):
+    """Возвращает позицию журнала из параметра since."""
+    cursor = parse_cursor(request.query_params.get('since', ''))
+    if cursor is None:
+        raise ValidationError(
+            {'since': 'Ожидался токен since из предыдущего ответа.'}
+        )
+    return cursor
+
+
+def build_objects(section, ids, request, using):
+    """
+    Возвращает текущие объекты раздела с id из ids из базы using.
+
+    Для разделов пользователя возвращает id объектов, которые сейчас
+    есть в его избранном, корзине или подписках.
+    """
+    if section == 'ingredients':
+        return build_ingredients(
+            Ingredient.objects.using(using).filter(id__in=ids)
+        )
+    if section == 'tags':
+        return TagSerializer(
+            Tag.objects.using(using).filter(id__in=ids), many=True
+        ).data
+    if section == 'recipes':
+        return build_recipes(
+            Recipe.objects.using(using).filter(id__in=ids)
+            .values_list(*RECIPE_COLUMNS),
+            request,
+        )
+    model, id_field, user_field = SECTION_MODELS[section]
+    return sorted(model.objects.using(using).filter(**{
+        user_field: request.user.id, f'{id_field}__in': ids
+    }).values_list(id_field, flat=True))
+
+
+def build_changes(request):
+    """
+    Собирает страницу ленты изменений после токена since.
+
+    Записи журнала читаются в порядке фиксации транзакций и только
+    для завершённых транзакций (см. sync.cursors), поэтому запись
+    долгой транзакции не окажется позади уже выданного токена.
+    Из нескольких записей об одном объекте остаётся последняя.
+    Для созданных и изменённых объектов отдаётся их текущее
+    состояние, для удалённых — id. Объект, которого уже нет, считается
+    удалённым, даже если последней в порядке транзакций была запись
+    о его изменении.
+
+    Returns:
+        dict: Изменения по разделам, новый токен since и признак
+        того, что есть следующая страница.
+    """
+    since = get_since(request)
+    limit = max(
+        get_int_param(request, 'limit', SYNC_PAGE_SIZE, SYNC_MAX_PAGE_SIZE), 1
+    )
+    visible = Q(user_id__isnull=True)
+    if request.user.is_authenticated:
+        visible |= Q(user_id=request.user.id)
+    queryset = committed_after(ChangeLog.objects.filter(visible), since)
+    entries = list(queryset.values_list(
+        'xid', 'id', 'model', 'object_id', 'action'
+    )[:limit + 1])
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    actions = {}
+    for xid, entry_id, section, object_id, action in entries:
+        actions[section, object_id] = action
+    sections = PUBLIC_SECTIONS
+    if request.user.is_authenticated:
+        sections += USER_SECTIONS
+    changes = {}
+    for section in sections:
+        upserted = {
+            object_id for (name, object_id), action in actions.items()
+            if name == section and action == ChangeLog.Action.UPSERT
+        }
+        deleted = {
+            object_id for (name, object_id), action in actions.items()
+            if name == section and action == ChangeLog.Action.DELETE
+        }
+        objects = build_objects(
+            section, upserted, request, queryset.db
+        ) if upserted else []
+        deleted |= upserted.difference(
+            item['id'] if isinstance(item, dict) else item
+            for item in objects
+        )
+        changes[section] = {
+            'upserted': objects,
+            'deleted': sorted(deleted),
+        }
+    return {
+        'since': format_cursor(Cursor(*entries[-1][:2]) if entries else since),
+        'has_more': has_more,
+        'changes': changes,
+    }
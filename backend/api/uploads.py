@@ -0,0 +1,150 @@
+import binascii
+import json
+import re
+
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.http import QueryDict
+from PIL import Image
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+
+from backend.constant import (
+    BASE64_DECODE_CHUNK,
+    MAX_IMAGE_PIXELS,
+    MAX_UPLOAD_SIZE,
+)
+
+BASE64_MARKER = ';base64,'
+# Символы вне алфавита base64, включая переводы строк и пробелы.
+NOT_BASE64 = re.compile(r'[^A-Za-z0-9+/=]')
+
+
+class UploadTooLarge(APIException):
+    """Загружаемый файл больше MAX_UPLOAD_SIZE."""
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = (
+        f'Размер файла не должен превышать {MAX_UPLOAD_SIZE} байт.'
+    )
+    default_code = 'upload_too_large'
+
+
+class LimitedTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """
+    Обработчик загрузки, записывающий файл во временный файл на диске.
+
+    Загрузка прерывается, как только файл превысит MAX_UPLOAD_SIZE,
+    не дожидаясь получения всего тела запроса.
+    """
+
+    def new_file(self, *args, **kwargs):
+        """Создаёт временный файл, проверив заявленный размер."""
+        super().new_file(*args, **kwargs)
+        if self.content_length and self.content_length > MAX_UPLOAD_SIZE:
+            raise UploadTooLarge
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        """Дописывает блок во временный файл, следя за размером."""
+        self.received += len(raw_data)
+        if self.received > MAX_UPLOAD_SIZE:
+            self.upload_interrupted()
+            raise UploadTooLarge
+        return super().receive_data_chunk(raw_data, start)
+
+
+def decode_base64_image(data):
+    """
+    Декодирует изображение из data URI во временный файл по частям.
+
+    Размер проверяется до декодирования, а сама строка не копируется
+    целиком: за раз декодируется не более BASE64_DECODE_CHUNK символов.
+    Переводы строк и пробелы внутри base64 допускаются.
+    """
+    header_end = data.find(BASE64_MARKER)
+    if header_end == -1:
+        raise serializers.ValidationError('Ожидалось изображение в base64.')
+    content_type = data[len('data:'):header_end]
+    start = header_end + len(BASE64_MARKER)
+    if (len(data) - start) // 4 * 3 > MAX_UPLOAD_SIZE:
+        raise UploadTooLarge
+    file = TemporaryUploadedFile(
+        name='temp.' + content_type.split('/')[-1],
+        content_type=content_type,
+        size=0,
+        charset=None,
+    )
+    # a2b_base64 пропускает символы вне алфавита, поэтому границы
+    # частей считаются только по символам алфавита: остаток части,
+    # не кратный 4, переносится в следующую.
+    rest = ''
+    try:
+        for position in range(start, len(data), BASE64_DECODE_CHUNK):
+            chunk = rest + NOT_BASE64.sub(
+                '', data[position:position + BASE64_DECODE_CHUNK]
+            )
+            end = len(chunk) - len(chunk) % 4
+            file.write(binascii.a2b_base64(chunk[:end]))
+            rest = chunk[end:]
+        if rest:
+            file.write(binascii.a2b_base64(rest))
+    except binascii.Error:
+        file.close()
+        raise serializers.ValidationError('Некорректные данные base64.')
+    file.size = file.tell()
+    file.seek(0)
+    return file
+
+
+def check_image_pixels(file):
+    """
+    Проверяет число пикселей по заголовку изображения.
+
+    Pillow читает только заголовок, так что огромное изображение
+    отклоняется до декодирования. Ошибки формата оставлены
+    для стандартной проверки ImageField.
+    """
+    try:
+        with Image.open(file) as image:
+            width, height = image.size
+    except Exception:
+        return
+    finally:
+        file.seek(0)
+    if width * height > MAX_IMAGE_PIXELS:
+        raise serializers.ValidationError(
+            f'Изображение не должно содержать больше '
+            f'{MAX_IMAGE_PIXELS} пикселей.'
+        )
+
+
+def multipart_to_dict(data, json_fields=(), list_fields=()):
+    """
+    Приводит данные multipart/form-data к виду JSON-запроса.
+
+    Поля json_fields передаются строкой JSON, поля list_fields —
+    повторяющимися значениями или строкой с JSON-списком.
+    """
+    if not isinstance(data, QueryDict):
+        return data
+    result = {key: data.get(key) for key in data}
+    for field in json_fields:
+        if isinstance(result.get(field), str):
+            try:
+                result[field] = json.loads(result[field])
+            except ValueError:
+                raise serializers.ValidationError(
+                    {field: 'Ожидалась строка JSON.'}
+                )
+    for field in list_fields:
+        values = data.getlist(field)
+        if len(values) == 1 and values[0].lstrip().startswith('['):
+            try:
+                values = json.loads(values[0])
+            except ValueError:
+                raise serializers.ValidationError(
+                    {field: 'Ожидался список JSON.'}
+                )
+        if field in data:
+            result[field] = values
+    return result
@@ -4,7 +4,9 @@ from rest_framework import routers
 from .views import (
     IngredientViewSet,
     FoodgramUserViewSet,
+    MetricsView,
     RecipeViewSet,
+    SyncView,
     TagViewSet,
 )
 
@@ -15,6 +17,8 @@ router.register('recipes', RecipeViewSet, basename='recipes')
 router.register('users', FoodgramUserViewSet, basename='users')
 urlpatterns = [
     path('', include(router.urls)),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
+    path('sync/', SyncView.as_view(), name='sync'),
     path('auth/', include('djoser.urls')),
     path('auth/', include('djoser.urls.authtoken')),
 ]
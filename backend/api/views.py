@@ -1,20 +1,60 @@
+import io
+import re
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Sum
-from django.http import FileResponse
+from django.db.models import (
+    BooleanField,
+    Exists,
+    OuterRef,
+    Prefetch,
+    Sum,
+    Value,
+)
+from django.http import FileResponse, Http404
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.serializers import SetPasswordSerializer
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import (
     AllowAny,
+    IsAdminUser,
     IsAuthenticated,
     IsAuthenticatedOrReadOnly,
 )
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from backend.constant import (
+    MAX_OBJECT_ID,
+    MULTI_GET_MAX_IDS,
+    SHOPPING_CART_DB_DEADLINE,
+)
+from backend.expressions import count_subquery
+from .caching import cache_anonymous_response, stale_while_revalidate
+from .deadlines import db_deadline
+from .facets import count_facets, get_requested_facets
 from .filters import IngredientFilter, RecipeFilter
+from .metrics import snapshot
+from .projections import (
+    RECIPE_FIELDS,
+    USER_PLAN,
+    build_ingredients,
+    build_recipes,
+    build_subscriptions,
+    get_recipe_columns,
+)
+from .recipe_index import search_recipes
+from .shedding import PRIORITY_CRITICAL, PRIORITY_LOW
+from .sync import build_changes
+from recipes.catalog import catalog_snapshots
+from recipes.counters import recipe_counters
+from recipes.deletion import delete_recipe
+from recipes.generation import get_recipes_generation
+from recipes.links import encode_recipe_id, recipe_exists
 from recipes.models import (
     Amount,
     Ingredient,
@@ -28,14 +68,15 @@ from .paginators import LimitPaginator
 from .serializers import (
     AvatarSerializer,
     CreateRecipeSerializer,
+    RecipeDetailSerializer,
     IngredientSerializer,
     FavoriteRecipeSerializer,
     FollowCreateDeleteSerializer,
-    FollowSerializer,
     RecipeSerializer,
     ShoppingCartSerializer,
     ShortRecipeSerializer,
     TagSerializer,
+    UserCountsSerializer,
     UserCreateSerializer,
     UserSerializer
 )
@@ -43,6 +84,134 @@ from users.models import Follow
 
 User = get_user_model()
 
+# Текстовые поля справочников в порядке полей сериализаторов.
+INGREDIENT_COLUMNS = ('name', 'measurement_unit')
+TAG_COLUMNS = ('name', 'slug')
+# Количества, которые можно добавить к пользователям параметром include.
+USER_COUNTS = {
+    'recipes_count': (Recipe, 'author'),
+    'followers_count': (Follow, 'is_following'),
+}
+
+
+def is_object_id(value):
+    """Проверяет, что строка из цифр ASCII задаёт допустимый id."""
+    return bool(
+        re.fullmatch(r'\d+', value, re.ASCII)
+        and len(value) <= len(str(MAX_OBJECT_ID))
+        and int(value) <= MAX_OBJECT_ID
+    )
+
+
+def get_requested_ids(request):
+    """
+    Возвращает id из параметра ids без повторов и в исходном порядке.
+
+    Если параметр не передан, возвращает None.
+    """
+    value = request.query_params.get('ids')
+    if value is None:
+        return None
+    parts = [part.strip() for part in value.split(',') if part.strip()]
+    if not all(is_object_id(part) for part in parts):
+        raise ValidationError(
+            {'ids': 'Ожидался список целых id через запятую.'}
+        )
+    ids = list(dict.fromkeys(int(part) for part in parts))
+    if not ids:
+        raise ValidationError({'ids': 'Передайте хотя бы один id.'})
+    if len(ids) > MULTI_GET_MAX_IDS:
+        raise ValidationError(
+            {'ids': f'Можно запросить не больше {MULTI_GET_MAX_IDS} id.'}
+        )
+    return ids
+
+
+def get_requested_fields(request, available):
+    """
+    Возвращает поля ответа по параметрам fields и omit.
+
+    Поля возвращаются в порядке available. Если ни один параметр
+    не передан, возвращает None; при запросе по ids поле id
+    выводится всегда. Пустой выбор полей — ошибка запроса.
+    """
+    params = {
+        param: request.query_params.get(param) for param in ('fields', 'omit')
+    }
+    if params['fields'] is None and params['omit'] is None:
+        return None
+    selected = set(available)
+    for param, value in params.items():
+        if value is None:
+            continue
+        names = {name.strip() for name in value.split(',') if name.strip()}
+        unknown = names.difference(available)
+        if unknown:
+            raise ValidationError(
+                {param: f'Неизвестные поля: {", ".join(sorted(unknown))}.'}
+            )
+        if param == 'fields':
+            selected &= names
+        else:
+            selected -= names
+    if 'ids' in request.query_params:
+        selected.add('id')
+    if not selected:
+        raise ValidationError(
+            {'fields': 'Не выбрано ни одного поля ответа.'}
+        )
+    return tuple(name for name in available if name in selected)
+
+
+def multi_get_response(ids, items):
+    """
+    Возвращает объекты в порядке запрошенных id и список ненайденных.
+
+    Args:
+        ids: Запрошенные id.
+        items: Сериализованные объекты в любом порядке.
+    """
+    by_id = {item['id']: item for item in items}
+    results = [by_id[item_id] for item_id in ids if item_id in by_id]
+    return Response({
+        'count': len(results),
+        'results': results,
+        'missing': [item_id for item_id in ids if item_id not in by_id],
+    })
+
+
+def user_flag(user, model, field):
+    """
+    Возвращает выражение: связан ли текущий пользователь с объектом.
+
+    Для анонимного пользователя выражение всегда ложно.
+    """
+    if not user.is_authenticated:
+        return Value(False, output_field=BooleanField())
+    return Exists(model.objects.filter(user=user, **{field: OuterRef('pk')}))
+
+
+def get_catalog_snapshot():
+    """Возвращает снимок справочников, если он включён и готов."""
+    if not settings.CATALOG_SNAPSHOT_DIR:
+        return None
+    return catalog_snapshots.get()
+
+
+def annotate_users(queryset, user, include=(), is_subscribed=True):
+    """
+    Аннотирует пользователей подпиской текущего пользователя
+    и запрошенными количествами одним запросом.
+    """
+    counts = {
+        name: count_subquery(model.objects.all(), field)
+        for name, (model, field) in USER_COUNTS.items()
+        if name in include
+    }
+    if is_subscribed:
+        counts['is_subscribed'] = user_flag(user, Follow, 'is_following')
+    return queryset.annotate(**counts)
+
 
 class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     """Вьюсет для работы с ингредиентами."""
@@ -51,6 +220,26 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     filterset_class = IngredientFilter
     filter_backends = (DjangoFilterBackend,)
     pagination_class = None
+    compressed_cache_actions = ('list', 'retrieve')
+    load_priority = PRIORITY_LOW
+
+    def list(self, request, *args, **kwargs):
+        """
+        Возвращает список ингредиентов без создания моделей.
+
+        Если включён снимок справочников, список и поиск по названию
+        берутся из него без запроса к базе.
+        """
+        snapshot = get_catalog_snapshot()
+        if snapshot is not None:
+            ingredients = snapshot['ingredients']
+            name = request.query_params.get('name')
+            return Response(ingredients.build(
+                INGREDIENT_COLUMNS,
+                ingredients.search(name) if name else None,
+            ))
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(build_ingredients(queryset))
 
 
 class TagViewSet(viewsets.ReadOnlyModelViewSet):
@@ -58,6 +247,15 @@ class TagViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None
+    compressed_cache_actions = ('list', 'retrieve')
+    load_priority = PRIORITY_LOW
+
+    def list(self, request, *args, **kwargs):
+        """Возвращает список тэгов из снимка справочников или из базы."""
+        snapshot = get_catalog_snapshot()
+        if snapshot is not None:
+            return Response(snapshot['tags'].build(TAG_COLUMNS))
+        return super().list(request, *args, **kwargs)
 
 
 class RecipeViewSet(viewsets.ModelViewSet):
@@ -71,6 +269,112 @@ class RecipeViewSet(viewsets.ModelViewSet):
         IsAuthenticatedOrReadOnly,
         AuthorOrReadOnly
     )
+    compressed_cache_actions = ('retrieve',)
+
+    def get_requested_fields(self):
+        """Возвращает поля, выбранные параметрами fields и omit."""
+        return get_requested_fields(
+            self.request, self.get_serializer_class().Meta.fields
+        )
+
+    def get_serializer_context(self):
+        """Передаёт сериализатору выбранные поля."""
+        context = super().get_serializer_context()
+        if self.action in ('list', 'retrieve'):
+            context['fields'] = self.get_requested_fields()
+        return context
+
+    def get_queryset(self):
+        """
+        Загружает для просмотра рецепта только данные выбранных полей.
+
+        Автор, тэги и ингредиенты загружаются вместе с рецептом,
+        а признаки избранного и корзины — подзапросами.
+        """
+        queryset = super().get_queryset()
+        if self.action != 'retrieve':
+            return queryset
+        fields = self.get_requested_fields()
+        if fields is None:
+            fields = RecipeDetailSerializer.Meta.fields
+        if 'author' in fields:
+            queryset = queryset.select_related('author')
+        if 'tags' in fields:
+            queryset = queryset.prefetch_related('tags')
+        if 'ingredients' in fields:
+            queryset = queryset.prefetch_related(Prefetch(
+                'amount',
+                queryset=Amount.objects.select_related('ingredient'),
+            ))
+        user = self.request.user
+        flags = {
+            'is_favorited': (FavoriteRecipe, 'recipe'),
+            'is_in_shopping_cart': (ShoppingCart, 'recipe'),
+        }
+        return queryset.annotate(**{
+            name: user_flag(user, model, field)
+            for name, (model, field) in flags.items()
+            if name in fields
+        })
+
+    @cache_anonymous_response(get_recipes_generation)
+    def list(self, request, *args, **kwargs):
+        """
+        Возвращает страницу рецептов без создания моделей.
+
+        С параметром ids возвращает без пагинации рецепты с этими id
+        в запрошенном порядке. Колонки и дополнительные запросы
+        выбираются по параметрам fields и omit. С параметром facets
+        к странице добавляется количество рецептов по тэгам
+        и интервалам времени приготовления. При RECIPE_INDEX частые
+        фильтры вычисляются по индексу в памяти. Ответы анонимам
+        кэшируются до изменения поколения рецептов.
+        """
+        fields = self.get_requested_fields()
+        if fields is None:
+            fields = RECIPE_FIELDS
+        facets = get_requested_facets(request)
+        columns = get_recipe_columns(fields)
+        ids = get_requested_ids(request)
+        if ids is not None:
+            return multi_get_response(ids, build_recipes(
+                self.filter_queryset(self.get_queryset())
+                .values_list(*columns).filter(id__in=ids),
+                request,
+                fields,
+            ))
+        queryset = None
+        if settings.RECIPE_INDEX:
+            queryset = search_recipes(
+                request,
+                self.filterset_class,
+                self.get_queryset().values_list(*columns),
+            )
+        if queryset is None:
+            queryset = self.filter_queryset(
+                self.get_queryset()
+            ).values_list(*columns)
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(build_recipes(queryset, request, fields))
+        response = self.get_paginated_response(
+            build_recipes(page, request, fields)
+        )
+        if facets:
+            response.data['facets'] = count_facets(
+                request, self.get_queryset(), self.filterset_class, facets
+            )
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        """Возвращает рецепт и учитывает его просмотр."""
+        instance = self.get_object()
+        recipe_counters.increment('views_count', instance.id)
+        return Response(self.get_serializer(instance).data)
+
+    def perform_destroy(self, instance):
+        """Удаляет рецепт без загрузки связанных строк."""
+        delete_recipe(instance)
 
     def perform_create(self, serializer):
         """Сохраняет рецепт с авторством текущего пользователя."""
@@ -78,7 +382,9 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
     def get_serializer_class(self):
         """Возвращает сериализатор в зависимости от действия."""
-        if self.action in ('list', 'retrieve'):
+        if self.action == 'retrieve':
+            return RecipeDetailSerializer
+        if self.action == 'list':
             return RecipeSerializer
         if self.action in ('favorite', 'shopping_cart'):
             return ShortRecipeSerializer
@@ -160,6 +466,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
         detail=False,
         permission_classes=[IsAuthenticated],
     )
+    @db_deadline(SHOPPING_CART_DB_DEADLINE)
+    @stale_while_revalidate()
     def download_shopping_cart(self, request):
         """Скачивает список покупок на основе содержимого корзины."""
         shopping_list = []
@@ -180,7 +488,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
             )
         shopping_list_text = "\n".join(shopping_list)
         return FileResponse(
-            shopping_list_text,
+            io.BytesIO(shopping_list_text.encode()),
             content_type="text/plain",
             filename=f'{request.user.username}_shopping_cart.txt',
         )
@@ -188,11 +496,15 @@ class RecipeViewSet(viewsets.ModelViewSet):
     @action(detail=True, url_path="get-link")
     def get_link(self, request, pk=None):
         """Получает короткую ссылку на рецепт."""
-        recipe = get_object_or_404(Recipe, id=pk)
+        if not is_object_id(pk) or not recipe_exists(int(pk)):
+            raise Http404
         return Response(
             {
                 "short-link": request.build_absolute_uri(
-                    reverse("recipes:short_link", args=[recipe.id])
+                    reverse(
+                        "recipes:short_code",
+                        args=[encode_recipe_id(int(pk))]
+                    )
                 )
             },
             status=status.HTTP_200_OK,
@@ -212,12 +524,67 @@ class FoodgramUserViewSet(viewsets.ModelViewSet):
             return [IsAuthenticated(), ]
         return super().get_permissions()
 
+    def get_include(self):
+        """Возвращает количества, запрошенные параметром include."""
+        include = self.request.query_params.get('include', '')
+        return {name for name in include.split(',') if name in USER_COUNTS}
+
+    def get_requested_fields(self):
+        """
+        Возвращает поля, выбранные параметрами fields и omit.
+
+        Количества можно выбрать, только если они запрошены в include.
+        """
+        include = self.get_include()
+        return get_requested_fields(self.request, tuple(
+            name for name in UserCountsSerializer.Meta.fields
+            if name not in USER_COUNTS or name in include
+        ))
+
+    def get_queryset(self):
+        """Аннотирует пользователей для чтения без запросов на каждого."""
+        queryset = super().get_queryset()
+        if self.request.method != 'GET':
+            return queryset
+        fields = self.get_requested_fields()
+        return annotate_users(
+            queryset,
+            self.request.user,
+            self.get_include(),
+            is_subscribed=fields is None or 'is_subscribed' in fields,
+        )
+
+    def list(self, request, *args, **kwargs):
+        """
+        Возвращает страницу пользователей.
+
+        С параметром ids возвращает без пагинации пользователей с этими
+        id в запрошенном порядке.
+        """
+        ids = get_requested_ids(request)
+        if ids is None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            id__in=ids
+        )
+        return multi_get_response(
+            ids, self.get_serializer(queryset, many=True).data
+        )
+
+    def get_serializer_context(self):
+        """Передаёт сериализатору запрошенные количества и поля."""
+        context = super().get_serializer_context()
+        context['include'] = self.get_include()
+        if self.action in ('list', 'retrieve', 'me'):
+            context['fields'] = self.get_requested_fields()
+        return context
+
     def get_serializer_class(self):
         """Возвращает сериализатор в зависимости от действия."""
         if self.action == 'set_password':
             return SetPasswordSerializer
         if self.request.method == 'GET':
-            return UserSerializer
+            return UserCountsSerializer
         return UserCreateSerializer
 
     @action(
@@ -227,7 +594,9 @@ class FoodgramUserViewSet(viewsets.ModelViewSet):
     )
     def me(self, request):
         """Возвращает информацию о текущем пользователе."""
-        serializer = UserSerializer(request.user, context={'request': request})
+        serializer = self.get_serializer(
+            self.get_queryset().get(pk=request.user.pk)
+        )
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     @action(
@@ -277,18 +646,41 @@ class FoodgramUserViewSet(viewsets.ModelViewSet):
         permission_classes=[IsAuthenticated],
         url_path="subscriptions",
     )
+    @stale_while_revalidate()
     def subscriptions(self, request):
         """Возвращает список подписок текущего пользователя."""
         subscriptions = User.objects.filter(
             is_following__user=self.request.user
-        )
+        ).values_list(*USER_PLAN.columns)
         page = self.paginate_queryset(subscriptions)
         if page is not None:
-            serializer = FollowSerializer(
-                page, many=True, context={"request": request}
+            return self.get_paginated_response(
+                build_subscriptions(page, request)
             )
-            return self.get_paginated_response(serializer.data)
-        serializer = FollowSerializer(
-            subscriptions, many=True, context={"request": request}
-        )
-        return Response(serializer.data)
+        return Response(build_subscriptions(subscriptions, request))
+
+
+class MetricsView(APIView):
+    """Счётчики производительности текущего процесса для мониторинга."""
+    permission_classes = (IsAdminUser,)
+    load_priority = PRIORITY_CRITICAL
+
+    def get(self, request):
+        """Возвращает значения счётчиков."""
+        return Response(snapshot(), status=status.HTTP_200_OK)
+
+
+class SyncView(APIView):
+    """
+    Лента изменений для синхронизации клиентов.
+
+    Возвращает объекты, созданные, изменённые или удалённые после
+    токена since. Анонимным пользователям доступны только общие
+    разделы, авторизованным — ещё и их избранное, корзина и подписки.
+    """
+    permission_classes = (AllowAny,)
+    load_priority = PRIORITY_LOW
+
+    def get(self, request):
+        """Возвращает страницу изменений."""
+        return Response(build_changes(request), status=status.HTTP_200_OK)
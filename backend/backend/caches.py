@@ -0,0 +1,12 @@
+from django.conf import settings
+
+# Бэкенды кэша, у которых у каждого процесса своё содержимое.
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def has_shared_cache():
+    """Проверяет, что кэш по умолчанию общий для всех процессов."""
+    return settings.CACHES['default']['BACKEND'] not in LOCAL_CACHE_BACKENDS
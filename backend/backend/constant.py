@@ -14,3 +14,111 @@ MIN_COOKING_TIME = 1  # Минимальное время приготовлен
 
 # Константы для постраничного вывода
 PAGE_SIZE = 5  # Размер страницы для постраничного вывода
+
+
+# Константы для импорта справочников
+IMPORT_BATCH_SIZE = 5000  # Количество строк в одной пачке при импорте
+IMPORT_READ_CHUNK_SIZE = 64 * 1024  # Размер блока чтения файла в символах
+BACKUP_BATCH_SIZE = 1000  # Количество рецептов в пачке при экспорте/импорте
+
+
+# Константы для кэширования
+TOKEN_CACHE_TIMEOUT = 60  # Время жизни токена в кэше в секундах
+COMPRESSED_CACHE_TIMEOUT = 60 * 60  # Время хранения сжатых ответов
+
+
+# Константы для сжатия ответов
+COMPRESS_MIN_SIZE = 1024  # Ответы меньшего размера в байтах не сжимаются
+GZIP_LEVEL = 6  # Степень сжатия gzip
+BROTLI_QUALITY = 5  # Степень сжатия brotli
+
+
+# Константы для коротких ссылок
+SHORT_LINK_LRU_SIZE = 10000  # Количество id в кэше процесса
+SHORT_LINK_LOCAL_TIMEOUT = 30  # Время жизни записи в кэше процесса
+SHORT_LINK_CACHE_TIMEOUT = 60 * 60  # Время жизни найденного рецепта
+SHORT_LINK_MISSING_TIMEOUT = 60  # Время жизни отсутствующего рецепта
+
+
+# Константы для счётчиков просмотров
+COUNTER_FLUSH_INTERVAL = 10  # Задержка записи накопленных счётчиков в секундах
+
+
+# Константы для очистки медиафайлов
+MEDIA_GARBAGE_MIN_AGE = 60 * 60  # Минимальный возраст удаляемого файла
+
+
+# Константы для загрузки изображений
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024  # Максимальный размер файла в байтах
+MAX_IMAGE_PIXELS = 25_000_000  # Максимальное число пикселей изображения
+BASE64_DECODE_CHUNK = 256 * 1024  # Размер декодируемого блока base64
+
+
+# Константы для оценки количества строк
+ESTIMATED_COUNT_THRESHOLD = 100_000  # Ниже этого числа строки считаются точно
+PAGE_COUNT_CACHE_TIMEOUT = 60  # Время жизни закэшированного количества
+
+
+# Константы для удаления пользователей и рецептов
+DELETE_BATCH_SIZE = 1000  # Количество строк, удаляемых одним запросом
+BACKGROUND_DELETE_THRESHOLD = 10_000  # Удаление большего числа строк — в фоне
+
+
+# Константы для очереди фоновых задач
+JOB_NAME_LENGTH = 255  # Максимальная длина имени задачи
+JOB_WORKER_LENGTH = 64  # Максимальная длина метки захватившего задачу
+JOB_MAX_ATTEMPTS = 5  # Количество попыток до переноса в «мёртвые»
+JOB_RETRY_BACKOFF = 10  # Задержка перед первым повтором в секундах
+JOB_RETRY_BACKOFF_MAX = 60 * 60  # Максимальная задержка перед повтором
+JOB_LOCK_TIMEOUT = 10 * 60  # Через это время зависшая задача захватывается
+JOB_HEARTBEAT_INTERVAL = 60  # Период обновления отметки выполняемой задачи
+JOB_POLL_INTERVAL = 1  # Пауза между опросами пустой очереди в секундах
+JOB_WORKER_CONCURRENCY = 4  # Количество задач, выполняемых одновременно
+
+
+# Константы для получения объектов по списку id
+MULTI_GET_MAX_IDS = 100  # Максимальное количество id в одном запросе
+MAX_OBJECT_ID = 2 ** 63 - 1  # Максимальное значение первичного ключа
+
+
+# Константы для списка подписок
+MAX_RECIPES_LIMIT = 2 ** 31 - 1  # Большие значения recipes_limit урезаются
+
+
+# Константы для ленты изменений
+SYNC_MODEL_LENGTH = 32  # Максимальная длина имени раздела ленты
+SYNC_PAGE_SIZE = 500  # Количество записей журнала на странице по умолчанию
+SYNC_MAX_PAGE_SIZE = 5000  # Максимальное количество записей на странице
+
+
+# Константы для кэша ответов анонимным пользователям
+RESPONSE_CACHE_TIMEOUT = 5 * 60  # Время хранения ответа, в том числе старого
+RESPONSE_CACHE_LOCK_TIMEOUT = 30  # Время жизни блокировки пересборки ответа
+RESPONSE_CACHE_WAIT = 5  # Сколько секунд ждать ответа, собираемого другим
+RESPONSE_CACHE_POLL_INTERVAL = 0.05  # Пауза между проверками кэша при ожидании
+
+
+# Константы для кэша дорогих ответов с фоновым обновлением
+SWR_SOFT_TIMEOUT = 5  # Возраст ответа, после которого он обновляется в фоне
+SWR_HARD_TIMEOUT = 60  # Возраст ответа, после которого он пересчитывается
+
+
+# Константы для подсчёта рецептов по фасетам
+COOKING_TIME_FACET_BOUNDS = (15, 30, 60)  # Границы интервалов в минутах
+
+
+# Константы для индекса рецептов в памяти процесса
+RECIPE_INDEX_LOAD_CHUNK = 10_000  # Количество строк, читаемых за раз
+RECIPE_INDEX_REBUILD_THRESHOLD = 1000  # Больше изменений — пересборка
+
+
+# Константы для ограничения времени запросов к базе
+SHOPPING_CART_DB_DEADLINE = 30_000  # Предел для списка покупок в мс
+DB_DEADLINE_RETRY_AFTER = 5  # Через сколько секунд повторить запрос
+
+
+# Константы для отбрасывания запросов при перегрузке
+LOAD_SHED_NORMAL_PRESSURE = 2  # Во сколько раз превысить цель для обычных
+LOAD_SHED_SMOOTHING = 0.2  # Вес нового замера в сглаженном времени очереди
+LOAD_SHED_RETRY_AFTER = 5  # Наибольшая пауза перед повтором в секундах
+LOAD_SHED_MAX_QUEUE_TIME = 5000  # Замеры очереди дольше, в мс, отбрасываются
@@ -0,0 +1,128 @@
+from contextlib import ExitStack, contextmanager
+from functools import partial
+
+from django.db import DatabaseError, connections, migrations
+
+
+def alter_foreign_keys(relations, cascade):
+    """
+    Возвращает функцию миграции, меняющую ON DELETE у внешних ключей.
+
+    relations — кортежи (app_label, model_name, field_name). Django
+    создаёт внешние ключи без действия при удалении и каскадирует
+    удаление сам, загружая связанные строки; с ON DELETE CASCADE
+    их удаляет база одним запросом. Изменение делается только
+    в PostgreSQL, на прочих СУБД функция ничего не делает.
+    """
+    action = ' ON DELETE CASCADE' if cascade else ''
+
+    def alter(apps, schema_editor):
+        connection = schema_editor.connection
+        if connection.vendor != 'postgresql':
+            return
+        quote = schema_editor.quote_name
+        for app_label, model_name, field_name in relations:
+            model = apps.get_model(app_label, model_name)
+            field = model._meta.get_field(field_name)
+            table = model._meta.db_table
+            target = field.target_field
+            with connection.cursor() as cursor:
+                constraints = connection.introspection.get_constraints(
+                    cursor, table
+                )
+            for name, constraint in constraints.items():
+                if (
+                    not constraint['foreign_key']
+                    or constraint['columns'] != [field.column]
+                ):
+                    continue
+                schema_editor.execute(
+                    f'ALTER TABLE {quote(table)} '
+                    f'DROP CONSTRAINT {quote(name)}, '
+                    f'ADD CONSTRAINT {quote(name)} '
+                    f'FOREIGN KEY ({quote(field.column)}) '
+                    f'REFERENCES {quote(target.model._meta.db_table)} '
+                    f'({quote(target.column)}){action} '
+                    f'DEFERRABLE INITIALLY DEFERRED'
+                )
+
+    return alter
+
+
+def on_delete_cascade(*relations):
+    """
+    Операция миграции, добавляющая ON DELETE CASCADE внешним ключам.
+
+    После изменения поля в последующих миграциях Django пересоздаёт
+    ограничение без каскада, поэтому такую операцию нужно повторить.
+    """
+    return migrations.RunPython(
+        alter_foreign_keys(relations, cascade=True),
+        alter_foreign_keys(relations, cascade=False),
+    )
+
+
+@contextmanager
+def statement_timeout(milliseconds):
+    """
+    Ограничивает время каждого запроса к PostgreSQL внутри блока.
+
+    statement_timeout устанавливается на уровне сеанса перед первым
+    запросом в каждое соединение, включая реплики, а на выходе
+    из блока сбрасывается к значению по умолчанию, чтобы не влиять
+    на следующие запросы в переиспользуемом соединении. Соединения,
+    в которые внутри блока не было запросов, не затрагиваются.
+    При milliseconds, равном 0 или None, блок ничего не делает.
+
+    SET внутри транзакции отменяется её откатом или откатом
+    к точке сохранения, поэтому в транзакции вместе с ним
+    регистрируется пустой обработчик on_commit. Django удаляет
+    обработчики откаченных транзакций и точек сохранения: если
+    обработчика больше нет, а фиксации не было, SET повторяется
+    перед следующим запросом.
+    """
+    if not milliseconds:
+        yield
+        return
+    limited = {}
+    uncommitted = {}
+
+    def is_limited(connection):
+        if connection.alias not in limited:
+            return False
+        marker = uncommitted.get(connection.alias)
+        return marker is None or any(
+            func is marker for _, func in connection.run_on_commit
+        )
+
+    def limit(execute, sql, params, many, context):
+        connection = context['connection']
+        if connection.vendor == 'postgresql' and not is_limited(connection):
+            alias = connection.alias
+            limited[alias] = connection
+            uncommitted.pop(alias, None)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SET statement_timeout = %s', [int(milliseconds)]
+                )
+            if connection.in_atomic_block:
+                # После фиксации SET действует до конца сеанса.
+                marker = partial(uncommitted.pop, alias, None)
+                uncommitted[alias] = marker
+                connection.on_commit(marker)
+        return execute(sql, params, many, context)
+
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(limit))
+            yield
+    finally:
+        for connection in limited.values():
+            if connection.connection is None:
+                continue
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute('RESET statement_timeout')
+            except DatabaseError:
+                connection.close()
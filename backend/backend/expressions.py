@@ -0,0 +1,23 @@
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(queryset, field):
+    """
+    Возвращает подзапрос с количеством строк queryset,
+    у которых field ссылается на текущий объект.
+
+    В отличие от нескольких Count() в одном запросе, подзапросы
+    не перемножают строки соединяемых таблиц.
+    """
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(count=Count('pk'))
+            .values('count'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
@@ -0,0 +1,60 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+
+from backend.routers import primary_written, replica_reads_allowed
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Разрешает чтение с реплик для безопасных запросов.
+
+    После запроса с записью клиент с токеном или сессией
+    на REPLICA_PIN_SECONDS секунд закрепляется за основной базой,
+    чтобы видеть свои изменения, пока реплики догоняют основную базу.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REPLICA_DATABASES:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pin_key = self.get_pin_key(request)
+        reads_token = replica_reads_allowed.set(
+            request.method in SAFE_METHODS
+            and not (pin_key and cache.get(pin_key))
+        )
+        written_token = primary_written.set(False)
+        try:
+            response = self.get_response(request)
+            if pin_key and (
+                request.method not in SAFE_METHODS or primary_written.get()
+            ):
+                cache.set(pin_key, True, settings.REPLICA_PIN_SECONDS)
+        finally:
+            replica_reads_allowed.reset(reads_token)
+            primary_written.reset(written_token)
+        return response
+
+    @staticmethod
+    def get_pin_key(request):
+        """
+        Возвращает ключ кэша, идентифицирующий клиента, или None.
+
+        Клиент определяется только по токену или сессии. Анонимные
+        клиенты не закрепляются: за прокси у них общий адрес,
+        и одна анонимная запись, например регистрация, закрепила бы
+        за основной базой всех анонимных читателей.
+        """
+        identity = (
+            request.META.get('HTTP_AUTHORIZATION')
+            or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        )
+        if not identity:
+            return None
+        return 'db-pin:' + hashlib.sha256(identity.encode()).hexdigest()
@@ -0,0 +1,109 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+from backend.constant import (
+    ESTIMATED_COUNT_THRESHOLD,
+    PAGE_COUNT_CACHE_TIMEOUT,
+)
+
+
+def is_whole_table(queryset):
+    """Проверяет, что queryset выбирает все строки своей таблицы."""
+    query = queryset.query
+    return not (
+        query.where
+        or query.distinct
+        or query.combinator
+        or query.low_mark
+        or query.high_mark is not None
+    )
+
+
+def estimate_count(queryset):
+    """
+    Возвращает оценку числа строк таблицы по статистике PostgreSQL.
+
+    Оценка из pg_class берётся только для queryset без условий:
+    оценкам планировщика для запросов с условиями и соединениями
+    нельзя доверять. В остальных случаях и на других СУБД
+    возвращается None.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql' or not is_whole_table(queryset):
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+def count_up_to(queryset, limit):
+    """
+    Считает строки queryset, но не больше limit.
+
+    COUNT(*) выполняется над подзапросом с LIMIT, поэтому база
+    прекращает перебор на limit-й строке.
+    """
+    return queryset.order_by()[:limit].count()
+
+
+def get_count_cache_key(queryset):
+    """Возвращает ключ кэша количества по SQL-запросу и его параметрам."""
+    sql, params = queryset.order_by().query.sql_with_params()
+    digest = hashlib.blake2b(
+        repr((queryset.db, sql, params)).encode(), digest_size=16
+    ).hexdigest()
+    return f'page-count:{digest}'
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор, не считающий большие выборки через COUNT(*).
+
+    Для всей таблицы сначала берётся оценка из pg_class: меньше
+    ESTIMATED_COUNT_THRESHOLD строк считаются точно, а при
+    settings.PAGINATION_COUNT_STRATEGY == 'estimate' возвращается
+    оценка. В остальных случаях количество кэшируется на
+    PAGE_COUNT_CACHE_TIMEOUT секунд по сигнатуре запроса и при
+    попадании в кэш база не читается. При промахе выборка с условиями
+    сначала считается с LIMIT ESTIMATED_COUNT_THRESHOLD + 1, и только
+    если строк больше — полным COUNT(*). Атрибут count_is_approximate
+    показывает, что count может отличаться от текущего числа строк.
+    """
+    count_is_approximate = False
+
+    @cached_property
+    def count(self):
+        """Возвращает оценку или точное количество объектов."""
+        if not hasattr(self.object_list, 'query'):
+            return super().count
+        estimate = estimate_count(self.object_list)
+        if estimate is not None:
+            if estimate < ESTIMATED_COUNT_THRESHOLD:
+                return super().count
+            if settings.PAGINATION_COUNT_STRATEGY == 'estimate':
+                self.count_is_approximate = True
+                return estimate
+        cache_key = get_count_cache_key(self.object_list)
+        count = cache.get(cache_key)
+        if count is not None:
+            self.count_is_approximate = True
+            return count
+        if estimate is None:
+            count = count_up_to(
+                self.object_list, ESTIMATED_COUNT_THRESHOLD + 1
+            )
+        if count is None or count > ESTIMATED_COUNT_THRESHOLD:
+            count = super().count
+        cache.set(cache_key, count, PAGE_COUNT_CACHE_TIMEOUT)
+        return count
@@ -0,0 +1,45 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Разрешено ли в текущем запросе читать с реплик.
+replica_reads_allowed = ContextVar('replica_reads_allowed', default=False)
+# Выполнялась ли в текущем запросе запись в основную базу.
+primary_written = ContextVar('primary_written', default=False)
+
+
+class ReplicaRouter:
+    """
+    Роутер, направляющий чтение безопасных запросов на реплики.
+
+    Запись, транзакции и всё, что выполняется вне HTTP-запроса
+    (команды, фоновые задачи), всегда идёт в основную базу.
+    Разрешение читать с реплик выставляет ReplicaRoutingMiddleware.
+    """
+
+    def db_for_read(self, model, **hints):
+        """Выбирает случайную реплику, если чтение с них допустимо."""
+        replicas = settings.REPLICA_DATABASES
+        if (
+            not replicas
+            or not replica_reads_allowed.get()
+            or primary_written.get()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        """Записывает только в основную базу и запоминает факт записи."""
+        primary_written.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Реплики содержат те же данные, что и основная база."""
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """Миграции применяются только к основной базе."""
+        return db == DEFAULT_DB_ALIAS
@@ -31,10 +31,17 @@ INSTALLED_APPS = [
     'api.apps.ApiConfig',
     'users.apps.UsersConfig',
     'recipes.apps.RecipesConfig',
+    'jobs.apps.JobsConfig',
+    'sync.apps.SyncConfig',
 ]
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'api.middleware.LoadSheddingMiddleware',
+    'backend.middleware.ReplicaRoutingMiddleware',
+    'api.middleware.DatabaseDeadlineMiddleware',
+    'api.middleware.CompressionMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -80,12 +87,76 @@ DATABASES = {
     }
 }
 
+# Реплики для чтения: список host[:port] через запятую.
+# Учётные данные и имя базы совпадают с основной.
+REPLICA_DATABASES = []
+for number, replica in enumerate(
+    filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), start=1
+):
+    host, _, port = replica.strip().partition(':')
+    alias = f'replica_{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['backend.routers.ReplicaRouter']
+
+# Сколько секунд после записи клиент читает только из основной базы.
+REPLICA_PIN_SECONDS = int(os.getenv('DB_REPLICA_PIN_SECONDS', 5))
+
 # DATABASES = {
 #     'default': {
 #         'ENGINE': 'django.db.backends.sqlite3',
 #         'NAME': BASE_DIR / 'db.sqlite3',
 #     }
 # }
+
+# Кэш. При нескольких процессах gunicorn нужен общий бэкенд
+# (например, memcached), иначе у каждого процесса будет свой кэш.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+# Как пагинатор считает большие таблицы без условий: 'estimate' — оценка
+# из статистики PostgreSQL, 'cache' — точное количество, закэшированное
+# ненадолго. Большие выборки с условиями всегда считаются точно с кэшем.
+PAGINATION_COUNT_STRATEGY = os.getenv('PAGINATION_COUNT_STRATEGY', 'estimate')
+
+# Искать рецепты по тэгам, автору, избранному и корзине по индексу
+# в памяти процесса вместо запроса с соединениями таблиц.
+RECIPE_INDEX = os.getenv('RECIPE_INDEX', 'False').lower() == 'true'
+
+# Предел времени одного запроса к PostgreSQL во время обработки
+# HTTP-запроса в миллисекундах; 0 — без ограничения. Отдельные view
+# и действия переопределяют его атрибутом или декоратором db_deadline.
+DB_STATEMENT_TIMEOUT = int(os.getenv('DB_STATEMENT_TIMEOUT', 5000))
+
+# Отбрасывание запросов с низким приоритетом при перегрузке.
+# Нагрузка — отношение сглаженного времени ожидания в очереди прокси
+# (заголовок X-Request-Start) к целевому в миллисекундах или числа
+# одновременно обрабатываемых процессом запросов к предельному;
+# предел 0 — не учитывать одновременные запросы. Заголовок ставит
+# nginx из nginx/nginx.conf; синхронный процесс gunicorn обрабатывает
+# один запрос за раз, поэтому для него нагрузка видна только по нему.
+LOAD_SHEDDING = os.getenv('LOAD_SHEDDING', 'False').lower() == 'true'
+LOAD_SHEDDING_QUEUE_TARGET = int(os.getenv('LOAD_SHEDDING_QUEUE_TARGET', 200))
+LOAD_SHEDDING_MAX_IN_FLIGHT = int(
+    os.getenv('LOAD_SHEDDING_MAX_IN_FLIGHT', 0)
+)
+
+# Каталог общего для всех процессов снимка справочников ингредиентов
+# и тэгов; если не задан, справочники читаются из базы.
+CATALOG_SNAPSHOT_DIR = os.getenv('CATALOG_SNAPSHOT_DIR', '')
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 AUTH_USER_MODEL = 'users.User'
@@ -129,6 +200,11 @@ STATIC_ROOT = BASE_DIR / 'collected_static'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+DEFAULT_FILE_STORAGE = 'backend.storage.ContentAddressedStorage'
+
+# Загружаемые файлы сразу пишутся во временный файл на диске.
+FILE_UPLOAD_HANDLERS = ['api.uploads.LimitedTemporaryFileUploadHandler']
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -139,8 +215,13 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
 
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 5,
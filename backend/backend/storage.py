@@ -0,0 +1,85 @@
+import hashlib
+import os
+import posixpath
+import tempfile
+import time
+
+from django.core.files.storage import FileSystemStorage
+
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Хранилище, называющее файлы по хэшу содержимого.
+
+    Файл сохраняется как <каталог>/<ab>/<хэш><расширение>, где ab —
+    первые символы хэша. Одинаковые загрузки хранятся один раз, а имя
+    никогда не указывает на другое содержимое и может кэшироваться
+    навсегда.
+    Так как один файл могут использовать несколько записей, delete()
+    ничего не удаляет: неиспользуемые файлы удаляет команда
+    collect_media_garbage.
+    """
+
+    def get_hashed_name(self, name, content):
+        """Возвращает имя файла по SHA-256 его содержимого."""
+        digest = hashlib.sha256()
+        content.seek(0)
+        for chunk in iter(lambda: content.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+        content.seek(0)
+        hexdigest = digest.hexdigest()
+        directory, filename = posixpath.split(name)
+        extension = posixpath.splitext(filename)[1].lower()
+        return posixpath.join(
+            directory, hexdigest[:2], hexdigest + extension
+        )
+
+    def get_available_name(self, name, max_length=None):
+        """Имя определяется содержимым, поэтому суффиксы не нужны."""
+        return name
+
+    def _save(self, name, content):
+        """Записывает файл, только если такого содержимого ещё нет."""
+        name = self.get_hashed_name(name, content)
+        if self.exists(name):
+            # Обновляем время изменения, чтобы очистка не удалила файл,
+            # запись о котором ещё не зафиксирована.
+            os.utime(self.path(name))
+            return name
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        if self.directory_permissions_mode is not None:
+            os.chmod(directory, self.directory_permissions_mode)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                for chunk in content.chunks():
+                    file.write(chunk)
+            os.chmod(temp_path, self.file_permissions_mode or 0o644)
+            os.replace(temp_path, full_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        return name
+
+    def delete(self, name):
+        """Не удаляет файл: он может использоваться другими записями."""
+
+    def purge(self, name, min_age=0):
+        """
+        Удаляет файл с диска, если он не изменялся min_age секунд.
+
+        Вызывающий код должен сам убедиться, что на файл больше
+        никто не ссылается. Возвращает True, если файл удалён.
+        """
+        try:
+            modified = os.path.getmtime(self.path(name))
+        except FileNotFoundError:
+            return False
+        if time.time() - modified < min_age:
+            return False
+        super().delete(name)
+        return True
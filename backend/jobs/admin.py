@@ -0,0 +1,25 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """Администратор для модели Job."""
+    list_display = ('id', 'name', 'status', 'attempts', 'run_at', 'created')
+    list_filter = ('status', 'name')
+    readonly_fields = ('locked_at', 'locked_by', 'last_error', 'created')
+    actions = ('retry_selected',)
+
+    @admin.action(description='Повторить выбранные задачи')
+    def retry_selected(self, request, queryset):
+        """Возвращает выбранные задачи в очередь с обнулёнными попытками."""
+        count = queryset.update(
+            status=Job.Status.QUEUED,
+            attempts=0,
+            run_at=timezone.now(),
+            locked_at=None,
+            locked_by='',
+        )
+        self.message_user(request, f'В очередь возвращено задач: {count}.')
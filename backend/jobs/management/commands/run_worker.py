@@ -0,0 +1,107 @@
+import os
+import signal
+import socket
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections, connections
+
+from backend.constant import (
+    JOB_POLL_INTERVAL,
+    JOB_WORKER_CONCURRENCY,
+    JOB_WORKER_LENGTH,
+)
+from jobs import process
+from jobs.queue import claim_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди в базе данных.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=JOB_WORKER_CONCURRENCY,
+            help='Количество задач, выполняемых одновременно.',
+        )
+        parser.add_argument(
+            '--pool',
+            choices=('thread', 'process'),
+            default='thread',
+            help='Выполнять задачи в потоках или в процессах.',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=JOB_POLL_INTERVAL,
+            help='Пауза между опросами пустой очереди в секундах.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить готовые задачи и завершиться.',
+        )
+
+    def stop(self, signum, frame):
+        """Останавливает захват задач; начатые задачи дорабатывают."""
+        self.stopping = True
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        concurrency = options['concurrency']
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        worker = worker[:JOB_WORKER_LENGTH - 13]
+        if options['pool'] == 'process':
+            connections.close_all()
+            executor = ProcessPoolExecutor(
+                concurrency, initializer=process.init_process
+            )
+            target = process.run_job
+        else:
+            executor = ThreadPoolExecutor(
+                concurrency, thread_name_prefix='job'
+            )
+            target = run_job
+        self.stdout.write(
+            f'Обработчик {worker} запущен: {concurrency} '
+            f'({options["pool"]}).'
+        )
+        running = set()
+        done = 0
+        with executor:
+            while not self.stopping:
+                running = {future for future in running if not future.done()}
+                free = concurrency - len(running)
+                try:
+                    ids = claim_jobs(free, worker) if free else []
+                except DatabaseError as error:
+                    self.stderr.write(f'Не удалось захватить задачи: {error}')
+                    close_old_connections()
+                    ids = []
+                for job_id in ids:
+                    running.add(executor.submit(target, job_id))
+                done += len(ids)
+                if ids:
+                    continue
+                if options['once'] and not running:
+                    break
+                if running:
+                    wait(
+                        running,
+                        timeout=options['poll_interval'],
+                        return_when=FIRST_COMPLETED,
+                    )
+                else:
+                    time.sleep(options['poll_interval'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработчик {worker} остановлен, взято задач: {done}.'
+        ))
@@ -0,0 +1,76 @@
+from django.db import models
+from django.utils import timezone
+
+from backend.constant import (
+    JOB_MAX_ATTEMPTS,
+    JOB_NAME_LENGTH,
+    JOB_WORKER_LENGTH,
+)
+
+
+class Job(models.Model):
+    """Модель фоновой задачи."""
+
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'В очереди'
+        RUNNING = 'running', 'Выполняется'
+        DEAD = 'dead', 'Не выполнена'
+
+    name = models.CharField(
+        max_length=JOB_NAME_LENGTH,
+        verbose_name='Задача'
+    )
+    payload = models.JSONField(
+        default=dict,
+        verbose_name='Аргументы'
+    )
+    status = models.CharField(
+        max_length=max(len(value) for value in Status.values),
+        choices=Status.choices,
+        default=Status.QUEUED,
+        verbose_name='Статус'
+    )
+    attempts = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Попытки'
+    )
+    max_attempts = models.PositiveIntegerField(
+        default=JOB_MAX_ATTEMPTS,
+        verbose_name='Максимум попыток'
+    )
+    run_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Выполнить после'
+    )
+    locked_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Захвачена'
+    )
+    locked_by = models.CharField(
+        max_length=JOB_WORKER_LENGTH,
+        blank=True,
+        verbose_name='Захвачена обработчиком'
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка'
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создана'
+    )
+
+    class Meta:
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+        ordering = ('run_at', 'id')
+        indexes = [
+            models.Index(
+                fields=['status', 'run_at'],
+                name='job_status_run_at_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.id}'
@@ -0,0 +1,19 @@
+import django
+
+
+def init_process():
+    """
+    Готовит процесс пула к выполнению задач.
+
+    Соединения с базой, унаследованные от родительского процесса,
+    закрываются, чтобы процессы не делили один сокет.
+    """
+    django.setup()
+    from django.db import connections
+    connections.close_all()
+
+
+def run_job(job_id):
+    """Выполняет задачу в процессе пула."""
+    from .queue import run_job
+    run_job(job_id)
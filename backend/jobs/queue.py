@@ -0,0 +1,261 @@
+import logging
+import random
+import threading
+import traceback
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import (
+    DatabaseError,
+    close_old_connections,
+    connection,
+    transaction,
+)
+from django.db.models import F, Q
+from django.utils import timezone
+
+from backend.constant import (
+    JOB_HEARTBEAT_INTERVAL,
+    JOB_LOCK_TIMEOUT,
+    JOB_MAX_ATTEMPTS,
+    JOB_RETRY_BACKOFF,
+    JOB_RETRY_BACKOFF_MAX,
+)
+from .models import Job
+
+# Зарегистрированные задачи по имени.
+TASKS = {}
+
+# Ошибка задачи, обработчик которой упал на последней попытке.
+LOST_JOB_ERROR = (
+    'Обработчик задачи потерян: процесс завершился во время выполнения.'
+)
+
+logger = logging.getLogger(__name__)
+
+
+def get_task_name(func):
+    """Возвращает имя, под которым функция хранится в очереди."""
+    return f'{func.__module__}.{func.__qualname__}'
+
+
+def task(func):
+    """
+    Регистрирует функцию как задачу очереди.
+
+    Аргументы задачи сохраняются в JSON, поэтому должны
+    сериализоваться в него. Модули tasks приложений импортируются
+    при запуске, чтобы их задачи были известны обработчику.
+    """
+    TASKS[get_task_name(func)] = func
+    return func
+
+
+def enqueue(func, args=(), kwargs=None, *, delay=0,
+            max_attempts=JOB_MAX_ATTEMPTS):
+    """Ставит зарегистрированную задачу в очередь и возвращает её."""
+    name = get_task_name(func)
+    if TASKS.get(name) is not func:
+        raise ValueError(f'Функция {name} не зарегистрирована как задача.')
+    return Job.objects.create(
+        name=name,
+        payload={'args': list(args), 'kwargs': kwargs or {}},
+        run_at=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts,
+    )
+
+
+def enqueue_on_commit(func, args=(), kwargs=None, **options):
+    """
+    Ставит задачу в очередь после фиксации текущей транзакции.
+
+    Если транзакция откатится, задача не будет создана; вне
+    транзакции задача создаётся сразу.
+    """
+    transaction.on_commit(lambda: enqueue(func, args, kwargs, **options))
+
+
+def get_available_jobs(now):
+    """
+    Возвращает условие для задач, готовых к выполнению.
+
+    Помимо задач в очереди, сюда попадают выполняемые задачи, отметка
+    которых не обновлялась дольше JOB_LOCK_TIMEOUT: их обработчик
+    считается упавшим. Такие задачи, исчерпавшие попытки, не
+    захватываются: см. get_lost_jobs.
+    """
+    return Q(status=Job.Status.QUEUED, run_at__lte=now) | (
+        get_stale_jobs(now) & Q(attempts__lt=F('max_attempts'))
+    )
+
+
+def get_stale_jobs(now):
+    """Возвращает условие для выполняемых задач с упавшим обработчиком."""
+    return Q(
+        status=Job.Status.RUNNING,
+        locked_at__lt=now - timedelta(seconds=JOB_LOCK_TIMEOUT),
+    )
+
+
+def get_lost_jobs(now):
+    """
+    Возвращает условие для зависших задач, исчерпавших попытки.
+
+    Задача, из-за которой обработчик падает целиком (нехватка памяти,
+    сбой интерпретатора, SIGKILL), не доходит до fail_job. Без этого
+    условия её захватывали бы снова и снова, роняя каждый раз
+    очередной обработчик.
+    """
+    return get_stale_jobs(now) & Q(attempts__gte=F('max_attempts'))
+
+
+def claim_jobs(limit, worker):
+    """
+    Захватывает до limit задач и возвращает их id.
+
+    Строки выбираются через SELECT ... FOR UPDATE SKIP LOCKED, так что
+    параллельные обработчики не ждут друг друга и не получают одну
+    задачу дважды. На СУБД без блокировки строк от повторного захвата
+    защищает условие в UPDATE и уникальная метка захвата. Зависшие
+    задачи, исчерпавшие попытки, переносятся в мёртвые.
+    """
+    now = timezone.now()
+    available = get_available_jobs(now)
+    claim = f'{worker}:{uuid.uuid4().hex[:12]}'
+    with transaction.atomic():
+        lost = Job.objects.filter(get_lost_jobs(now)).update(
+            status=Job.Status.DEAD,
+            locked_at=None,
+            locked_by='',
+            last_error=LOST_JOB_ERROR,
+        )
+        if lost:
+            logger.error(
+                'Задач с потерянным обработчиком, исчерпавших попытки: %s.',
+                lost,
+            )
+        ids = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(available)
+            .order_by('run_at', 'id')
+            .values_list('id', flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        Job.objects.filter(available, id__in=ids).update(
+            status=Job.Status.RUNNING,
+            locked_at=now,
+            locked_by=claim,
+            attempts=F('attempts') + 1,
+        )
+    return list(
+        Job.objects.filter(locked_by=claim).values_list('id', flat=True)
+    )
+
+
+def get_retry_delay(attempts):
+    """
+    Возвращает экспоненциальную задержку перед повтором.
+
+    Случайный разброс не даёт упавшим вместе задачам повторяться разом.
+    """
+    delay = min(JOB_RETRY_BACKOFF * 2 ** (attempts - 1), JOB_RETRY_BACKOFF_MAX)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def fail_job(job, error):
+    """Возвращает задачу в очередь с задержкой или помечает её мёртвой."""
+    dead = job.attempts >= job.max_attempts
+    Job.objects.filter(id=job.id, locked_by=job.locked_by).update(
+        status=Job.Status.DEAD if dead else Job.Status.QUEUED,
+        run_at=timezone.now() + timedelta(
+            seconds=get_retry_delay(job.attempts)
+        ),
+        locked_at=None,
+        locked_by='',
+        last_error=error,
+    )
+    if dead:
+        logger.error(
+            'Задача %s не выполнена за %s попыток.', job, job.attempts
+        )
+    else:
+        logger.warning('Задача %s завершилась ошибкой, повтор позже.', job)
+
+
+def send_heartbeats(job, stopped):
+    """
+    Обновляет отметку захвата задачи, пока не установлено stopped.
+
+    Выполняется в отдельном потоке со своим соединением с базой.
+    """
+    try:
+        while not stopped.wait(JOB_HEARTBEAT_INTERVAL):
+            try:
+                updated = Job.objects.filter(
+                    id=job.id, locked_by=job.locked_by
+                ).update(locked_at=timezone.now())
+            except DatabaseError:
+                logger.exception(
+                    'Не удалось обновить отметку задачи %s.', job
+                )
+                continue
+            if not updated:
+                logger.warning('Задачу %s захватил другой обработчик.', job)
+                return
+    finally:
+        connection.close()
+
+
+@contextmanager
+def heartbeat(job):
+    """
+    Продлевает захват задачи на время её выполнения.
+
+    Раз в JOB_HEARTBEAT_INTERVAL секунд фоновый поток обновляет
+    locked_at, поэтому задача, выполняющаяся дольше JOB_LOCK_TIMEOUT,
+    не считается зависшей и не захватывается повторно.
+    """
+    stopped = threading.Event()
+    thread = threading.Thread(
+        target=send_heartbeats, args=(job, stopped), daemon=True
+    )
+    thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        thread.join()
+
+
+def run_job(job_id):
+    """
+    Выполняет захваченную задачу.
+
+    Успешно выполненная задача удаляется из таблицы, упавшая —
+    повторяется позже или переносится в мёртвые. Изменения делаются
+    только если задачу за это время не захватил другой обработчик.
+    """
+    close_old_connections()
+    try:
+        job = Job.objects.filter(
+            id=job_id, status=Job.Status.RUNNING
+        ).first()
+        if job is None:
+            return
+        func = TASKS.get(job.name)
+        try:
+            if func is None:
+                raise LookupError(f'Задача {job.name} не зарегистрирована.')
+            with heartbeat(job):
+                func(
+                    *job.payload.get('args', ()),
+                    **job.payload.get('kwargs', {}),
+                )
+        except Exception:
+            fail_job(job, traceback.format_exc())
+        else:
+            Job.objects.filter(id=job.id, locked_by=job.locked_by).delete()
+    finally:
+        close_old_connections()
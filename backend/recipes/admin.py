@@ -1,12 +1,20 @@
 from django.contrib import admin
-
-from .models import Amount, Ingredient, Recipe, Tag
+from backend.expressions import count_subquery
+from backend.pagination import EstimatedCountPaginator
+from jobs.queue import enqueue_on_commit
+from .deletion import purge_recipes
+from .models import Amount, FavoriteRecipe, Ingredient, Recipe, Tag
 
 
 class AmountAdmin(admin.ModelAdmin):
     """Администратор для модели Amount."""
     model = Amount
     fields = ('recipe', 'ingredient', 'amount')
+    list_display = ('recipe', 'ingredient', 'amount')
+    list_select_related = ('recipe', 'ingredient')
+    autocomplete_fields = ('recipe', 'ingredient')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 class IngredientAdmin(admin.ModelAdmin):
@@ -22,6 +30,13 @@ class RecipeInline(admin.StackedInline):
     """Встраиваемый интерфейс для Amount в Recipe."""
     model = Amount
     extra = 0
+    autocomplete_fields = ('ingredient',)
+
+    def get_queryset(self, request):
+        """Загружает рецепт и ингредиент вместе с количеством."""
+        return super().get_queryset(request).select_related(
+            'recipe', 'ingredient'
+        )
 
 
 class RecipeAdmin(admin.ModelAdmin):
@@ -29,14 +44,49 @@ class RecipeAdmin(admin.ModelAdmin):
     inlines = (
         RecipeInline,
     )
-    list_display = ('name', 'author', 'favorites_count')
+    list_display = (
+        'name',
+        'author',
+        'favorites_count',
+        'views_count',
+        'clicks_count',
+    )
+    list_select_related = ('author',)
+    readonly_fields = ('views_count', 'clicks_count')
+    autocomplete_fields = ('author',)
     search_fields = ('name', 'author__username')
     list_filter = ('tags',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ('purge_selected',)
 
-    @admin.display(description='Количество добавлений в избранное')
+    def get_queryset(self, request):
+        """Добавляет к рецептам количество добавлений в избранное."""
+        return super().get_queryset(request).annotate(
+            favorites_count=count_subquery(
+                FavoriteRecipe.objects.all(), 'recipe'
+            )
+        )
+
+    @admin.display(
+        description='Количество добавлений в избранное',
+        ordering='favorites_count',
+    )
     def favorites_count(self, obj):
         """Возвращает количество избранных рецептов."""
-        return obj.favorite.count()
+        return obj.favorites_count
+
+    @admin.action(
+        description='Удалить выбранные рецепты в фоне',
+        permissions=('delete',),
+    )
+    def purge_selected(self, request, queryset):
+        """Ставит удаление выбранных рецептов в фоновую очередь."""
+        ids = list(queryset.order_by().values_list('id', flat=True))
+        enqueue_on_commit(purge_recipes, [ids])
+        self.message_user(
+            request, f'Удаление рецептов ({len(ids)}) поставлено в очередь.'
+        )
 
 
 class TagAdmin(admin.ModelAdmin):
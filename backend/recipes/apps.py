@@ -1,6 +1,22 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from backend.caches import has_shared_cache
 
 
 class RecipesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recipes'
+
+    def ready(self):
+        # Процессы узнают о смене снимка справочников по поколению
+        # в кэше; с локальным кэшем каждый процесс отдавал бы снимок,
+        # не зная об изменениях в других процессах.
+        if settings.CATALOG_SNAPSHOT_DIR and not has_shared_cache():
+            raise ImproperlyConfigured(
+                'CATALOG_SNAPSHOT_DIR требует общего для процессов кэша: '
+                'укажите CACHE_BACKEND и CACHE_LOCATION, например '
+                'memcached.'
+            )
+        from . import signals  # noqa: F401
@@ -0,0 +1,273 @@
+import fcntl
+import json
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+from threading import Lock
+
+from django.conf import settings
+
+from .generation import get_catalog_generation
+from .models import Ingredient, Tag
+
+MAGIC = b'FGCS'
+FORMAT_VERSION = 1
+# Сигнатура, версия формата, поколение справочников, длина оглавления.
+HEADER = struct.Struct('<4sIqI')
+SNAPSHOT_NAME = 'catalog.bin'
+LOCK_NAME = 'catalog.lock'
+# Справочник, модель и текстовые колонки в порядке полей сериализатора.
+CATALOG_TABLES = {
+    'ingredients': (Ingredient, ('name', 'measurement_unit')),
+    'tags': (Tag, ('name', 'slug')),
+}
+# Колонка с названиями в верхнем регистре для поиска по подстроке.
+SEARCH_COLUMN = 'search'
+SEARCH_SEPARATOR = '\n'
+
+
+def pack_strings(values, separator=''):
+    """
+    Упаковывает строки в смещения uint32 и общий блок UTF-8.
+
+    Смещение i указывает на начало строки i, последнее — на конец
+    блока. После каждой строки дописывается separator.
+    """
+    offsets = array('I', [0])
+    blob = bytearray()
+    for value in values:
+        blob += (value + separator).encode()
+        offsets.append(len(blob))
+    return offsets, bytes(blob)
+
+
+def write_snapshot(path, generation, tables):
+    """
+    Записывает снимок справочников и атомарно подменяет им файл path.
+
+    Снимок пишется во временный файл рядом с path и переименовывается
+    поверх него, поэтому процессы, уже отобразившие прежний снимок
+    в память, продолжают читать его, а новые открывают новый.
+
+    Args:
+        tables: Словарь {справочник: (ids, {колонка: строки})}.
+    """
+    directory = {}
+    parts = []
+    position = 0
+
+    def add(data):
+        nonlocal position
+        padding = -position % 8
+        parts.append(b'\0' * padding)
+        position += padding
+        start = position
+        parts.append(data)
+        position += len(data)
+        return start
+
+    for name, (ids, columns) in tables.items():
+        spec = {
+            'count': len(ids),
+            'ids': add(array('q', ids).tobytes()),
+            'columns': {},
+        }
+        for column, values in columns.items():
+            separator = SEARCH_SEPARATOR if column == SEARCH_COLUMN else ''
+            offsets, blob = pack_strings(values, separator)
+            spec['columns'][column] = (
+                add(offsets.tobytes()), add(blob), len(blob)
+            )
+        directory[name] = spec
+    index = json.dumps(directory).encode()
+    data_start = HEADER.size + len(index)
+    data_start += -data_start % 8
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, generation, len(index))
+    path = Path(path)
+    with tempfile.NamedTemporaryFile(
+        dir=path.parent, prefix=path.name, delete=False
+    ) as file:
+        try:
+            file.write(header + index)
+            file.write(b'\0' * (data_start - HEADER.size - len(index)))
+            for part in parts:
+                file.write(part)
+            file.flush()
+            os.fsync(file.fileno())
+        except BaseException:
+            os.unlink(file.name)
+            raise
+    os.replace(file.name, path)
+
+
+def read_catalog_tables():
+    """Читает справочники из базы в порядке сортировки моделей."""
+    tables = {}
+    for name, (model, columns) in CATALOG_TABLES.items():
+        rows = list(model.objects.values_list('id', *columns))
+        values = {
+            column: [row[index] for row in rows]
+            for index, column in enumerate(columns, start=1)
+        }
+        values[SEARCH_COLUMN] = [row[1].upper() for row in rows]
+        tables[name] = ([row[0] for row in rows], values)
+    return tables
+
+
+class CatalogTable:
+    """Справочник в отображённом в память снимке."""
+
+    def __init__(self, buffer, base, spec):
+        self.buffer = buffer
+        self.count = spec['count']
+        view = memoryview(buffer)
+        ids = base + spec['ids']
+        self.ids = view[ids:ids + 8 * self.count].cast('q')
+        self.columns = {}
+        for column, (offsets, blob, length) in spec['columns'].items():
+            offsets += base
+            self.columns[column] = (
+                view[offsets:offsets + 4 * (self.count + 1)].cast('I'),
+                base + blob,
+            )
+
+    def get(self, column, index):
+        """Возвращает значение колонки в строке index."""
+        offsets, blob = self.columns[column]
+        return str(
+            self.buffer[blob + offsets[index]:blob + offsets[index + 1]],
+            'utf-8',
+        )
+
+    def search(self, text):
+        """
+        Возвращает номера строк, название которых содержит text
+        без учёта регистра, в порядке справочника.
+
+        Поиск идёт по блоку названий в верхнем регистре, разделённых
+        переводом строки, поэтому совпадение не может захватить
+        соседние названия.
+        """
+        needle = text.upper().encode()
+        if SEARCH_SEPARATOR.encode() in needle:
+            return []
+        offsets, blob = self.columns[SEARCH_COLUMN]
+        end = blob + offsets[self.count]
+        indexes = []
+        position = self.buffer.find(needle, blob, end)
+        while position != -1:
+            index = bisect_right(offsets, position - blob) - 1
+            indexes.append(index)
+            position = self.buffer.find(
+                needle, blob + offsets[index + 1], end
+            )
+        return indexes
+
+    def build(self, columns, indexes=None):
+        """Собирает словари {'id': ..., колонка: ...} для строк."""
+        if indexes is None:
+            indexes = range(self.count)
+        return [
+            {
+                'id': self.ids[index],
+                **{column: self.get(column, index) for column in columns},
+            }
+            for index in indexes
+        ]
+
+
+class CatalogSnapshot:
+    """
+    Снимок справочников, отображённый в память только для чтения.
+
+    Страницы файла общие для всех процессов, отобразивших один
+    и тот же снимок, поэтому справочники не копируются в память
+    каждого процесса gunicorn.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, generation, index_length = HEADER.unpack_from(
+            self.buffer
+        )
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f'Неизвестный формат снимка {path}.')
+        self.generation = generation
+        directory = json.loads(
+            self.buffer[HEADER.size:HEADER.size + index_length]
+        )
+        base = HEADER.size + index_length
+        base += -base % 8
+        self.tables = {
+            name: CatalogTable(self.buffer, base, spec)
+            for name, spec in directory.items()
+        }
+
+    def __getitem__(self, name):
+        return self.tables[name]
+
+
+class CatalogSnapshots:
+    """
+    Снимок справочников текущего поколения для процесса.
+
+    Если поколение справочников изменилось, процесс открывает файл
+    снимка заново, а если и в файле поколение старое — перестраивает
+    его под блокировкой файла. Получив блокировку, процесс ещё раз
+    проверяет файл: его мог только что перестроить другой процесс.
+    Пока снимок перестраивает другой процесс, возвращается None
+    и справочники читаются из базы. Поколение хранится в общем кэше,
+    без которого CATALOG_SNAPSHOT_DIR не запускается.
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.current = None
+
+    def get(self):
+        """Возвращает снимок текущего поколения или None."""
+        generation = get_catalog_generation()
+        current = self.current
+        if current is not None and current.generation == generation:
+            return current
+        with self.lock:
+            directory = Path(settings.CATALOG_SNAPSHOT_DIR)
+            path = directory / SNAPSHOT_NAME
+            snapshot = open_snapshot(path)
+            if snapshot is None or snapshot.generation != generation:
+                directory.mkdir(parents=True, exist_ok=True)
+                with open(directory / LOCK_NAME, 'a') as lock:
+                    try:
+                        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        return None
+                    try:
+                        snapshot = open_snapshot(path)
+                        if (
+                            snapshot is None
+                            or snapshot.generation != generation
+                        ):
+                            write_snapshot(
+                                path, generation, read_catalog_tables()
+                            )
+                            snapshot = open_snapshot(path)
+                    finally:
+                        fcntl.flock(lock, fcntl.LOCK_UN)
+            self.current = snapshot
+            return snapshot
+
+
+def open_snapshot(path):
+    """Отображает снимок в память или возвращает None, если его нет."""
+    try:
+        return CatalogSnapshot(path)
+    except (FileNotFoundError, ValueError, struct.error):
+        return None
+
+
+catalog_snapshots = CatalogSnapshots()
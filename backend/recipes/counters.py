@@ -0,0 +1,132 @@
+import atexit
+import logging
+from collections import Counter
+from threading import Lock, Timer
+
+from django.db import DatabaseError, connection
+from django.db.models import Case, F, Value, When
+
+from backend.constant import COUNTER_FLUSH_INTERVAL
+from .models import COUNTER_FIELDS, Recipe
+
+logger = logging.getLogger(__name__)
+
+
+class RecipeCounters:
+    """
+    Буфер счётчиков просмотров и переходов по рецептам.
+
+    Увеличения копятся в памяти процесса, и не позже чем через
+    COUNTER_FLUSH_INTERVAL секунд после первого из них фоновый таймер
+    записывает их одним UPDATE, даже если процесс больше не получает
+    запросов. Перед записью буфер подменяется пустым под блокировкой,
+    поэтому одно и то же увеличение никогда не записывается дважды;
+    если запись не удалась, увеличения возвращаются в буфер и таймер
+    запускается снова. При завершении процесса остаток записывается
+    обработчиком atexit.
+    """
+
+    def __init__(self, flush_interval=COUNTER_FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        self.lock = Lock()
+        self.buffer = {field: Counter() for field in COUNTER_FIELDS}
+        self.timer = None
+
+    def increment(self, field, recipe_id, value=1):
+        """Увеличивает счётчик рецепта и планирует запись буфера."""
+        with self.lock:
+            self.buffer[field][recipe_id] += value
+            self.schedule()
+
+    def schedule(self):
+        """Запускает таймер записи, если он ещё не запущен."""
+        if self.timer is None:
+            self.timer = Timer(self.flush_interval, self.flush_on_timer)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def flush_on_timer(self):
+        """Записывает буфер из потока таймера в собственном соединении."""
+        with self.lock:
+            self.timer = None
+        try:
+            self.flush()
+        except DatabaseError:
+            logger.exception('Не удалось записать счётчики рецептов.')
+            with self.lock:
+                self.schedule()
+        finally:
+            connection.close()
+
+    def flush(self):
+        """
+        Записывает накопленные увеличения в базу.
+
+        При ошибке базы увеличения возвращаются в буфер, а ошибка
+        передаётся дальше.
+        """
+        with self.lock:
+            buffer = self.buffer
+            self.buffer = {field: Counter() for field in COUNTER_FIELDS}
+        ids = set().union(*buffer.values())
+        if not ids:
+            return
+        rows = [
+            (recipe_id, *(buffer[field][recipe_id]
+                          for field in COUNTER_FIELDS))
+            for recipe_id in sorted(ids)
+        ]
+        try:
+            if connection.vendor == 'postgresql':
+                update_counters_postgresql(rows)
+            else:
+                update_counters_generic(rows)
+        except DatabaseError:
+            with self.lock:
+                for field in COUNTER_FIELDS:
+                    self.buffer[field].update(buffer[field])
+            raise
+
+    def flush_at_exit(self):
+        """Записывает остаток буфера при завершении процесса."""
+        try:
+            self.flush()
+        except DatabaseError:
+            logger.exception(
+                'Не удалось записать счётчики рецептов при завершении.'
+            )
+
+
+def update_counters_postgresql(rows):
+    """Прибавляет счётчики одним UPDATE ... FROM (VALUES ...)."""
+    table = connection.ops.quote_name(Recipe._meta.db_table)
+    assignments = ', '.join(
+        f'{field} = recipe.{field} + delta.{field}'
+        for field in COUNTER_FIELDS
+    )
+    values = ', '.join(
+        ['(%s' + ', %s' * len(COUNTER_FIELDS) + ')'] * len(rows)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {table} AS recipe SET {assignments} '
+            f'FROM (VALUES {values}) '
+            f'AS delta (id, {", ".join(COUNTER_FIELDS)}) '
+            f'WHERE recipe.id = delta.id',
+            [value for row in rows for value in row],
+        )
+
+
+def update_counters_generic(rows):
+    """Прибавляет счётчики одним UPDATE с CASE для прочих СУБД."""
+    Recipe.objects.filter(id__in=[row[0] for row in rows]).update(**{
+        field: F(field) + Case(
+            *(When(id=row[0], then=Value(row[index])) for row in rows),
+            default=Value(0),
+        )
+        for index, field in enumerate(COUNTER_FIELDS, start=1)
+    })
+
+
+recipe_counters = RecipeCounters()
+atexit.register(recipe_counters.flush_at_exit)
@@ -0,0 +1,214 @@
+from functools import partial
+
+from django.contrib.admin.models import LogEntry
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.db import DEFAULT_DB_ALIAS, connection, transaction
+from rest_framework.authtoken.models import Token
+
+from backend.constant import (
+    BACKGROUND_DELETE_THRESHOLD,
+    DELETE_BATCH_SIZE,
+    MEDIA_GARBAGE_MIN_AGE,
+)
+from jobs.queue import enqueue_on_commit, task
+from users.models import Follow
+from .generation import bump_recipes_generation, bump_user_generation
+from .importers import iter_batches
+from .links import forget_recipe
+from .models import Amount, FavoriteRecipe, Recipe, ShoppingCart
+
+User = get_user_model()
+
+# Таблицы, ссылающиеся на рецепт, и поле со ссылкой.
+RECIPE_DEPENDENTS = (
+    (Amount, 'recipe'),
+    (FavoriteRecipe, 'recipe'),
+    (ShoppingCart, 'recipe'),
+    (Recipe.tags.through, 'recipe'),
+)
+# Таблицы, ссылающиеся на пользователя, кроме рецептов.
+USER_DEPENDENTS = (
+    (Follow, 'user'),
+    (Follow, 'is_following'),
+    (FavoriteRecipe, 'user'),
+    (ShoppingCart, 'user'),
+    (LogEntry, 'user'),
+    (User.groups.through, 'user'),
+    (User.user_permissions.through, 'user'),
+)
+
+
+def delete_in_batches(queryset, batch_size=DELETE_BATCH_SIZE):
+    """
+    Удаляет строки queryset пачками, каждую в своей транзакции.
+
+    Пачка удаляется одним DELETE по первичным ключам без загрузки
+    объектов и без сигналов, поэтому блокировки держатся недолго.
+    Возвращает число удалённых строк.
+    """
+    model = queryset.model
+    ids = queryset.order_by().values_list('pk', flat=True)
+    deleted = 0
+    while True:
+        batch = list(ids[:batch_size])
+        if not batch:
+            return deleted
+        with transaction.atomic():
+            deleted += model._base_manager.filter(
+                pk__in=batch
+            )._raw_delete(DEFAULT_DB_ALIAS)
+
+
+def get_owner_ids(*querysets):
+    """
+    Возвращает владельцев строк избранного, корзины или подписок.
+
+    Такие строки удаляются без сигналов, поэтому bump_owner_generation
+    не сбрасывает закэшированные ответы их владельцев: поколения
+    собранных пользователей увеличиваются явно после удаления.
+    """
+    owner_ids = set()
+    for queryset in querysets:
+        owner_ids.update(
+            queryset.order_by().values_list('user_id', flat=True).distinct()
+        )
+    return owner_ids
+
+
+def remove_unused_files(names):
+    """
+    Удаляет файлы, на которые больше не ссылается ни одна запись.
+
+    Недавно изменённые файлы не трогаются: их может использовать
+    ещё не зафиксированная загрузка. Их позже удалит команда
+    collect_media_garbage.
+    """
+    names = set(filter(None, names))
+    if not names:
+        return
+    used = set(
+        Recipe.objects.filter(image__in=names).values_list('image', flat=True)
+    )
+    used.update(
+        User.objects.filter(avatar__in=names).values_list('avatar', flat=True)
+    )
+    purge = getattr(default_storage, 'purge', None)
+    for name in names - used:
+        if purge is None:
+            default_storage.delete(name)
+        else:
+            purge(name, min_age=MEDIA_GARBAGE_MIN_AGE)
+
+
+@task
+def purge_recipes(recipe_ids, batch_size=DELETE_BATCH_SIZE):
+    """
+    Удаляет рецепты и ссылающиеся на них строки пачками.
+
+    Сначала пачками удаляются зависимые строки, затем сами рецепты,
+    так что ни один запрос не удаляет больше batch_size строк.
+    Изображения удаляются после удаления всех строк и фиксации
+    транзакции, если задача вызвана внутри неё.
+    """
+    files = set()
+    for batch in iter_batches(recipe_ids, batch_size):
+        files.update(
+            Recipe.objects.filter(id__in=batch)
+            .values_list('image', flat=True)
+        )
+        owner_ids = get_owner_ids(
+            FavoriteRecipe.objects.filter(recipe_id__in=batch),
+            ShoppingCart.objects.filter(recipe_id__in=batch),
+        )
+        for model, field in RECIPE_DEPENDENTS:
+            delete_in_batches(
+                model._base_manager.filter(**{f'{field}__in': batch}),
+                batch_size,
+            )
+        delete_in_batches(Recipe.objects.filter(id__in=batch), batch_size)
+        for recipe_id in batch:
+            forget_recipe(recipe_id)
+        bump_user_generation(*owner_ids)
+    bump_recipes_generation()
+    transaction.on_commit(partial(remove_unused_files, files))
+
+
+@task
+def purge_users(user_ids, batch_size=DELETE_BATCH_SIZE):
+    """
+    Удаляет пользователей, их рецепты и подписки пачками.
+
+    Токены удаляются обычным delete(), чтобы сработали сигналы
+    сброса кэша аутентификации.
+    """
+    files = set()
+    for batch in iter_batches(user_ids, batch_size):
+        files.update(
+            User.objects.filter(id__in=batch).values_list('avatar', flat=True)
+        )
+        follower_ids = get_owner_ids(
+            Follow.objects.filter(is_following_id__in=batch)
+        )
+        purge_recipes(
+            list(
+                Recipe.objects.filter(author_id__in=batch)
+                .values_list('id', flat=True)
+            ),
+            batch_size,
+        )
+        for model, field in USER_DEPENDENTS:
+            delete_in_batches(
+                model._base_manager.filter(**{f'{field}__in': batch}),
+                batch_size,
+            )
+        Token.objects.filter(user_id__in=batch).delete()
+        delete_in_batches(User.objects.filter(id__in=batch), batch_size)
+        bump_user_generation(*follower_ids)
+    transaction.on_commit(partial(remove_unused_files, files))
+
+
+def cascade_delete(queryset):
+    """
+    Удаляет строки одним DELETE, полагаясь на ON DELETE CASCADE.
+
+    Каскад в базе добавлен миграциями только для PostgreSQL,
+    поэтому возвращает False, ничего не удаляя, на прочих СУБД.
+    Строки, удалённые каскадом, не вызывают сигналов post_delete:
+    поколения их владельцев увеличивает вызывающий код
+    (см. get_owner_ids).
+    """
+    if connection.vendor != 'postgresql':
+        return False
+    with transaction.atomic():
+        queryset.order_by()._raw_delete(DEFAULT_DB_ALIAS)
+    return True
+
+
+def delete_recipe(recipe):
+    """
+    Удаляет рецепт, минуя сборщик каскада Django.
+
+    Рецепт, на который ссылается больше BACKGROUND_DELETE_THRESHOLD
+    строк, удаляется в фоне пачками. Возвращает True, если рецепт
+    удалён сразу.
+    """
+    dependents = (
+        FavoriteRecipe.objects.filter(recipe=recipe).count()
+        + ShoppingCart.objects.filter(recipe=recipe).count()
+    )
+    if dependents > BACKGROUND_DELETE_THRESHOLD:
+        enqueue_on_commit(purge_recipes, [[recipe.id]])
+        return False
+    owner_ids = get_owner_ids(
+        FavoriteRecipe.objects.filter(recipe=recipe),
+        ShoppingCart.objects.filter(recipe=recipe),
+    )
+    if cascade_delete(Recipe.objects.filter(id=recipe.id)):
+        forget_recipe(recipe.id)
+        bump_user_generation(*owner_ids)
+        bump_recipes_generation()
+        transaction.on_commit(lambda: remove_unused_files([recipe.image.name]))
+    else:
+        purge_recipes([recipe.id])
+    return True
@@ -0,0 +1,88 @@
+import time
+from functools import partial
+
+from django.core.cache import cache
+from django.db import transaction
+
+from backend.caches import has_shared_cache
+
+RECIPES_GENERATION_KEY = 'recipes-generation'
+CATALOG_GENERATION_KEY = 'catalog-generation'
+
+
+def get_generation(key):
+    """
+    Возвращает текущее поколение данных по ключу кэша.
+
+    Если счётчика нет в кэше, он создаётся со значением от текущего
+    времени в миллисекундах, чтобы после вытеснения или перезапуска
+    кэша поколение не совпало ни с одним из прежних. Без общего
+    для процессов кэша изменения, сделанные другими процессами
+    (gunicorn, обработчиком задач, командами), не меняли бы счётчик,
+    поэтому возвращается None, и кэши по поколениям не используются.
+    """
+    if not has_shared_cache():
+        return None
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, time.time_ns() // 1_000_000, None)
+        generation = cache.get(key)
+    return generation
+
+
+def increment_generation(key):
+    """Увеличивает счётчик поколения, создавая его при отсутствии."""
+    if get_generation(key) is None:
+        return
+    try:
+        cache.incr(key)
+    except ValueError:
+        get_generation(key)
+
+
+def get_recipes_generation():
+    """Возвращает текущее поколение данных рецептов."""
+    return get_generation(RECIPES_GENERATION_KEY)
+
+
+def bump_recipes_generation():
+    """
+    Увеличивает поколение рецептов после фиксации транзакции.
+
+    Поколение меняется при любом изменении рецептов, их ингредиентов,
+    тэгов и авторов; закэшированные по старому поколению ответы
+    считаются устаревшими.
+    """
+    transaction.on_commit(
+        partial(increment_generation, RECIPES_GENERATION_KEY)
+    )
+
+
+def get_catalog_generation():
+    """Возвращает текущее поколение справочников ингредиентов и тэгов."""
+    return get_generation(CATALOG_GENERATION_KEY)
+
+
+def bump_catalog_generation():
+    """Увеличивает поколение справочников после фиксации транзакции."""
+    transaction.on_commit(
+        partial(increment_generation, CATALOG_GENERATION_KEY)
+    )
+
+
+def get_user_generation_key(user_id):
+    """Возвращает ключ кэша поколения данных пользователя."""
+    return f'user-generation:{user_id}'
+
+
+def get_user_generation(user_id):
+    """Возвращает поколение корзины, избранного и подписок пользователя."""
+    return get_generation(get_user_generation_key(user_id))
+
+
+def bump_user_generation(*user_ids):
+    """Увеличивает поколение данных пользователей после фиксации."""
+    for user_id in set(user_ids):
+        transaction.on_commit(
+            partial(increment_generation, get_user_generation_key(user_id))
+        )
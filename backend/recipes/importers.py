@@ -0,0 +1,214 @@
+import csv
+import io
+import json
+from collections import Counter
+from itertools import islice
+from pathlib import Path
+
+from django.db import connection, transaction
+
+from backend.constant import IMPORT_BATCH_SIZE, IMPORT_READ_CHUNK_SIZE
+
+JSON_WHITESPACE = ' \t\r\n'
+
+
+def iter_json_array(file, chunk_size=IMPORT_READ_CHUNK_SIZE):
+    """
+    Потоково читает JSON-массив объектов, не загружая файл целиком.
+
+    Файл читается блоками по chunk_size символов, каждый элемент
+    массива декодируется отдельно и сразу отдаётся вызывающему коду.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    for chunk in iter(lambda: file.read(chunk_size), ''):
+        buffer = chunk.lstrip(JSON_WHITESPACE)
+        if buffer:
+            break
+    if not buffer.startswith('['):
+        raise ValueError('Ожидался JSON-массив.')
+    buffer = buffer[1:]
+    eof = False
+    while True:
+        position = 0
+        while True:
+            while (position < len(buffer)
+                   and buffer[position] in JSON_WHITESPACE + ','):
+                position += 1
+            if buffer[position:position + 1] == ']':
+                return
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                break
+            yield item
+        buffer = buffer[position:]
+        chunk = file.read(chunk_size)
+        eof = not chunk
+        if eof and not buffer.strip(JSON_WHITESPACE):
+            raise ValueError('JSON-массив не закрыт.')
+        buffer += chunk
+
+
+def iter_csv(file, fieldnames):
+    """
+    Потоково читает CSV-файл в словари с заданными полями.
+
+    Строка заголовка, совпадающая с fieldnames, пропускается.
+    """
+    reader = csv.DictReader(file, fieldnames=fieldnames)
+    for line_number, row in enumerate(reader):
+        if line_number == 0 and list(row.values()) == list(fieldnames):
+            continue
+        yield row
+
+
+def iter_rows(path, fieldnames, file_format=None):
+    """Возвращает строки файла JSON или CSV в виде словарей."""
+    path = Path(path)
+    file_format = file_format or path.suffix.lstrip('.').lower()
+    with open(path, encoding='utf-8', newline='') as file:
+        if file_format == 'json':
+            for item in iter_json_array(file):
+                yield {field: item[field] for field in fieldnames}
+        elif file_format == 'csv':
+            yield from iter_csv(file, fieldnames)
+        else:
+            raise ValueError(f'Неподдерживаемый формат файла: {path}')
+
+
+def iter_batches(iterable, batch_size):
+    """Разбивает итератор на списки длиной не более batch_size."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def upsert_rows(
+    model,
+    rows,
+    key_fields,
+    update_fields=(),
+    batch_size=IMPORT_BATCH_SIZE,
+    ignore_conflicts=False,
+):
+    """
+    Добавляет или обновляет строки модели пачками.
+
+    Args:
+        model: Модель, в таблицу которой загружаются данные.
+        rows: Итератор словарей с полями модели.
+        key_fields: Поля уникального ограничения, по которым ищутся дубли.
+        update_fields: Поля, обновляемые у уже существующих строк.
+        batch_size: Количество строк в одной пачке.
+        ignore_conflicts: Не обновлять существующие строки.
+
+    Returns:
+        Counter: Количество добавленных (inserted), обновлённых (updated)
+        и пропущенных (skipped) строк.
+    """
+    key_fields = tuple(key_fields)
+    update_fields = () if ignore_conflicts else tuple(update_fields)
+    if connection.vendor == 'postgresql':
+        upsert_batch = _upsert_batch_postgresql
+    else:
+        upsert_batch = _upsert_batch_generic
+    stats = Counter(inserted=0, updated=0, skipped=0)
+    for batch in iter_batches(rows, batch_size):
+        with transaction.atomic():
+            stats.update(upsert_batch(model, batch, key_fields, update_fields))
+    return stats
+
+
+def _upsert_batch_postgresql(model, batch, key_fields, update_fields):
+    """
+    Загружает пачку через COPY во временную таблицу и переносит её
+    в основную одним INSERT ... ON CONFLICT.
+    """
+    table = connection.ops.quote_name(model._meta.db_table)
+    staging = connection.ops.quote_name(f'{model._meta.db_table}_staging')
+    fields = key_fields + update_fields
+    columns = [
+        model._meta.get_field(field).column for field in fields
+    ]
+    quoted = ', '.join(connection.ops.quote_name(c) for c in columns)
+    keys = ', '.join(
+        connection.ops.quote_name(c) for c in columns[:len(key_fields)]
+    )
+    data = io.StringIO()
+    writer = csv.writer(data)
+    writer.writerows([row[field] for field in fields] for row in batch)
+    data.seek(0)
+    if update_fields:
+        updated = ', '.join(
+            f'{connection.ops.quote_name(c)} = EXCLUDED.'
+            f'{connection.ops.quote_name(c)}'
+            for c in columns[len(key_fields):]
+        )
+        changed = ' OR '.join(
+            f'{table}.{connection.ops.quote_name(c)} IS DISTINCT FROM '
+            f'EXCLUDED.{connection.ops.quote_name(c)}'
+            for c in columns[len(key_fields):]
+        )
+        on_conflict = f'DO UPDATE SET {updated} WHERE {changed}'
+    else:
+        on_conflict = 'DO NOTHING'
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMP TABLE {staging} ON COMMIT DROP AS '
+            f'SELECT {quoted} FROM {table} WITH NO DATA'
+        )
+        cursor.copy_expert(
+            f'COPY {staging} ({quoted}) FROM STDIN WITH (FORMAT csv)', data
+        )
+        cursor.execute(
+            f'INSERT INTO {table} ({quoted}) '
+            f'SELECT DISTINCT ON ({keys}) {quoted} FROM {staging} '
+            f'ON CONFLICT ({keys}) {on_conflict} '
+            f'RETURNING (xmax = 0)'
+        )
+        results = [inserted for inserted, in cursor.fetchall()]
+        cursor.execute(f'DROP TABLE {staging}')
+    inserted = sum(results)
+    updated = len(results) - inserted
+    return {
+        'inserted': inserted,
+        'updated': updated,
+        'skipped': len(batch) - inserted - updated,
+    }
+
+
+def _upsert_batch_generic(model, batch, key_fields, update_fields):
+    """Добавляет и обновляет пачку средствами ORM для прочих СУБД."""
+    rows = {tuple(row[field] for field in key_fields): row for row in batch}
+    lookup = f'{key_fields[0]}__in'
+    existing = {
+        tuple(getattr(obj, field) for field in key_fields): obj
+        for obj in model.objects.filter(
+            **{lookup: {key[0] for key in rows}}
+        )
+    }
+    created = []
+    changed = []
+    for key, row in rows.items():
+        obj = existing.get(key)
+        if obj is None:
+            created.append(model(**row))
+            continue
+        if any(getattr(obj, field) != row[field] for field in update_fields):
+            for field in update_fields:
+                setattr(obj, field, row[field])
+            changed.append(obj)
+    model.objects.bulk_create(created, ignore_conflicts=True)
+    if changed:
+        model.objects.bulk_update(changed, update_fields)
+    return {
+        'inserted': len(created),
+        'updated': len(changed),
+        'skipped': len(batch) - len(created) - len(changed),
+    }
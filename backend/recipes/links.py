@@ -0,0 +1,137 @@
+import string
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from django.core.cache import cache
+
+from backend.constant import (
+    MAX_OBJECT_ID,
+    SHORT_LINK_CACHE_TIMEOUT,
+    SHORT_LINK_LOCAL_TIMEOUT,
+    SHORT_LINK_LRU_SIZE,
+    SHORT_LINK_MISSING_TIMEOUT,
+)
+from .generation import get_recipes_generation
+from .models import Recipe
+
+LETTERS = string.ascii_letters
+ALPHABET = LETTERS + string.digits
+
+
+def encode_recipe_id(recipe_id):
+    """
+    Кодирует id рецепта в короткий код base62.
+
+    Первый символ кода всегда буква, поэтому коды не пересекаются
+    со старыми числовыми ссылками.
+    """
+    recipe_id, first = divmod(recipe_id, len(LETTERS))
+    code = []
+    while recipe_id:
+        recipe_id, digit = divmod(recipe_id, len(ALPHABET))
+        code.append(ALPHABET[digit])
+    return LETTERS[first] + ''.join(reversed(code))
+
+
+def decode_recipe_code(code):
+    """Возвращает id рецепта по короткому коду или None."""
+    if not code or code[0] not in LETTERS:
+        return None
+    recipe_id = 0
+    for char in code[1:]:
+        digit = ALPHABET.find(char)
+        if digit == -1:
+            return None
+        recipe_id = recipe_id * len(ALPHABET) + digit
+    recipe_id = recipe_id * len(LETTERS) + LETTERS.index(code[0])
+    if encode_recipe_id(recipe_id) != code:
+        return None
+    return recipe_id
+
+
+class LocalLRUCache:
+    """Потокобезопасный LRU-кэш процесса с ограниченным временем жизни."""
+
+    def __init__(self, max_size, timeout):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.items = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key):
+        """Возвращает значение или None, если его нет или оно устарело."""
+        with self.lock:
+            item = self.items.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self.items[key]
+                return None
+            self.items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Сохраняет значение, вытесняя самое давнее при переполнении."""
+        with self.lock:
+            self.items[key] = (value, time.monotonic() + self.timeout)
+            self.items.move_to_end(key)
+            if len(self.items) > self.max_size:
+                self.items.popitem(last=False)
+
+    def delete(self, key):
+        """Удаляет значение."""
+        with self.lock:
+            self.items.pop(key, None)
+
+
+recipe_exists_lru = LocalLRUCache(
+    SHORT_LINK_LRU_SIZE, SHORT_LINK_LOCAL_TIMEOUT
+)
+
+
+def get_recipe_cache_key(generation, recipe_id):
+    """Возвращает ключ кэша наличия рецепта в поколении рецептов."""
+    return f'recipe-exists:{generation}:{recipe_id}'
+
+
+def recipe_exists(recipe_id):
+    """
+    Проверяет наличие рецепта через кэш процесса и общий кэш.
+
+    Ключи записей включают поколение рецептов, которое меняется при
+    любом удалении рецепта, в том числе каскадном и в другом процессе,
+    поэтому удалённый рецепт не считается существующим по старой
+    записи. Отсутствующие рецепты тоже кэшируются, но на меньшее время.
+    Без общего кэша поколения нет, и наличие проверяется по базе.
+    """
+    if recipe_id > MAX_OBJECT_ID:
+        return False
+    generation = get_recipes_generation()
+    if generation is None:
+        return Recipe.objects.filter(id=recipe_id).exists()
+    local_key = (generation, recipe_id)
+    exists = recipe_exists_lru.get(local_key)
+    if exists is not None:
+        return exists
+    cache_key = get_recipe_cache_key(generation, recipe_id)
+    exists = cache.get(cache_key)
+    if exists is None:
+        exists = Recipe.objects.filter(id=recipe_id).exists()
+        cache.set(
+            cache_key,
+            exists,
+            SHORT_LINK_CACHE_TIMEOUT if exists else SHORT_LINK_MISSING_TIMEOUT
+        )
+    recipe_exists_lru.set(local_key, exists)
+    return exists
+
+
+def forget_recipe(recipe_id):
+    """Сбрасывает закэшированное наличие рецепта в текущем поколении."""
+    generation = get_recipes_generation()
+    if generation is None:
+        return
+    recipe_exists_lru.delete((generation, recipe_id))
+    cache.delete(get_recipe_cache_key(generation, recipe_id))
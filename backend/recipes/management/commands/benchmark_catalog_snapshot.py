@@ -0,0 +1,172 @@
+import gc
+import multiprocessing
+import os
+import tempfile
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from recipes.catalog import (
+    CATALOG_TABLES, SNAPSHOT_NAME, CatalogSnapshot, read_catalog_tables,
+    write_snapshot,
+)
+
+# Поля /proc/self/smaps_rollup, по которым сравнивается память.
+MEMORY_FIELDS = ('Rss', 'Pss', 'Private_Clean', 'Private_Dirty')
+
+
+def read_memory():
+    """Возвращает поля smaps_rollup текущего процесса в килобайтах."""
+    memory = {}
+    with open('/proc/self/smaps_rollup') as file:
+        for line in file:
+            field, _, value = line.partition(':')
+            if field in MEMORY_FIELDS:
+                memory[field] = int(value.split()[0])
+    return memory
+
+
+def scale_tables(tables, scale):
+    """Размножает справочники, чтобы замер не терялся в шуме."""
+    scaled = {}
+    for name, (ids, columns) in tables.items():
+        step = max(ids, default=0)
+        scaled[name] = (
+            [
+                id + step * copy
+                for copy in range(scale) for id in ids
+            ],
+            {
+                column: values * scale
+                for column, values in columns.items()
+            },
+        )
+    return scaled
+
+
+def load_catalog(mode, path, scale):
+    """
+    Загружает справочники так, как это делает один процесс.
+
+    В режиме before процесс читает справочники из базы и держит
+    собственные копии строк в списках словарей, в режиме after —
+    отображает общий снимок и обходит все его строки.
+    """
+    if mode == 'before':
+        tables = scale_tables(read_catalog_tables(), scale)
+        connections.close_all()
+        return [
+            [
+                {'id': id, **{
+                    column: values[column][index]
+                    for column in CATALOG_TABLES[name][1]
+                }}
+                for index, id in enumerate(ids)
+            ]
+            for name, (ids, values) in tables.items()
+        ]
+    snapshot = CatalogSnapshot(path)
+    for name in CATALOG_TABLES:
+        table = snapshot[name]
+        # Обращение ко всем строкам подгружает страницы снимка,
+        # как это происходит под нагрузкой.
+        table.search('\0')
+        for column in CATALOG_TABLES[name][1]:
+            for index in range(table.count):
+                table.get(column, index)
+    return snapshot
+
+
+def run_worker(mode, path, scale, barrier, results):
+    """Замеряет прирост памяти процесса после загрузки справочников."""
+    # Замеры начинаются и заканчиваются, когда запущены все процессы:
+    # Pss общих страниц делится на число процессов, которые их держат.
+    barrier.wait()
+    before = read_memory()
+    catalog = load_catalog(mode, path, scale)
+    barrier.wait()
+    after = read_memory()
+    results.put({
+        field: after[field] - before[field] for field in MEMORY_FIELDS
+    })
+    barrier.wait()
+    del catalog
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает память процессов, держащих собственные копии '
+        'справочников, и процессов, отображающих общий снимок.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Количество процессов, как у gunicorn.',
+        )
+        parser.add_argument(
+            '--scale',
+            type=int,
+            default=1,
+            help='Во сколько раз размножить справочники из базы.',
+        )
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        if workers < 1 or options['scale'] < 1:
+            raise CommandError('--workers и --scale должны быть больше 0.')
+        if not os.path.exists('/proc/self/smaps_rollup'):
+            raise CommandError('Замер памяти доступен только в Linux.')
+        context = multiprocessing.get_context('fork')
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / SNAPSHOT_NAME
+            tables = scale_tables(read_catalog_tables(), options['scale'])
+            rows = sum(len(ids) for ids, _ in tables.values())
+            write_snapshot(path, 0, tables)
+            # Процессы не должны унаследовать справочники от родителя,
+            # иначе общие после fork страницы исказят замер.
+            del tables
+            gc.collect()
+            connections.close_all()
+            self.stdout.write(
+                f'Строк: {rows}, '
+                f'снимок {path.stat().st_size / 2 ** 20:.1f} МБ.'
+            )
+            self.stdout.write(
+                f'{"Режим":<8}' + ''.join(
+                    f'{field + ", МБ":>18}' for field in MEMORY_FIELDS
+                )
+            )
+            for mode in ('before', 'after'):
+                usage = self.measure(
+                    context, mode, path, options['scale'], workers
+                )
+                self.stdout.write(f'{mode:<8}' + ''.join(
+                    f'{usage[field] / 1024:>18.2f}'
+                    for field in MEMORY_FIELDS
+                ))
+
+    @staticmethod
+    def measure(context, mode, path, scale, workers):
+        """Возвращает суммарный по процессам прирост памяти."""
+        barrier = context.Barrier(workers)
+        results = context.Queue()
+        processes = [
+            context.Process(
+                target=run_worker,
+                args=(mode, path, scale, barrier, results),
+            )
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        usage = dict.fromkeys(MEMORY_FIELDS, 0)
+        for _ in processes:
+            for field, value in results.get().items():
+                usage[field] += value
+        for process in processes:
+            process.join()
+        return usage
@@ -0,0 +1,68 @@
+import os
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from backend.constant import MEDIA_GARBAGE_MIN_AGE
+from recipes.models import Recipe
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет медиафайлы, на которые не ссылается ни одно '
+        'изображение рецепта и ни один аватар.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=MEDIA_GARBAGE_MIN_AGE,
+            help=(
+                'Не трогать файлы моложе указанного числа секунд: '
+                'их запись в базу может быть ещё не завершена.'
+            ),
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать файлы, которые будут удалены.',
+        )
+
+    def handle(self, *args, **options):
+        referenced = set()
+        for model, field in ((Recipe, 'image'), (User, 'avatar')):
+            referenced.update(
+                model.objects.values_list(field, flat=True).iterator()
+            )
+        media_root = Path(settings.MEDIA_ROOT)
+        directories = {
+            Recipe._meta.get_field('image').upload_to,
+            User._meta.get_field('avatar').upload_to,
+        }
+        deadline = time.time() - options['min_age']
+        removed = 0
+        freed = 0
+        for directory in directories:
+            for path in (media_root / directory).rglob('*'):
+                name = path.relative_to(media_root).as_posix()
+                if not path.is_file() or name in referenced:
+                    continue
+                stat = path.stat()
+                if stat.st_mtime > deadline:
+                    continue
+                if options['verbosity'] > 1 or options['dry_run']:
+                    self.stdout.write(name)
+                if not options['dry_run']:
+                    os.remove(path)
+                removed += 1
+                freed += stat.st_size
+        self.stdout.write(self.style.SUCCESS(
+            f'{"Найдено" if options["dry_run"] else "Удалено"} '
+            f'неиспользуемых файлов: {removed}, {freed} байт.'
+        ))
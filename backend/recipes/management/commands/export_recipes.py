@@ -0,0 +1,155 @@
+import json
+import os
+import sys
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.constant import BACKUP_BATCH_SIZE
+from recipes.importers import iter_batches
+from recipes.models import Amount, Recipe
+
+RECIPE_FIELDS = (
+    'id',
+    'name',
+    'text',
+    'cooking_time',
+    'image',
+    'pub_date',
+    'author__email',
+    'author__username',
+)
+RESUME_READ_BLOCK = 64 * 1024
+
+
+def find_last_newline(file, end):
+    """Возвращает позицию последнего перевода строки до end или -1."""
+    position = end
+    while position > 0:
+        step = min(RESUME_READ_BLOCK, position)
+        position -= step
+        file.seek(position)
+        newline = file.read(step).rfind(b'\n')
+        if newline != -1:
+            return position + newline
+    return -1
+
+
+def read_last_exported_id(path):
+    """
+    Возвращает id последнего полностью записанного рецепта.
+
+    Недописанная последняя строка обрезается, чтобы экспорт
+    можно было продолжить дозаписью в конец файла.
+    """
+    with open(path, 'rb+') as file:
+        end = file.seek(0, os.SEEK_END)
+        newline = find_last_newline(file, end)
+        if newline != end - 1:
+            end = newline + 1
+            file.truncate(end)
+        if not end:
+            return None
+        start = find_last_newline(file, end - 1) + 1
+        file.seek(start)
+        return json.loads(file.read(end - start))['id']
+
+
+class Command(BaseCommand):
+    help = (
+        'Экспорт рецептов с тэгами, ингредиентами и авторами в NDJSON. '
+        'Файлы изображений не копируются, выгружаются только их пути.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            default='-',
+            help='Файл для записи, по умолчанию стандартный вывод.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BACKUP_BATCH_SIZE,
+            help='Количество рецептов, загружаемых из базы за раз.',
+        )
+        parser.add_argument(
+            '--after-id',
+            type=int,
+            default=0,
+            help='Выгружать только рецепты с id больше указанного.',
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Продолжить прерванный экспорт, дописав файл --output.',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше нуля.')
+        after_id = options['after_id']
+        output = options['output']
+        if options['resume']:
+            if output == '-':
+                raise CommandError('--resume требует указать --output.')
+            if os.path.exists(output):
+                after_id = max(after_id, read_last_exported_id(output) or 0)
+        if output == '-':
+            exported = self.export(sys.stdout, after_id, options)
+        else:
+            mode = 'a' if options['resume'] else 'w'
+            with open(output, mode, encoding='utf-8') as file:
+                exported = self.export(file, after_id, options)
+        self.stderr.write(self.style.SUCCESS(
+            f'Выгружено рецептов: {exported}.'
+        ))
+
+    def export(self, file, after_id, options):
+        """Построчно записывает рецепты с id больше after_id в файл."""
+        recipes = (
+            Recipe.objects.filter(id__gt=after_id)
+            .order_by('id')
+            .values_list(*RECIPE_FIELDS)
+            .iterator(chunk_size=options['batch_size'])
+        )
+        exported = 0
+        for batch in iter_batches(recipes, options['batch_size']):
+            ids = [row[0] for row in batch]
+            tags = defaultdict(list)
+            for recipe_id, slug in Recipe.tags.through.objects.filter(
+                recipe_id__in=ids
+            ).order_by('tag__slug').values_list('recipe_id', 'tag__slug'):
+                tags[recipe_id].append(slug)
+            ingredients = defaultdict(list)
+            for recipe_id, name, unit, amount in Amount.objects.filter(
+                recipe_id__in=ids
+            ).order_by('id').values_list(
+                'recipe_id',
+                'ingredient__name',
+                'ingredient__measurement_unit',
+                'amount',
+            ):
+                ingredients[recipe_id].append({
+                    'name': name,
+                    'measurement_unit': unit,
+                    'amount': amount,
+                })
+            file.writelines(
+                json.dumps({
+                    'id': recipe_id,
+                    'name': name,
+                    'text': text,
+                    'cooking_time': cooking_time,
+                    'image': image or None,
+                    'pub_date': pub_date.isoformat(),
+                    'author': {'email': email, 'username': username},
+                    'tags': tags[recipe_id],
+                    'ingredients': ingredients[recipe_id],
+                }, ensure_ascii=False) + '\n'
+                for (recipe_id, name, text, cooking_time, image, pub_date,
+                     email, username) in batch
+            )
+            file.flush()
+            exported += len(batch)
+        return exported
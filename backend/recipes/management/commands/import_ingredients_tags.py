@@ -1,23 +1,96 @@
-import json
-
-from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
 
+from backend.constant import IMPORT_BATCH_SIZE
+from recipes.generation import (
+    bump_catalog_generation,
+    bump_recipes_generation,
+)
+from recipes.importers import iter_rows, upsert_rows
 from recipes.models import Ingredient, Tag
 
 
 class Command(BaseCommand):
-    help = 'Импорт продуктов из data/ingredients.json'
+    help = (
+        'Импорт продуктов и тэгов из файлов JSON или CSV. '
+        'Повторный запуск обновляет уже загруженные записи.'
+    )
 
-    def handle(self, *args, **kwargs):
-        with open('./data/ingredients.json', encoding='utf-8') as json_data:
-            data = json.load(json_data)
-        Ingredient.objects.bulk_create((
-            Ingredient(**item) for item in data),
-        )
-        self.stdout.write(self.style.SUCCESS('Ингредиенты созданы спешно!'))
-        with open('./data/tags.json', encoding='utf-8') as json_data:
-            data = json.load(json_data)
-        Tag.objects.bulk_create((
-            Tag(**item) for item in data),
-        )
-        self.stdout.write(self.style.SUCCESS('Тэги созданы успешно!'))
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ingredients',
+            default=settings.BASE_DIR / 'data' / 'ingredients.json',
+            help='Путь к файлу с продуктами (.json или .csv).',
+        )
+        parser.add_argument(
+            '--tags',
+            default=settings.BASE_DIR / 'data' / 'tags.json',
+            help='Путь к файлу с тэгами (.json или .csv).',
+        )
+        parser.add_argument(
+            '--format',
+            choices=('json', 'csv'),
+            help='Формат файлов, если его нельзя понять по расширению.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=IMPORT_BATCH_SIZE,
+            help='Количество строк, загружаемых за один запрос.',
+        )
+        parser.add_argument(
+            '--ignore-conflicts',
+            action='store_true',
+            help='Пропускать существующие записи, не обновляя их.',
+        )
+        parser.add_argument(
+            '--skip-tags',
+            action='store_true',
+            help='Не импортировать тэги.',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше нуля.')
+        self.import_file(
+            model=Ingredient,
+            path=options['ingredients'],
+            key_fields=('name', 'measurement_unit'),
+            update_fields=(),
+            options=options,
+        )
+        if not options['skip_tags']:
+            self.import_file(
+                model=Tag,
+                path=options['tags'],
+                key_fields=('slug',),
+                update_fields=('name',),
+                options=options,
+            )
+        bump_recipes_generation()
+        bump_catalog_generation()
+
+    def import_file(self, model, path, key_fields, update_fields, options):
+        """Загружает файл в таблицу модели и выводит статистику."""
+        rows = iter_rows(
+            path,
+            fieldnames=key_fields + update_fields,
+            file_format=options['format'],
+        )
+        try:
+            stats = upsert_rows(
+                model,
+                rows,
+                key_fields=key_fields,
+                update_fields=update_fields,
+                batch_size=options['batch_size'],
+                ignore_conflicts=options['ignore_conflicts'],
+            )
+        except (OSError, ValueError, KeyError) as error:
+            raise CommandError(f'Ошибка чтения {path}: {error!r}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{model._meta.verbose_name_plural} из {path}: '
+            f'добавлено {stats["inserted"]}, '
+            f'обновлено {stats["updated"]}, '
+            f'пропущено {stats["skipped"]}.'
+        ))
@@ -0,0 +1,208 @@
+import json
+import os
+import sys
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from backend.constant import BACKUP_BATCH_SIZE
+from recipes.generation import bump_recipes_generation
+from recipes.importers import iter_batches
+from recipes.models import Amount, Ingredient, Recipe, Tag
+
+User = get_user_model()
+
+
+def read_checkpoint(path):
+    """Возвращает id последнего импортированного рецепта из файла."""
+    if not path or not os.path.exists(path):
+        return 0
+    with open(path, encoding='utf-8') as file:
+        return int(file.read().strip() or 0)
+
+
+def write_checkpoint(path, last_id):
+    """Атомарно сохраняет id последнего импортированного рецепта."""
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        file.write(str(last_id))
+    os.replace(temp_path, path)
+
+
+class Command(BaseCommand):
+    help = (
+        'Импорт рецептов из NDJSON, созданного командой export_recipes. '
+        'Авторы ищутся по email, тэги по slug, '
+        'ингредиенты по названию и единице измерения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Файл NDJSON или "-" для чтения стандартного ввода.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BACKUP_BATCH_SIZE,
+            help='Количество рецептов, сохраняемых в одной транзакции.',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help=(
+                'Файл с id последнего импортированного рецепта. '
+                'При повторном запуске рецепты до этого id не читаются; '
+                'уже загруженные рецепты пропускаются и без него.'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше нуля.')
+        if options['path'] == '-':
+            stats = self.import_file(sys.stdin, options)
+        else:
+            with open(options['path'], encoding='utf-8') as file:
+                stats = self.import_file(file, options)
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано рецептов: {stats["imported"]}, '
+            f'уже были в базе: {stats["duplicates"]}, '
+            f'пропущено: {stats["skipped"]}.'
+        ))
+
+    def import_file(self, file, options):
+        """
+        Пачками загружает рецепты из открытого файла.
+
+        Контрольная точка пишется после фиксации пачки, поэтому после
+        сбоя между ними, как и при повторном запуске без --checkpoint,
+        пачка читается снова; уже загруженные рецепты распознаются
+        в import_batch и не дублируются.
+        """
+        checkpoint = options['checkpoint']
+        last_id = read_checkpoint(checkpoint)
+        records = (
+            record for record in map(json.loads, filter(str.strip, file))
+            if record['id'] > last_id
+        )
+        stats = Counter(imported=0, duplicates=0, skipped=0)
+        for batch in iter_batches(records, options['batch_size']):
+            with transaction.atomic():
+                stats.update(self.import_batch(batch))
+            if checkpoint:
+                write_checkpoint(checkpoint, batch[-1]['id'])
+        return stats
+
+    def import_batch(self, batch):
+        """
+        Сохраняет пачку рецептов за постоянное число запросов.
+
+        Рецепт, у которого уже есть рецепт с тем же автором, названием
+        и временем публикации, считается загруженным ранее.
+
+        Returns:
+            dict: Количество сохранённых (imported), уже загруженных
+            (duplicates) и пропущенных из-за отсутствующих объектов
+            (skipped) рецептов.
+        """
+        authors = dict(User.objects.filter(
+            email__in={record['author']['email'] for record in batch}
+        ).values_list('email', 'id'))
+        tags = dict(Tag.objects.filter(
+            slug__in={slug for record in batch for slug in record['tags']}
+        ).values_list('slug', 'id'))
+        ingredients = {
+            (name, unit): ingredient_id
+            for ingredient_id, name, unit in Ingredient.objects.filter(
+                name__in={
+                    item['name']
+                    for record in batch for item in record['ingredients']
+                }
+            ).values_list('id', 'name', 'measurement_unit')
+        }
+        for record in batch:
+            record['pub_date'] = parse_datetime(record['pub_date'])
+        existing = set(Recipe.objects.filter(
+            author_id__in=set(authors.values()),
+            pub_date__in={record['pub_date'] for record in batch},
+        ).values_list('author_id', 'name', 'pub_date'))
+        recipes = []
+        accepted = []
+        stats = Counter(imported=0, duplicates=0, skipped=0)
+        for record in batch:
+            missing = self.find_missing(record, authors, tags, ingredients)
+            if missing:
+                self.stderr.write(
+                    f'Рецепт {record["id"]} пропущен, не найдены: {missing}',
+                )
+                stats['skipped'] += 1
+                continue
+            key = (
+                authors[record['author']['email']],
+                record['name'],
+                record['pub_date'],
+            )
+            if key in existing:
+                stats['duplicates'] += 1
+                continue
+            existing.add(key)
+            recipes.append(Recipe(
+                name=record['name'],
+                text=record['text'],
+                cooking_time=record['cooking_time'],
+                image=record['image'],
+                author_id=authors[record['author']['email']],
+            ))
+            accepted.append(record)
+        self.create_recipes(recipes)
+        for recipe, record in zip(recipes, accepted):
+            recipe.pub_date = record['pub_date']
+        Recipe.objects.bulk_update(recipes, ['pub_date'])
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe_id=recipe.id, tag_id=tags[slug])
+            for recipe, record in zip(recipes, accepted)
+            for slug in record['tags']
+        )
+        Amount.objects.bulk_create(
+            Amount(
+                recipe_id=recipe.id,
+                ingredient_id=ingredients[
+                    item['name'], item['measurement_unit']
+                ],
+                amount=item['amount'],
+            )
+            for recipe, record in zip(recipes, accepted)
+            for item in record['ingredients']
+        )
+        if recipes:
+            bump_recipes_generation()
+        stats['imported'] = len(recipes)
+        return stats
+
+    @staticmethod
+    def find_missing(record, authors, tags, ingredients):
+        """Перечисляет объекты из рецепта, отсутствующие в базе."""
+        missing = []
+        if record['author']['email'] not in authors:
+            missing.append(f'автор {record["author"]["email"]}')
+        missing.extend(
+            f'тэг {slug}' for slug in record['tags'] if slug not in tags
+        )
+        missing.extend(
+            f'ингредиент {item["name"]} ({item["measurement_unit"]})'
+            for item in record['ingredients']
+            if (item['name'], item['measurement_unit']) not in ingredients
+        )
+        return ', '.join(missing)
+
+    @staticmethod
+    def create_recipes(recipes):
+        """Создаёт рецепты одним запросом, если СУБД возвращает их id."""
+        if connection.features.can_return_rows_from_bulk_insert:
+            Recipe.objects.bulk_create(recipes)
+            return
+        for recipe in recipes:
+            recipe.save()
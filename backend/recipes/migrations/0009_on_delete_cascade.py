@@ -0,0 +1,24 @@
+# Generated by Django 3.2.16 on 2026-10-19 09:05
+
+from django.db import migrations
+
+from backend.db import on_delete_cascade
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_auto_20261019_0859'),
+    ]
+
+    operations = [
+        on_delete_cascade(
+            ('recipes', 'recipe', 'author'),
+            ('recipes', 'recipe_tags', 'recipe'),
+            ('recipes', 'amount', 'recipe'),
+            ('recipes', 'favoriterecipe', 'recipe'),
+            ('recipes', 'favoriterecipe', 'user'),
+            ('recipes', 'shoppingcart', 'recipe'),
+            ('recipes', 'shoppingcart', 'user'),
+        ),
+    ]
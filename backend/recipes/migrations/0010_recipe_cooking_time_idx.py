@@ -0,0 +1,17 @@
+# Generated by Django 3.2.16 on 2026-10-19 09:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_on_delete_cascade'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['cooking_time'], name='recipe_cooking_time_idx'),
+        ),
+    ]
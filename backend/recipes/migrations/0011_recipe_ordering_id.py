@@ -0,0 +1,17 @@
+# Generated by Django 3.2.16 on 2026-10-19 09:23
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_recipe_cooking_time_idx'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='recipe',
+            options={'default_related_name': 'recipes', 'ordering': ('-pub_date', '-id'), 'verbose_name': 'рецепт', 'verbose_name_plural': 'рецепты'},
+        ),
+    ]
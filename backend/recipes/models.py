@@ -15,6 +15,9 @@ from backend.constant import (
 
 User = get_user_model()
 
+# Счётчики рецепта пишет только буфер recipes.counters.
+COUNTER_FIELDS = ('views_count', 'clicks_count')
+
 
 class NameModel(models.Model):
     """Базовая модель с именем объекта."""
@@ -105,18 +108,62 @@ class Recipe(NameModel):
         verbose_name='Дата публикации',
         auto_now_add=True
     )
+    views_count = models.PositiveIntegerField(
+        verbose_name='Просмотры',
+        default=0,
+        editable=False,
+    )
+    clicks_count = models.PositiveIntegerField(
+        verbose_name='Переходы по короткой ссылке',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'рецепт'
         verbose_name_plural = 'рецепты'
         default_related_name = 'recipes'
-        ordering = ('-pub_date',)
+        ordering = ('-pub_date', '-id')
+        indexes = (
+            models.Index(
+                fields=('cooking_time',), name='recipe_cooking_time_idx'
+            ),
+        )
 
     def __str__(self):
         """Возвращает строковое представление объекта с именем."""
 
         return self.name
 
+    def save(
+        self, force_insert=False, force_update=False, using=None,
+        update_fields=None
+    ):
+        """
+        Сохраняет рецепт, не перезаписывая счётчики.
+
+        Счётчики записываются буфером напрямую в базу, поэтому
+        загруженные вместе с рецептом значения могут устареть к моменту
+        сохранения. При изменении существующего рецепта они исключаются
+        из списка сохраняемых полей.
+        """
+        if not self._state.adding and not force_insert:
+            if update_fields is None:
+                update_fields = [
+                    field.name for field in self._meta.concrete_fields
+                    if not field.primary_key
+                ]
+            update_fields = [
+                field for field in update_fields
+                if field not in COUNTER_FIELDS
+            ]
+        super().save(
+            force_insert=force_insert,
+            force_update=force_update,
+            using=using,
+            update_fields=update_fields,
+        )
+
 
 class Amount(models.Model):
     """Вспомогательный класс для связи рецепта и количества ингредиента."""
@@ -0,0 +1,67 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from users.models import AUTHOR_FIELDS
+from .generation import bump_catalog_generation, bump_recipes_generation
+from .links import forget_recipe
+from .models import Amount, Ingredient, Recipe, Tag
+
+User = get_user_model()
+
+# Модели, изменение которых меняет содержимое списка рецептов.
+GENERATION_MODELS = (Recipe, Amount, Tag, Ingredient)
+
+
+@receiver(post_save, sender=Recipe)
+def forget_created_recipe(sender, instance, created, **kwargs):
+    """Сбрасывает закэшированное отсутствие нового рецепта."""
+    if created:
+        forget_recipe(instance.id)
+
+
+@receiver(post_delete, sender=Recipe)
+def forget_deleted_recipe(sender, instance, **kwargs):
+    """Сбрасывает закэшированное наличие удалённого рецепта."""
+    forget_recipe(instance.id)
+
+
+def bump_generation(sender, **kwargs):
+    """Меняет поколение рецептов при изменении их данных."""
+    bump_recipes_generation()
+
+
+def bump_catalog(sender, **kwargs):
+    """Меняет поколение справочников при изменении тэга или продукта."""
+    bump_catalog_generation()
+
+
+for model in GENERATION_MODELS:
+    post_save.connect(bump_generation, sender=model)
+    post_delete.connect(bump_generation, sender=model)
+m2m_changed.connect(bump_generation, sender=Recipe.tags.through)
+for model in (Ingredient, Tag):
+    post_save.connect(bump_catalog, sender=model)
+    post_delete.connect(bump_catalog, sender=model)
+
+
+@receiver(post_save, sender=User)
+def bump_generation_for_author(
+    sender, instance, created, update_fields, **kwargs
+):
+    """
+    Меняет поколение рецептов при изменении данных их автора.
+
+    Данные автора выводятся в списке рецептов. Новый пользователь,
+    пользователь без рецептов и сохранение полей, не входящих
+    в AUTHOR_FIELDS, например времени последнего входа или пароля,
+    поколение не меняют.
+    """
+    if created:
+        return
+    if update_fields is not None and not set(update_fields) & set(
+        AUTHOR_FIELDS
+    ):
+        return
+    if instance.author_changed() and instance.recipes.exists():
+        bump_recipes_generation()
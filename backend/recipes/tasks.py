@@ -0,0 +1,4 @@
+"""Фоновые задачи приложения recipes."""
+from .deletion import purge_recipes, purge_users
+
+__all__ = ('purge_recipes', 'purge_users')
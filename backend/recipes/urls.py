@@ -1,9 +1,10 @@
 from django.urls import path
 
-from recipes.views import redirect_to_recipe
+from recipes.views import redirect_by_code, redirect_to_recipe
 
 app_name = 'recipes'
 
 urlpatterns = [
     path('<int:recipe_id>', redirect_to_recipe, name='short_link'),
+    path('<str:code>', redirect_by_code, name='short_code'),
 ]
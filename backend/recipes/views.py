@@ -1,11 +1,21 @@
+from django.http import Http404
 from django.shortcuts import redirect
-from django.core.exceptions import ValidationError
-from .models import Recipe
+
+from .counters import recipe_counters
+from .links import decode_recipe_code, recipe_exists
 
 
 def redirect_to_recipe(request, recipe_id):
     """Перенаправляет на страницу рецепта, если он существует."""
-    if Recipe.objects.filter(id=recipe_id).exists():
-        return redirect(f'/recipes/{recipe_id}/')
-    else:
-        raise ValidationError(f'Рецепт с id {recipe_id} отсутствует.')
+    if not recipe_exists(recipe_id):
+        raise Http404(f'Рецепт с id {recipe_id} отсутствует.')
+    recipe_counters.increment('clicks_count', recipe_id)
+    return redirect(f'/recipes/{recipe_id}/')
+
+
+def redirect_by_code(request, code):
+    """Перенаправляет на страницу рецепта по короткому коду."""
+    recipe_id = decode_recipe_code(code)
+    if recipe_id is None:
+        raise Http404(f'Некорректная короткая ссылка {code}.')
+    return redirect_to_recipe(request, recipe_id)
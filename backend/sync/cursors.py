@@ -0,0 +1,64 @@
+import re
+from collections import namedtuple
+
+from django.db import connections
+from django.db.models import Q
+
+# Позиция в журнале изменений: id транзакции и id записи.
+Cursor = namedtuple('Cursor', ('xid', 'id'))
+START = Cursor(0, 0)
+
+
+def parse_cursor(value):
+    """
+    Возвращает позицию журнала из токена вида «xid.id».
+
+    Пустой токен и «0» означают начало журнала. Для некорректного
+    токена возвращает None.
+    """
+    if value in ('', '0'):
+        return START
+    match = re.fullmatch(r'(\d{1,19})\.(\d{1,19})', value, re.ASCII)
+    if match is None:
+        return None
+    return Cursor(*map(int, match.groups()))
+
+
+def format_cursor(cursor):
+    """Возвращает токен позиции журнала."""
+    return f'{cursor.xid}.{cursor.id}'
+
+
+def get_commit_horizon(using):
+    """
+    Возвращает id самой старой незавершённой транзакции PostgreSQL.
+
+    Все транзакции с меньшими id зафиксированы или откатились, поэтому
+    их записи журнала уже видны и новых не появится. На прочих СУБД,
+    где запись журнала сериализуется блокировкой базы, возвращает None.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT txid_snapshot_xmin(txid_current_snapshot())')
+        return cursor.fetchone()[0]
+
+
+def committed_after(queryset, cursor):
+    """
+    Возвращает записи журнала после позиции cursor в порядке фиксации.
+
+    Записи упорядочены по id транзакции и id записи. Отдаются только
+    записи завершённых транзакций: запись транзакции, которая ещё
+    выполняется, получила бы позицию раньше уже отданных. Горизонт
+    и записи читаются из одной базы, даже если чтение идёт с реплик.
+    """
+    using = queryset.db
+    queryset = queryset.using(using).filter(
+        Q(xid__gt=cursor.xid) | Q(xid=cursor.xid, id__gt=cursor.id)
+    )
+    horizon = get_commit_horizon(using)
+    if horizon is not None:
+        queryset = queryset.filter(xid__lt=horizon)
+    return queryset.order_by('xid', 'id')
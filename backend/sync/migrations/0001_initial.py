@@ -0,0 +1,31 @@
+# Generated by Django 3.2.16 on 2026-10-19 09:14
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=32, verbose_name='Раздел')),
+                ('object_id', models.BigIntegerField(verbose_name='id объекта')),
+                ('action', models.CharField(choices=[('upsert', 'Создан или изменён'), ('delete', 'Удалён')], max_length=6, verbose_name='Действие')),
+                ('user_id', models.BigIntegerField(blank=True, null=True, verbose_name='id пользователя')),
+                ('created', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Время изменения')),
+            ],
+            options={
+                'verbose_name': 'Запись журнала изменений',
+                'verbose_name_plural': 'Журнал изменений',
+                'ordering': ('id',),
+            },
+        ),
+    ]
@@ -0,0 +1,111 @@
+# Generated by Django 3.2.16 on 2026-10-19 09:20
+
+from django.db import migrations
+
+# Раздел ленты, модель, колонка с id объекта, колонка с id владельца
+# и колонки, изменение которых попадает в журнал (None — любые).
+TRACKED_TABLES = (
+    ('ingredients', ('recipes', 'Ingredient'), 'id', None, None),
+    ('tags', ('recipes', 'Tag'), 'id', None, None),
+    (
+        'recipes', ('recipes', 'Recipe'), 'id', None,
+        ('name', 'text', 'image', 'cooking_time', 'author_id'),
+    ),
+    ('favorites', ('recipes', 'FavoriteRecipe'), 'recipe_id', 'user_id', None),
+    (
+        'shopping_cart', ('recipes', 'ShoppingCart'), 'recipe_id', 'user_id',
+        None,
+    ),
+    ('subscriptions', ('users', 'Follow'), 'is_following_id', 'user_id', None),
+)
+
+CREATE_FUNCTION = '''
+CREATE OR REPLACE FUNCTION sync_log_change() RETURNS trigger AS $$
+DECLARE
+    data jsonb;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        data := to_jsonb(OLD);
+    ELSE
+        data := to_jsonb(NEW);
+    END IF;
+    INSERT INTO sync_changelog (model, object_id, action, user_id, created)
+    VALUES (
+        TG_ARGV[0],
+        (data ->> TG_ARGV[1])::bigint,
+        CASE WHEN TG_OP = 'DELETE' THEN 'delete' ELSE 'upsert' END,
+        CASE WHEN TG_ARGV[2] = '' THEN NULL
+             ELSE (data ->> TG_ARGV[2])::bigint END,
+        clock_timestamp()
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+'''
+
+
+def create_triggers(apps, schema_editor):
+    """
+    Создаёт в PostgreSQL триггеры, пишущие журнал изменений.
+
+    Триггер срабатывает в той же транзакции, что и изменение, в том
+    числе при массовых вставках и удалениях без сигналов Django.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    quote = schema_editor.quote_name
+    schema_editor.execute(CREATE_FUNCTION)
+    for name, model, id_column, user_column, columns in TRACKED_TABLES:
+        table = apps.get_model(*model)._meta.db_table
+        update = 'UPDATE'
+        if columns:
+            update += ' OF ' + ', '.join(map(quote, columns))
+        schema_editor.execute(
+            f'CREATE TRIGGER {quote("sync_" + table)} '
+            f'AFTER INSERT OR DELETE OR {update} ON {quote(table)} '
+            f'FOR EACH ROW EXECUTE FUNCTION sync_log_change('
+            f"'{name}', '{id_column}', '{user_column or ''}')"
+        )
+
+
+def drop_triggers(apps, schema_editor):
+    """Удаляет триггеры журнала изменений."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    quote = schema_editor.quote_name
+    for name, model, id_column, user_column, columns in TRACKED_TABLES:
+        table = apps.get_model(*model)._meta.db_table
+        schema_editor.execute(
+            f'DROP TRIGGER IF EXISTS {quote("sync_" + table)} '
+            f'ON {quote(table)}'
+        )
+    schema_editor.execute('DROP FUNCTION IF EXISTS sync_log_change()')
+
+
+def backfill(apps, schema_editor):
+    """Добавляет в журнал все существующие объекты как созданные."""
+    quote = schema_editor.quote_name
+    for name, model, id_column, user_column, columns in TRACKED_TABLES:
+        table = apps.get_model(*model)._meta.db_table
+        user = quote(user_column) if user_column else 'NULL'
+        schema_editor.execute(
+            'INSERT INTO sync_changelog '
+            '(model, object_id, action, user_id, created) '
+            f"SELECT %s, {quote(id_column)}, 'upsert', {user}, "
+            f'CURRENT_TIMESTAMP FROM {quote(table)}',
+            [name],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync', '0001_initial'),
+        ('recipes', '0009_on_delete_cascade'),
+        ('users', '0004_on_delete_cascade'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_triggers, drop_triggers),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 3.2.16 on 2026-10-19 09:58
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+# Функция журнала из 0002, восстанавливаемая при откате.
+PREVIOUS_FUNCTION = import_module(
+    'sync.migrations.0002_change_triggers'
+).CREATE_FUNCTION
+
+CREATE_FUNCTION = '''
+CREATE OR REPLACE FUNCTION sync_log_change() RETURNS trigger AS $$
+DECLARE
+    data jsonb;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        data := to_jsonb(OLD);
+    ELSE
+        data := to_jsonb(NEW);
+    END IF;
+    INSERT INTO sync_changelog
+        (model, object_id, action, user_id, created, xid)
+    VALUES (
+        TG_ARGV[0],
+        (data ->> TG_ARGV[1])::bigint,
+        CASE WHEN TG_OP = 'DELETE' THEN 'delete' ELSE 'upsert' END,
+        CASE WHEN TG_ARGV[2] = '' THEN NULL
+             ELSE (data ->> TG_ARGV[2])::bigint END,
+        clock_timestamp(),
+        txid_current()
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+'''
+
+
+def replace_function(sql):
+    """Возвращает функцию миграции, заменяющую функцию триггеров."""
+
+    def replace(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(sql)
+
+    return replace
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync', '0002_change_triggers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='changelog',
+            name='xid',
+            field=models.BigIntegerField(default=0, verbose_name='id транзакции'),
+        ),
+        migrations.AddIndex(
+            model_name='changelog',
+            index=models.Index(fields=['xid', 'id'], name='changelog_xid_id_idx'),
+        ),
+        migrations.RunPython(
+            replace_function(CREATE_FUNCTION),
+            replace_function(PREVIOUS_FUNCTION),
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 3.2.16 on 2026-10-19 14:20
+
+from django.db import migrations
+
+CREATE_FUNCTION = '''
+CREATE OR REPLACE FUNCTION sync_log_recipe_tags() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        INSERT INTO sync_changelog
+            (model, object_id, action, user_id, created, xid)
+        VALUES (
+            'recipes', OLD.recipe_id, 'upsert', NULL,
+            clock_timestamp(), txid_current()
+        );
+    END IF;
+    IF TG_OP = 'INSERT'
+       OR (TG_OP = 'UPDATE' AND NEW.recipe_id <> OLD.recipe_id) THEN
+        INSERT INTO sync_changelog
+            (model, object_id, action, user_id, created, xid)
+        VALUES (
+            'recipes', NEW.recipe_id, 'upsert', NULL,
+            clock_timestamp(), txid_current()
+        );
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+'''
+
+
+def get_table(apps):
+    """Возвращает таблицу связей рецептов с тэгами."""
+    return apps.get_model(
+        'recipes', 'Recipe'
+    )._meta.get_field('tags').remote_field.through._meta.db_table
+
+
+def create_trigger(apps, schema_editor):
+    """
+    Создаёт в PostgreSQL триггер, пишущий в журнал изменение тэгов.
+
+    Тэги рецепта хранятся в отдельной таблице, поэтому их изменение
+    не задевает строку рецепта. Добавление и удаление связи пишется
+    как изменение рецепта, в том числе при удалении рецепта
+    каскадом: лента отдаёт отсутствующий рецепт как удалённый.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    quote = schema_editor.quote_name
+    table = get_table(apps)
+    schema_editor.execute(CREATE_FUNCTION)
+    schema_editor.execute(
+        f'CREATE TRIGGER {quote("sync_" + table)} '
+        f'AFTER INSERT OR DELETE OR UPDATE ON {quote(table)} '
+        'FOR EACH ROW EXECUTE FUNCTION sync_log_recipe_tags()'
+    )
+
+
+def drop_trigger(apps, schema_editor):
+    """Удаляет триггер журнала изменений тэгов рецептов."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    quote = schema_editor.quote_name
+    table = get_table(apps)
+    schema_editor.execute(
+        f'DROP TRIGGER IF EXISTS {quote("sync_" + table)} ON {quote(table)}'
+    )
+    schema_editor.execute('DROP FUNCTION IF EXISTS sync_log_recipe_tags()')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync', '0003_changelog_xid'),
+        ('recipes', '0011_recipe_ordering_id'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigger, drop_trigger),
+    ]
@@ -0,0 +1,59 @@
+from django.db import models
+from django.utils import timezone
+
+from backend.constant import SYNC_MODEL_LENGTH
+
+
+class ChangeLog(models.Model):
+    """
+    Запись журнала изменений для ленты синхронизации.
+
+    object_id — id изменённого объекта раздела model; для избранного,
+    корзины и подписок это id рецепта или автора. user_id задан для
+    записей, видимых только своему пользователю, и не является
+    внешним ключом, чтобы журнал не мешал удалять пользователей.
+    xid — id транзакции PostgreSQL, записавшей изменение, по которому
+    журнал читается в порядке фиксации; на прочих СУБД он равен 0.
+    """
+
+    class Action(models.TextChoices):
+        UPSERT = 'upsert', 'Создан или изменён'
+        DELETE = 'delete', 'Удалён'
+
+    model = models.CharField(
+        max_length=SYNC_MODEL_LENGTH,
+        verbose_name='Раздел'
+    )
+    object_id = models.BigIntegerField(verbose_name='id объекта')
+    action = models.CharField(
+        max_length=max(len(value) for value in Action.values),
+        choices=Action.choices,
+        verbose_name='Действие'
+    )
+    user_id = models.BigIntegerField(
+        null=True,
+        blank=True,
+        verbose_name='id пользователя'
+    )
+    created = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Время изменения'
+    )
+    xid = models.BigIntegerField(
+        default=0,
+        verbose_name='id транзакции'
+    )
+
+    class Meta:
+        verbose_name = 'Запись журнала изменений'
+        verbose_name_plural = 'Журнал изменений'
+        ordering = ('id',)
+        indexes = [
+            models.Index(
+                fields=['xid', 'id'],
+                name='changelog_xid_id_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.model} #{self.object_id}: {self.action}'
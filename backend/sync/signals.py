@@ -0,0 +1,87 @@
+from django.db import connections
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from recipes.models import (
+    FavoriteRecipe,
+    Ingredient,
+    Recipe,
+    ShoppingCart,
+    Tag,
+)
+from users.models import Follow
+from .models import ChangeLog
+
+# Раздел ленты, поле с id объекта и поле с id владельца для моделей.
+TRACKED_MODELS = {
+    Ingredient: ('ingredients', 'id', None),
+    Tag: ('tags', 'id', None),
+    Recipe: ('recipes', 'id', None),
+    FavoriteRecipe: ('favorites', 'recipe_id', 'user_id'),
+    ShoppingCart: ('shopping_cart', 'recipe_id', 'user_id'),
+    Follow: ('subscriptions', 'is_following_id', 'user_id'),
+}
+
+
+def log_change(instance, action, using):
+    """
+    Записывает изменение в журнал.
+
+    В PostgreSQL журнал заполняют триггеры в той же транзакции,
+    что и изменение, включая массовые операции без сигналов;
+    сигналы пишут журнал только на прочих СУБД.
+    """
+    if connections[using].vendor == 'postgresql':
+        return
+    model, id_field, user_field = TRACKED_MODELS[type(instance)]
+    ChangeLog.objects.using(using).create(
+        model=model,
+        object_id=getattr(instance, id_field),
+        action=action,
+        user_id=getattr(instance, user_field) if user_field else None,
+    )
+
+
+def log_save(sender, instance, using, **kwargs):
+    """Записывает создание или изменение объекта."""
+    log_change(instance, ChangeLog.Action.UPSERT, using)
+
+
+def log_delete(sender, instance, using, **kwargs):
+    """Записывает удаление объекта."""
+    log_change(instance, ChangeLog.Action.DELETE, using)
+
+
+def log_recipe_tags(
+    sender, instance, action, reverse, pk_set, using, **kwargs
+):
+    """
+    Записывает изменение тэгов рецептов как изменение рецептов.
+
+    В PostgreSQL изменение таблицы связей пишет в журнал триггер.
+    """
+    if connections[using].vendor == 'postgresql':
+        return
+    if action in ('post_add', 'post_remove') and pk_set:
+        recipe_ids = pk_set if reverse else [instance.id]
+    elif action == 'pre_clear' and reverse:
+        recipe_ids = sender.objects.using(using).filter(
+            tag_id=instance.id
+        ).values_list('recipe_id', flat=True)
+    elif action == 'post_clear' and not reverse:
+        recipe_ids = [instance.id]
+    else:
+        return
+    ChangeLog.objects.using(using).bulk_create([
+        ChangeLog(
+            model=TRACKED_MODELS[Recipe][0],
+            object_id=recipe_id,
+            action=ChangeLog.Action.UPSERT,
+        )
+        for recipe_id in recipe_ids
+    ])
+
+
+m2m_changed.connect(log_recipe_tags, sender=Recipe.tags.through)
+for tracked_model in TRACKED_MODELS:
+    post_save.connect(log_save, sender=tracked_model)
+    post_delete.connect(log_delete, sender=tracked_model)
@@ -0,0 +1,21 @@
+"""
+Настройки для тестов на PostgreSQL: основная база и отдельная база
+в роли реплики на сервере из переменных POSTGRES_* и DB_*.
+
+Тесты триггеров журнала изменений и ограничений времени запросов
+выполняются только с этими настройками. Запуск из каталога backend:
+    python manage.py test --settings=tests.postgres_settings
+"""
+from tests.settings import *  # noqa: F401,F403
+
+from backend import settings as base  # noqa: E402
+
+DATABASES = {
+    'default': base.DATABASES['default'],
+    'replica_1': {
+        **base.DATABASES['default'],
+        'TEST': {'NAME': f'test_{base.DATABASES["default"]["NAME"]}_replica'},
+    },
+}
+# SET и RESET statement_timeout не входят в бюджеты запросов тестов.
+DB_STATEMENT_TIMEOUT = 0
@@ -0,0 +1,34 @@
+"""
+Настройки для тестов: две локальные базы SQLite вместо основной
+базы PostgreSQL и реплики.
+
+Запуск из каталога backend:
+    python manage.py test --settings=tests.settings
+"""
+import os
+import tempfile
+
+os.environ.setdefault('SECRET_KEY', 'tests')
+
+from backend.settings import *  # noqa: E402,F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'test-default.sqlite3',  # noqa: F405
+    },
+    'replica_1': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'test-replica.sqlite3',  # noqa: F405
+    },
+}
+REPLICA_DATABASES = ['replica_1']
+# Кэш в файлах, в отличие от LocMemCache, считается общим
+# для процессов, поэтому кэши по поколениям данных включены.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'backend-tests-cache'),
+    },
+}
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
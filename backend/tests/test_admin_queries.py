@@ -0,0 +1,147 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from backend.pagination import EstimatedCountPaginator
+
+from recipes.models import (
+    Amount,
+    FavoriteRecipe,
+    Ingredient,
+    Recipe,
+    ShoppingCart,
+    Tag,
+)
+from users.models import Follow
+
+User = get_user_model()
+
+
+class AdminQueryCountTests(TestCase):
+    """
+    Число запросов списков администратора не зависит от числа строк.
+
+    Каждый список открывается на небольшом наборе данных и после
+    его увеличения в несколько раз; число запросов должно совпадать
+    с ожидаемым в обоих случаях. На PostgreSQL EstimatedCountPaginator
+    для всей таблицы выполняет ещё один запрос — оценку числа строк
+    из pg_class. Закэшированное количество строк перед замером
+    сбрасывается.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin',
+            email='admin@example.com',
+            password='password-123',
+            first_name='Админ',
+            last_name='Админов',
+        )
+        cls.tags = [
+            Tag.objects.create(name=f'Тэг {number}', slug=f'tag{number}')
+            for number in range(3)
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'продукт {number}', measurement_unit='г'
+            )
+            for number in range(5)
+        ]
+        cls.users = []
+        cls.add_rows(cls.users, 3)
+
+    @classmethod
+    def add_rows(cls, users, count):
+        """Добавляет count авторов с рецептами, подписками и списками."""
+        start = len(users)
+        for number in range(start, start + count):
+            author = User.objects.create_user(
+                username=f'author{number}',
+                email=f'author{number}@example.com',
+                password='password-123',
+                first_name='Имя',
+                last_name='Фамилия',
+            )
+            for previous in users:
+                Follow.objects.create(user=author, is_following=previous)
+            users.append(author)
+            for index in range(2):
+                recipe = Recipe.objects.create(
+                    name=f'Рецепт {number}-{index}',
+                    text='Текст',
+                    cooking_time=10,
+                    image='recipes/images/recipe.png',
+                    author=author,
+                )
+                recipe.tags.set(cls.tags)
+                Amount.objects.bulk_create(
+                    Amount(recipe=recipe, ingredient=ingredient, amount=1)
+                    for ingredient in cls.ingredients
+                )
+                FavoriteRecipe.objects.create(user=author, recipe=recipe)
+                ShoppingCart.objects.create(user=author, recipe=recipe)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        self.users = list(self.users)
+
+    def assert_changelist_queries(self, model, queries, query=''):
+        url = reverse(
+            f'admin:{model._meta.app_label}_{model._meta.model_name}'
+            '_changelist'
+        ) + query
+        if (
+            not query
+            and connection.vendor == 'postgresql'
+            and admin.site._registry[model].paginator
+            is EstimatedCountPaginator
+        ):
+            queries += 1
+        for rows in (0, 12):
+            self.add_rows(self.users, rows)
+            with self.subTest(users=len(self.users)):
+                cache.clear()
+                with self.assertNumQueries(queries):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+    def test_amount_changelist(self):
+        self.assert_changelist_queries(Amount, 4)
+
+    def test_ingredient_changelist(self):
+        self.assert_changelist_queries(Ingredient, 5)
+
+    def test_recipe_changelist(self):
+        self.assert_changelist_queries(Recipe, 5)
+
+    def test_recipe_changelist_filtered_by_tag(self):
+        self.assert_changelist_queries(
+            Recipe, 5, f'?tags__id__exact={self.tags[0].id}'
+        )
+
+    def test_recipe_favorites_count(self):
+        recipe = Recipe.objects.first()
+        FavoriteRecipe.objects.create(user=self.admin, recipe=recipe)
+        response = self.client.get(
+            reverse('admin:recipes_recipe_changelist'),
+            {'tags__id__exact': self.tags[0].id},
+        )
+        counts = {
+            obj.id: obj.favorites_count
+            for obj in response.context['cl'].result_list
+        }
+        self.assertEqual(counts.pop(recipe.id), 2)
+        self.assertEqual(set(counts.values()), {1})
+
+    def test_tag_changelist(self):
+        self.assert_changelist_queries(Tag, 5)
+
+    def test_user_changelist(self):
+        self.assert_changelist_queries(User, 5)
+
+    def test_follow_changelist(self):
+        self.assert_changelist_queries(Follow, 4)
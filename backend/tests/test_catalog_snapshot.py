@@ -0,0 +1,68 @@
+import tempfile
+from unittest import mock
+
+from django.apps import apps
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+
+from recipes import catalog
+from recipes.catalog import CatalogSnapshots
+from recipes.generation import (
+    CATALOG_GENERATION_KEY,
+    get_catalog_generation,
+    increment_generation,
+)
+from recipes.models import Tag
+
+
+class CatalogSnapshotTests(TestCase):
+    """Снимок справочников в каталоге CATALOG_SNAPSHOT_DIR."""
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(CATALOG_SNAPSHOT_DIR=directory.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        Tag.objects.create(name='Завтрак', slug='breakfast')
+
+    def get_slugs(self, snapshot):
+        return [row['slug'] for row in snapshot['tags'].build(('slug',))]
+
+    def test_snapshot_follows_generation(self):
+        snapshots = CatalogSnapshots()
+        snapshot = snapshots.get()
+        self.assertEqual(snapshot.generation, get_catalog_generation())
+        self.assertEqual(self.get_slugs(snapshot), ['breakfast'])
+        Tag.objects.create(name='Обед', slug='lunch')
+        increment_generation(CATALOG_GENERATION_KEY)
+        snapshot = snapshots.get()
+        self.assertEqual(snapshot.generation, get_catalog_generation())
+        self.assertEqual(self.get_slugs(snapshot), ['breakfast', 'lunch'])
+
+    def test_snapshot_written_while_waiting_for_lock_is_reused(self):
+        CatalogSnapshots().get()
+        open_snapshot = catalog.open_snapshot
+        calls = []
+
+        def open_stale_first(path):
+            # Первое чтение до блокировки видит старый файл, как если бы
+            # другой процесс перестроил снимок, пока этот ждал блокировку.
+            calls.append(path)
+            return None if len(calls) == 1 else open_snapshot(path)
+
+        with mock.patch.object(
+            catalog, 'open_snapshot', open_stale_first
+        ), mock.patch.object(catalog, 'write_snapshot') as write_snapshot:
+            snapshot = CatalogSnapshots().get()
+        write_snapshot.assert_not_called()
+        self.assertEqual(snapshot.generation, get_catalog_generation())
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }})
+    def test_local_cache_is_refused(self):
+        with self.assertRaises(ImproperlyConfigured):
+            apps.get_app_config('recipes').ready()
@@ -0,0 +1,97 @@
+import gzip
+from types import SimpleNamespace
+from unittest import mock, skipIf
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from api import middleware
+from api.middleware import CompressionMiddleware, choose_encoding
+from backend.constant import COMPRESS_MIN_SIZE
+
+CONTENT = b'{"name": "' + b'a' * COMPRESS_MIN_SIZE + b'"}'
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    """Сжатие ответов по Accept-Encoding."""
+
+    def setUp(self):
+        cache.clear()
+
+    def get_response(self, content=CONTENT, accept_encoding='gzip',
+                     action=None):
+        response = HttpResponse(content, content_type='application/json')
+        response.renderer_context = {'view': SimpleNamespace(
+            action=action, compressed_cache_actions=('list',)
+        )}
+        request = RequestFactory().get(
+            '/api/tags/', HTTP_ACCEPT_ENCODING=accept_encoding
+        )
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_encoding_negotiation(self):
+        for accept_encoding, expected in (
+            ('', None),
+            ('identity', None),
+            ('gzip;q=0', None),
+            ('deflate', None),
+            ('gzip', 'gzip'),
+            ('GZIP; q=0.5', 'gzip'),
+            ('br;q=0.5, gzip', 'gzip'),
+            ('br;q=abc, gzip;q=0.1', 'gzip'),
+        ):
+            with self.subTest(accept_encoding=accept_encoding):
+                self.assertEqual(choose_encoding(accept_encoding), expected)
+
+    @skipIf(middleware.brotli is None, 'brotli не установлен.')
+    def test_brotli_is_preferred(self):
+        for accept_encoding, expected in (
+            ('gzip, br', 'br'),
+            ('*', 'br'),
+            ('br;q=0.5, gzip;q=0.8', 'gzip'),
+            ('br, gzip;q=0', 'br'),
+        ):
+            with self.subTest(accept_encoding=accept_encoding):
+                self.assertEqual(choose_encoding(accept_encoding), expected)
+
+    def test_response_is_compressed(self):
+        response = self.get_response()
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(
+            response['Content-Length'], str(len(response.content))
+        )
+        self.assertEqual(gzip.decompress(response.content), CONTENT)
+
+    def test_uncompressed_response_varies_by_encoding(self):
+        for content, accept_encoding in (
+            (CONTENT, 'identity'),
+            (b'{}', 'gzip'),
+        ):
+            with self.subTest(accept_encoding=accept_encoding):
+                response = self.get_response(content, accept_encoding)
+                self.assertFalse(response.has_header('Content-Encoding'))
+                self.assertEqual(response['Vary'], 'Accept-Encoding')
+                self.assertEqual(response.content, content)
+
+    def test_small_response_is_not_compressed(self):
+        content = b'a' * (COMPRESS_MIN_SIZE - 1)
+        response = self.get_response(content)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, content)
+
+    def test_compressed_bytes_are_cached_by_content(self):
+        compress = mock.Mock(wraps=middleware.compress_gzip)
+        with mock.patch.dict(middleware.COMPRESSORS, {'gzip': compress}):
+            first = self.get_response(action='list')
+            second = self.get_response(action='list')
+            self.assertEqual(compress.call_count, 1)
+            self.assertEqual(first.content, second.content)
+            changed = self.get_response(CONTENT + b' ', action='list')
+            self.assertEqual(compress.call_count, 2)
+            self.assertEqual(
+                gzip.decompress(changed.content), CONTENT + b' '
+            )
+            self.get_response(action='retrieve')
+            self.assertEqual(compress.call_count, 3)
@@ -0,0 +1,110 @@
+import threading
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.serializers import CreateRecipeSerializer
+from recipes.counters import RecipeCounters, recipe_counters
+from recipes.models import Ingredient, Recipe, Tag
+
+User = get_user_model()
+
+
+class RecipeCountersTests(TestCase):
+    """Буфер счётчиков просмотров и переходов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.recipe = Recipe.objects.create(
+            name='Рецепт',
+            text='Текст',
+            cooking_time=10,
+            image='recipes/images/recipe.png',
+            author=User.objects.create_user(
+                username='author',
+                email='author@example.com',
+                password='password-123',
+                first_name='Имя',
+                last_name='Фамилия',
+            ),
+        )
+
+    @staticmethod
+    def patch_update(**kwargs):
+        vendor = connection.vendor
+        if vendor != 'postgresql':
+            vendor = 'generic'
+        return mock.patch(
+            f'recipes.counters.update_counters_{vendor}', **kwargs
+        )
+
+    def get_counts(self):
+        self.recipe.refresh_from_db()
+        return self.recipe.views_count, self.recipe.clicks_count
+
+    def test_failed_flush_keeps_increments(self):
+        counters = RecipeCounters(flush_interval=60)
+        self.addCleanup(lambda: counters.timer and counters.timer.cancel())
+        counters.increment('views_count', self.recipe.id)
+        counters.increment('clicks_count', self.recipe.id, 2)
+        with self.patch_update(side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                counters.flush()
+        counters.increment('views_count', self.recipe.id)
+        counters.flush()
+        self.assertEqual(self.get_counts(), (2, 2))
+
+    def test_idle_process_flushes_on_timer(self):
+        counters = RecipeCounters(flush_interval=0.01)
+        flushed = threading.Event()
+        rows = []
+
+        def update(batch):
+            rows.extend(batch)
+            flushed.set()
+
+        with self.patch_update(side_effect=update):
+            counters.increment('views_count', self.recipe.id)
+            self.assertTrue(flushed.wait(5))
+        self.assertEqual(rows, [(self.recipe.id, 1, 0)])
+
+    def test_stale_recipe_save_keeps_counts(self):
+        recipe = Recipe.objects.get(id=self.recipe.id)
+        Recipe.objects.filter(id=self.recipe.id).update(views_count=5)
+        recipe.name = 'Новое имя'
+        recipe.save()
+        self.assertEqual(self.get_counts(), (5, 0))
+        self.assertEqual(self.recipe.name, 'Новое имя')
+
+    @override_settings(REPLICA_DATABASES=[])
+    def test_flush_during_update_is_not_overwritten(self):
+        self.addCleanup(recipe_counters.flush)
+        client = APIClient()
+        client.force_authenticate(self.recipe.author)
+        url = f'/api/recipes/{self.recipe.id}/'
+        self.assertEqual(client.get(url).status_code, 200)
+        update = CreateRecipeSerializer.update
+
+        def flush_and_update(serializer, instance, validated_data):
+            # Рецепт уже загружен, а буфер записывает просмотр.
+            recipe_counters.flush()
+            return update(serializer, instance, validated_data)
+
+        with mock.patch.object(
+            CreateRecipeSerializer, 'update', flush_and_update
+        ):
+            response = client.patch(url, {
+                'name': 'Новое имя',
+                'tags': [Tag.objects.create(name='Ужин', slug='dinner').id],
+                'ingredients': [{
+                    'id': Ingredient.objects.create(
+                        name='Соль', measurement_unit='г'
+                    ).id,
+                    'amount': 5,
+                }],
+            }, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.get_counts(), (1, 0))
@@ -0,0 +1,191 @@
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+
+from jobs.models import Job
+from jobs.queue import get_task_name
+from recipes.deletion import (
+    cascade_delete,
+    delete_recipe,
+    purge_recipes,
+    purge_users,
+)
+from recipes.generation import get_user_generation
+from recipes.models import (
+    Amount,
+    FavoriteRecipe,
+    Ingredient,
+    Recipe,
+    ShoppingCart,
+    Tag,
+)
+from users.models import Follow
+
+User = get_user_model()
+
+IMAGE = 'recipes/images/recipe.png'
+
+
+def create_user(username):
+    return User.objects.create_user(
+        username=username,
+        email=f'{username}@example.com',
+        password='password-123',
+        first_name='Имя',
+        last_name='Фамилия',
+    )
+
+
+class DeletionTestMixin:
+    """Рецепт автора со всеми зависимыми строками."""
+
+    def create_data(self):
+        self.author = create_user('author')
+        self.reader = create_user('reader')
+        self.recipe = Recipe.objects.create(
+            name='Рецепт',
+            text='Текст',
+            cooking_time=10,
+            image=IMAGE,
+            author=self.author,
+        )
+        self.recipe.tags.add(Tag.objects.create(name='Ужин', slug='dinner'))
+        Amount.objects.create(
+            recipe=self.recipe,
+            ingredient=Ingredient.objects.create(
+                name='Соль', measurement_unit='г'
+            ),
+            amount=5,
+        )
+        FavoriteRecipe.objects.create(user=self.reader, recipe=self.recipe)
+        ShoppingCart.objects.create(user=self.reader, recipe=self.recipe)
+        Follow.objects.create(user=self.reader, is_following=self.author)
+        Follow.objects.create(user=self.author, is_following=self.reader)
+
+    def assertRecipeRowsDeleted(self):
+        self.assertFalse(Recipe.objects.exists())
+        self.assertFalse(Amount.objects.exists())
+        self.assertFalse(FavoriteRecipe.objects.exists())
+        self.assertFalse(ShoppingCart.objects.exists())
+        self.assertFalse(Recipe.tags.through.objects.exists())
+
+
+class DeletionTests(DeletionTestMixin, TestCase):
+    """Удаление рецептов и пользователей минуя сборщик каскада Django."""
+
+    def setUp(self):
+        self.create_data()
+
+    def test_delete_recipe_removes_dependents(self):
+        generation = get_user_generation(self.reader.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(delete_recipe(self.recipe))
+        self.assertRecipeRowsDeleted()
+        self.assertEqual(Follow.objects.count(), 2)
+        self.assertNotEqual(get_user_generation(self.reader.id), generation)
+
+    def test_purge_recipes_removes_dependents(self):
+        generation = get_user_generation(self.reader.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            purge_recipes([self.recipe.id], batch_size=1)
+        self.assertRecipeRowsDeleted()
+        self.assertNotEqual(get_user_generation(self.reader.id), generation)
+
+    def test_purge_users_removes_dependents(self):
+        generation = get_user_generation(self.reader.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            purge_users([self.author.id], batch_size=1)
+        self.assertRecipeRowsDeleted()
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(User.objects.filter(id=self.author.id).exists())
+        self.assertNotEqual(get_user_generation(self.reader.id), generation)
+
+    @mock.patch('recipes.deletion.BACKGROUND_DELETE_THRESHOLD', 1)
+    def test_popular_recipe_is_deleted_in_background(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertFalse(delete_recipe(self.recipe))
+        self.assertTrue(Recipe.objects.filter(id=self.recipe.id).exists())
+        job = Job.objects.get()
+        self.assertEqual(job.name, get_task_name(purge_recipes))
+        self.assertEqual(job.payload['args'], [[self.recipe.id]])
+
+    def assertImageRemovedAfterCommit(self, delete, *args):
+        with mock.patch('recipes.deletion.default_storage') as storage:
+            with self.captureOnCommitCallbacks() as callbacks:
+                delete(*args)
+            storage.purge.assert_not_called()
+            for callback in callbacks:
+                callback()
+        storage.purge.assert_called_once_with(IMAGE, min_age=mock.ANY)
+
+    def test_recipe_image_is_removed_after_commit(self):
+        self.assertImageRemovedAfterCommit(delete_recipe, self.recipe)
+
+    def test_user_recipe_images_are_removed_after_commit(self):
+        self.assertImageRemovedAfterCommit(purge_users, [self.author.id])
+
+
+@skipUnless(
+    connection.vendor == 'postgresql',
+    'ON DELETE CASCADE добавляется миграциями только в PostgreSQL.',
+)
+class CascadeDeleteTests(DeletionTestMixin, TransactionTestCase):
+    """Каскадное удаление средствами PostgreSQL и его миграции."""
+
+    # Внешние ключи, которым миграции добавляют каскад.
+    relations = (
+        (Recipe, 'author'),
+        (Recipe.tags.through, 'recipe'),
+        (Amount, 'recipe'),
+        (FavoriteRecipe, 'recipe'),
+        (FavoriteRecipe, 'user'),
+        (ShoppingCart, 'recipe'),
+        (ShoppingCart, 'user'),
+        (Follow, 'user'),
+        (Follow, 'is_following'),
+    )
+
+    def get_delete_actions(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT DISTINCT c.confdeltype FROM pg_constraint c '
+                'JOIN pg_attribute a ON a.attrelid = c.conrelid '
+                'AND a.attnum = ANY(c.conkey) '
+                "WHERE c.contype = 'f' AND c.conrelid = ANY(%s::regclass[]) "
+                'AND a.attname = ANY(%s)',
+                [
+                    [model._meta.db_table for model, _ in self.relations],
+                    [
+                        model._meta.get_field(field).column
+                        for model, field in self.relations
+                    ],
+                ],
+            )
+            return {action for action, in cursor.fetchall()}
+
+    def migrate(self, *targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(
+            list(targets) or executor.loader.graph.leaf_nodes()
+        )
+
+    def test_user_delete_cascades(self):
+        self.create_data()
+        self.assertTrue(cascade_delete(User.objects.filter(id=self.author.id)))
+        self.assertRecipeRowsDeleted()
+        self.assertFalse(Follow.objects.exists())
+        self.assertTrue(User.objects.filter(id=self.reader.id).exists())
+
+    def test_migrations_are_reversible(self):
+        self.assertEqual(self.get_delete_actions(), {'c'})
+        self.migrate(
+            ('recipes', '0008_auto_20261019_0859'),
+            ('users', '0003_auto_20250330_2001'),
+        )
+        self.assertEqual(self.get_delete_actions(), {'a'})
+        self.migrate()
+        self.assertEqual(self.get_delete_actions(), {'c'})
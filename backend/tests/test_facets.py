@@ -0,0 +1,116 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.facets import COOKING_TIME_BUCKETS, count_cooking_time
+from recipes.models import Recipe, Tag
+
+User = get_user_model()
+
+
+@override_settings(REPLICA_DATABASES=[])
+class FacetsTests(TestCase):
+    """Количество рецептов по тэгам и интервалам времени приготовления."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='author',
+            email='author@example.com',
+            password='password-123',
+            first_name='Имя',
+            last_name='Фамилия',
+        )
+        breakfast = Tag.objects.create(name='Завтрак', slug='breakfast')
+        dinner = Tag.objects.create(name='Ужин', slug='dinner')
+        # Время на границах интервалов и теги рецептов.
+        for cooking_time, tags in (
+            (1, (breakfast,)),
+            (14, (breakfast,)),
+            (15, (breakfast, dinner)),
+            (29, (dinner,)),
+            (30, (dinner,)),
+            (60, (breakfast,)),
+        ):
+            Recipe.objects.create(
+                name=f'Рецепт {cooking_time}',
+                text='Текст',
+                cooking_time=cooking_time,
+                image='recipes/images/recipe.png',
+                author=cls.user,
+            ).tags.set(tags)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_recipes(self, **params):
+        response = self.client.get('/api/recipes/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_buckets_match_cooking_time_filter(self):
+        buckets = self.get_recipes(facets='cooking_time')['facets'][
+            'cooking_time'
+        ]
+        self.assertEqual(
+            [(bucket['min'], bucket['max']) for bucket in buckets],
+            list(COOKING_TIME_BUCKETS),
+        )
+        self.assertEqual(
+            [bucket['count'] for bucket in buckets], [2, 2, 1, 1]
+        )
+        for bucket in buckets:
+            params = {'cooking_time_min': bucket['min']}
+            if bucket['max'] is not None:
+                params['cooking_time_max'] = bucket['max']
+            with self.subTest(**params):
+                self.assertEqual(
+                    self.get_recipes(**params)['count'], bucket['count']
+                )
+
+    def test_facet_ignores_own_parameters(self):
+        data = self.get_recipes(
+            tags='breakfast',
+            cooking_time_min=15,
+            facets='tags,cooking_time',
+        )
+        self.assertEqual(data['count'], 2)
+        self.assertEqual(
+            data['facets']['tags'], {'breakfast': 2, 'dinner': 3}
+        )
+        self.assertEqual(
+            [bucket['count'] for bucket in data['facets']['cooking_time']],
+            [2, 1, 0, 1],
+        )
+
+    def test_unknown_facet_is_rejected(self):
+        response = self.client.get(
+            '/api/recipes/', {'facets': 'tags,author'}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('facets', response.json())
+
+    def test_one_query_per_facet(self):
+        queries = []
+        for facets in ('', 'tags', 'tags,cooking_time'):
+            cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                self.get_recipes(facets=facets)
+            queries.append(len(context))
+        self.assertEqual(
+            [count - queries[0] for count in queries], [0, 1, 2]
+        )
+
+    def test_count_cooking_time_edges(self):
+        with self.assertNumQueries(1):
+            buckets = count_cooking_time(
+                Recipe.objects.filter(cooking_time__gte=14)
+            )
+        self.assertEqual(
+            [bucket['count'] for bucket in buckets], [1, 2, 1, 1]
+        )
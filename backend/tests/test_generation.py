@@ -0,0 +1,80 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from recipes.generation import get_recipes_generation
+from recipes.models import Recipe
+
+User = get_user_model()
+
+
+class RecipesGenerationTests(TestCase):
+    """Поколение рецептов меняется только при изменении их данных."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author',
+            email='author@example.com',
+            password='password-123',
+            first_name='Имя',
+            last_name='Фамилия',
+        )
+        cls.reader = User.objects.create_user(
+            username='reader',
+            email='reader@example.com',
+            password='password-123',
+            first_name='Имя',
+            last_name='Фамилия',
+        )
+        Recipe.objects.create(
+            name='Рецепт',
+            text='Текст',
+            cooking_time=10,
+            image='recipes/images/recipe.png',
+            author=cls.author,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def assertGenerationChanged(self, changed, save):
+        generation = get_recipes_generation()
+        with self.captureOnCommitCallbacks(execute=True):
+            save()
+        self.assertEqual(get_recipes_generation() != generation, changed)
+
+    def test_author_fields_change_generation(self):
+        for field, value in (
+            ('first_name', 'Другое'),
+            ('username', 'renamed'),
+            ('avatar', 'users/avatar.png'),
+        ):
+            with self.subTest(field=field):
+                author = User.objects.get(id=self.author.id)
+                setattr(author, field, value)
+                self.assertGenerationChanged(True, author.save)
+
+    def test_other_saves_keep_generation(self):
+        author = User.objects.get(id=self.author.id)
+        author.set_password('password-456')
+        self.assertGenerationChanged(False, author.save)
+        self.assertGenerationChanged(
+            False, lambda: author.save(update_fields=['last_login'])
+        )
+        reader = User.objects.get(id=self.reader.id)
+        reader.first_name = 'Другое'
+        self.assertGenerationChanged(False, reader.save)
+        self.assertGenerationChanged(False, lambda: User.objects.create_user(
+            username='new',
+            email='new@example.com',
+            password='password-123',
+            first_name='Имя',
+            last_name='Фамилия',
+        ))
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }})
+    def test_local_cache_has_no_generation(self):
+        self.assertIsNone(get_recipes_generation())
@@ -0,0 +1,57 @@
+import time
+from unittest import mock
+
+from django.test import TransactionTestCase
+
+from jobs.models import Job
+from jobs.queue import LOST_JOB_ERROR, claim_jobs, enqueue, run_job, task
+
+# Результаты захвата задачи другим обработчиком во время выполнения.
+claimed_while_running = []
+
+
+@task
+def slow_task(duration):
+    """Работает дольше таймаута захвата и пытается перехватить себя."""
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        claimed_while_running.extend(claim_jobs(1, 'other'))
+        time.sleep(0.02)
+
+
+class JobHeartbeatTests(TransactionTestCase):
+    """Захват долгих задач продлевается, пока они выполняются."""
+
+    def setUp(self):
+        claimed_while_running.clear()
+
+    @mock.patch('jobs.queue.JOB_LOCK_TIMEOUT', 0.1)
+    @mock.patch('jobs.queue.JOB_HEARTBEAT_INTERVAL', 0.02)
+    def test_long_job_is_not_reclaimed(self):
+        job = enqueue(slow_task, [0.5])
+        self.assertEqual(claim_jobs(1, 'worker'), [job.id])
+        run_job(job.id)
+        self.assertEqual(claimed_while_running, [])
+        self.assertFalse(Job.objects.filter(id=job.id).exists())
+
+    @mock.patch('jobs.queue.JOB_LOCK_TIMEOUT', 0.1)
+    @mock.patch('jobs.queue.JOB_HEARTBEAT_INTERVAL', 60)
+    def test_job_without_heartbeat_is_reclaimed(self):
+        job = enqueue(slow_task, [0.5])
+        self.assertEqual(claim_jobs(1, 'worker'), [job.id])
+        run_job(job.id)
+        self.assertIn(job.id, claimed_while_running)
+
+    @mock.patch('jobs.queue.JOB_LOCK_TIMEOUT', 0.1)
+    def test_lost_job_without_attempts_left_is_dead(self):
+        job = enqueue(slow_task, [0], max_attempts=2)
+        retried = enqueue(slow_task, [0], max_attempts=2)
+        Job.objects.filter(id=job.id).update(attempts=1)
+        self.assertEqual(claim_jobs(2, 'worker'), [job.id, retried.id])
+        # Обработчик, захвативший задачи, упал, не вызвав fail_job:
+        # у первой задачи это была последняя попытка.
+        time.sleep(0.2)
+        self.assertEqual(claim_jobs(2, 'other'), [retried.id])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.DEAD)
+        self.assertEqual(job.last_error, LOST_JOB_ERROR)
@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from recipes.counters import recipe_counters
+from recipes.generation import RECIPES_GENERATION_KEY, increment_generation
+from recipes.links import recipe_exists, recipe_exists_lru
+from recipes.models import Recipe
+
+User = get_user_model()
+
+
+class RecipeLinkTests(TestCase):
+    """Короткие ссылки и кэш наличия рецептов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.recipe = Recipe.objects.create(
+            name='Рецепт',
+            text='Текст',
+            cooking_time=10,
+            image='recipes/images/recipe.png',
+            author=User.objects.create_user(
+                username='author',
+                email='author@example.com',
+                password='password-123',
+                first_name='Имя',
+                last_name='Фамилия',
+            ),
+        )
+
+    def setUp(self):
+        cache.clear()
+        recipe_exists_lru.items.clear()
+
+    def test_get_link(self):
+        response = APIClient().get(f'/api/recipes/{self.recipe.id}/get-link/')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(response.json()['short-link'])
+        self.assertRedirects(
+            response,
+            f'/recipes/{self.recipe.id}/',
+            fetch_redirect_response=False,
+        )
+        recipe_counters.flush()
+        self.assertEqual(
+            Recipe.objects.get(id=self.recipe.id).clicks_count, 1
+        )
+
+    def test_get_link_rejects_invalid_id(self):
+        for pk in ('²', '٣', str(2 ** 64), '0'):
+            with self.subTest(pk=pk):
+                response = APIClient().get(f'/api/recipes/{pk}/get-link/')
+                self.assertEqual(response.status_code, 404)
+
+    def test_deletion_in_other_process_is_not_cached(self):
+        self.assertTrue(recipe_exists(self.recipe.id))
+        # Удаление без сигналов, как каскад в базе или удаление
+        # в другом процессе, которое меняет только поколение рецептов.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {Recipe._meta.db_table} WHERE id = %s',
+                [self.recipe.id],
+            )
+        increment_generation(RECIPES_GENERATION_KEY)
+        self.assertFalse(recipe_exists(self.recipe.id))
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }})
+    def test_local_cache_is_not_used(self):
+        self.assertTrue(recipe_exists(self.recipe.id))
+        self.assertEqual(recipe_exists_lru.items, {})
+        Recipe.objects.filter(id=self.recipe.id).delete()
+        with self.assertNumQueries(1):
+            self.assertFalse(recipe_exists(self.recipe.id))
@@ -0,0 +1,109 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.shedding import (
+    PRIORITY_CRITICAL,
+    PRIORITY_LOW,
+    PRIORITY_NORMAL,
+    get_load_priority,
+    get_queue_time,
+)
+from api.views import FoodgramUserViewSet
+
+User = get_user_model()
+
+
+class LoadPriorityTests(TestCase):
+    """Приоритет запросов и время ожидания в очереди прокси."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.token = Token.objects.create(user=User.objects.create_user(
+            username='user',
+            email='user@example.com',
+            password='password-123',
+            first_name='Имя',
+            last_name='Фамилия',
+        ))
+
+    def setUp(self):
+        cache.clear()
+
+    def get_priority(self, method, token=None):
+        headers = {}
+        if token is not None:
+            headers['HTTP_AUTHORIZATION'] = f'Token {token}'
+        request = RequestFactory().generic(method, '/api/users/', **headers)
+        return get_load_priority(request, FoodgramUserViewSet, None)
+
+    def test_unknown_token_does_not_raise_priority(self):
+        self.assertEqual(self.get_priority('GET', 'bogus'), PRIORITY_LOW)
+        self.assertEqual(self.get_priority('POST', 'bogus'), PRIORITY_NORMAL)
+        self.assertEqual(
+            self.get_priority('GET', self.token.key), PRIORITY_LOW
+        )
+
+    def test_cached_token_raises_priority(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.assertEqual(client.get('/api/users/me/').status_code, 200)
+        self.assertEqual(
+            self.get_priority('GET', self.token.key), PRIORITY_NORMAL
+        )
+        self.assertEqual(
+            self.get_priority('POST', self.token.key), PRIORITY_CRITICAL
+        )
+
+    def test_queue_time_outliers_are_ignored(self):
+        now = time.time()
+        for started, expected in (
+            (f't={now - 0.5:.3f}', True),
+            (str(int((now - 0.5) * 1000)), True),
+            (f't={now + 60:.3f}', False),
+            (f't={now - 60:.3f}', False),
+            ('t=abc', False),
+        ):
+            with self.subTest(started=started):
+                request = RequestFactory().get(
+                    '/api/users/', HTTP_X_REQUEST_START=started
+                )
+                queue_time = get_queue_time(request)
+                self.assertEqual(queue_time is not None, expected)
+                if expected:
+                    self.assertAlmostEqual(queue_time, 500, delta=100)
+
+
+@override_settings(
+    LOAD_SHEDDING=True,
+    LOAD_SHEDDING_QUEUE_TARGET=200,
+    LOAD_SHEDDING_MAX_IN_FLIGHT=0,
+    REPLICA_DATABASES=[],
+)
+class LoadSheddingMiddlewareTests(TestCase):
+    """Отбрасывание запросов по времени ожидания в очереди прокси."""
+
+    def setUp(self):
+        # Клиент держит один экземпляр middleware со сглаженным
+        # временем очереди на все запросы теста.
+        self.client = APIClient()
+
+    def get_status(self, queue_time, **headers):
+        started = time.time() - queue_time / 1000
+        return self.client.get(
+            '/api/tags/', HTTP_X_REQUEST_START=f't={started:.3f}', **headers
+        ).status_code
+
+    def test_low_priority_is_shed_under_overload(self):
+        for _ in range(10):
+            self.get_status(2000)
+        self.assertEqual(self.get_status(2000), 503)
+
+    def test_forged_queue_time_is_ignored(self):
+        for _ in range(10):
+            self.assertEqual(self.get_status(-10 ** 9), 200)
+            self.assertEqual(self.get_status(10 ** 9), 200)
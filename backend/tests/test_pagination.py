@@ -0,0 +1,53 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from backend import pagination
+from recipes.models import Tag
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    """Подсчёт строк пагинатором больших выборок."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Tag.objects.bulk_create(
+            Tag(name=f'Тэг {number}', slug=f'tag{number}')
+            for number in range(5)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def get_count(self, queryset):
+        paginator = pagination.EstimatedCountPaginator(queryset, 2)
+        return paginator.count, paginator.count_is_approximate
+
+    @mock.patch.object(pagination, 'ESTIMATED_COUNT_THRESHOLD', 4)
+    def test_small_filtered_selection_is_counted_exactly(self):
+        queryset = Tag.objects.filter(slug__in=['tag0', 'tag1', 'tag2'])
+        self.assertEqual(self.get_count(queryset), (3, False))
+        Tag.objects.filter(slug='tag0').delete()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_count(queryset), (3, True))
+        cache.clear()
+        self.assertEqual(self.get_count(queryset), (2, False))
+
+    @mock.patch.object(pagination, 'ESTIMATED_COUNT_THRESHOLD', 4)
+    def test_large_filtered_selection_count_is_cached(self):
+        queryset = Tag.objects.filter(name__startswith='Тэг')
+        self.assertEqual(self.get_count(queryset), (5, False))
+        Tag.objects.create(name='Тэг 5', slug='tag5')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_count(queryset), (5, True))
+
+    def test_only_whole_tables_are_estimated(self):
+        self.assertTrue(pagination.is_whole_table(Tag.objects.all()))
+        for queryset in (
+            Tag.objects.filter(name__startswith='Тэг'),
+            Tag.objects.filter(recipes__isnull=False),
+            Tag.objects.distinct(),
+        ):
+            with self.subTest(query=str(queryset.query)):
+                self.assertFalse(pagination.is_whole_table(queryset))
@@ -0,0 +1,189 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from api.paginators import LimitPaginator
+from api.serializers import (
+    FollowSerializer,
+    IngredientSerializer,
+    RecipeSerializer,
+)
+from recipes.models import (
+    Amount,
+    FavoriteRecipe,
+    Ingredient,
+    Recipe,
+    ShoppingCart,
+    Tag,
+)
+from users.models import Follow
+
+User = get_user_model()
+
+
+class ProjectionContractTests(TestCase):
+    """
+    Быстрые пути списков отдают те же байты, что и сериализаторы.
+
+    Ответы RecipeViewSet.list, IngredientViewSet.list и subscriptions
+    сравниваются с данными прежних сериализаторов, отрендеренными
+    стандартным JSONRenderer DRF.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(
+            username='reader',
+            email='reader@example.com',
+            password='password-123',
+            first_name='Читатель',
+            last_name='Первый',
+        )
+        authors = [
+            User.objects.create_user(
+                username=f'author{number}',
+                email=f'author{number}@example.com',
+                password='password-123',
+                first_name=f'Автор «{number}»',
+                last_name='Ёлкин',
+                avatar='users/avatar.png' if number % 2 else '',
+            )
+            for number in range(3)
+        ]
+        tags = [
+            Tag.objects.create(name=name, slug=slug)
+            for name, slug in (('Завтрак', 'breakfast'), ('Обед', 'lunch'))
+        ]
+        ingredients = [
+            Ingredient.objects.create(
+                name=f'продукт {number}', measurement_unit='г'
+            )
+            for number in range(4)
+        ]
+        # У последнего автора рецептов нет.
+        for number in range(7):
+            recipe = Recipe.objects.create(
+                name=f'Рецепт {number}',
+                text='Строка\nс "кавычками" и   разделителем',
+                cooking_time=number + 1,
+                image=f'recipes/images/{number}.png',
+                author=authors[number % 2],
+            )
+            recipe.tags.set(tags[:number % 2 + 1])
+            for ingredient in ingredients[number % 3:]:
+                Amount.objects.create(
+                    recipe=recipe, ingredient=ingredient, amount=number + 1
+                )
+            if number % 2:
+                FavoriteRecipe.objects.create(user=cls.reader, recipe=recipe)
+            if number % 3:
+                ShoppingCart.objects.create(user=cls.reader, recipe=recipe)
+        for author in authors:
+            Follow.objects.create(user=cls.reader, is_following=author)
+        cls.token = Token.objects.create(user=cls.reader)
+
+    def setUp(self):
+        cache.clear()
+
+    def get_content(self, path, user=None):
+        client = APIClient()
+        if user is not None:
+            client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+        response = client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return response.content
+
+    @staticmethod
+    def render(path, user, build):
+        request = Request(APIRequestFactory().get(path))
+        request.user = user or AnonymousUser()
+        return JSONRenderer().render(build(request))
+
+    def paginate(self, queryset, serializer_class):
+        def build(request):
+            paginator = LimitPaginator()
+            page = paginator.paginate_queryset(queryset, request)
+            return paginator.get_paginated_response(serializer_class(
+                page, many=True, context={'request': request}
+            ).data).data
+        return build
+
+    def test_recipe_list(self):
+        for path in (
+            '/api/recipes/',
+            '/api/recipes/?limit=3',
+            '/api/recipes/?limit=3&page=2',
+        ):
+            for user in (None, self.reader):
+                with self.subTest(path=path, user=user):
+                    self.assertEqual(
+                        self.get_content(path, user),
+                        self.render(path, user, self.paginate(
+                            Recipe.objects.all(), RecipeSerializer
+                        )),
+                    )
+
+    def test_ingredient_list(self):
+        for path, name in (
+            ('/api/ingredients/', ''),
+            ('/api/ingredients/?name=2', '2'),
+        ):
+            with self.subTest(path=path):
+                self.assertEqual(
+                    self.get_content(path),
+                    self.render(path, None, lambda request: (
+                        IngredientSerializer(
+                            Ingredient.objects.filter(name__icontains=name),
+                            many=True,
+                        ).data
+                    )),
+                )
+
+    def test_subscriptions(self):
+        for path in (
+            '/api/users/subscriptions/',
+            '/api/users/subscriptions/?recipes_limit=0',
+            '/api/users/subscriptions/?recipes_limit=2',
+            '/api/users/subscriptions/?recipes_limit=100',
+            '/api/users/subscriptions/?limit=2&recipes_limit=1',
+        ):
+            with self.subTest(path=path):
+                self.assertEqual(
+                    self.get_content(path, self.reader),
+                    self.render(path, self.reader, self.paginate(
+                        User.objects.filter(is_following__user=self.reader),
+                        FollowSerializer,
+                    )),
+                )
+
+    def test_subscriptions_accept_huge_recipes_limit(self):
+        for value, equivalent in (
+            ('9' * 30, '100'),
+            (str(2 ** 63), '100'),
+            ('0' * 30 + '2', '2'),
+        ):
+            with self.subTest(value=value):
+                content = []
+                for limit in (value, equivalent):
+                    # Количество подписок не берётся из кэша.
+                    cache.clear()
+                    content.append(self.get_content(
+                        f'/api/users/subscriptions/?recipes_limit={limit}',
+                        self.reader,
+                    ))
+                self.assertEqual(*content)
+
+    def test_subscriptions_reject_invalid_recipes_limit(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+        for value in ('-1', 'abc', '²'):
+            with self.subTest(value=value):
+                response = client.get(
+                    '/api/users/subscriptions/', {'recipes_limit': value}
+                )
+                self.assertEqual(response.status_code, 400)
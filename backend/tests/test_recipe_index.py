@@ -0,0 +1,127 @@
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from api.recipe_index import RecipeIndex
+from recipes.models import Recipe, Tag
+
+User = get_user_model()
+
+
+@override_settings(REPLICA_DATABASES=[])
+class RecipeIndexLogTests(TransactionTestCase):
+    """
+    Индекс рецептов догоняет изменения других процессов по журналу.
+
+    Изменения других процессов не отмечают рецепты сигналами, поэтому
+    после каждого изменения отметки текущего процесса сбрасываются.
+    """
+
+    def setUp(self):
+        author = User.objects.create_user(
+            username='author',
+            email='author@example.com',
+            password='password-123',
+            first_name='Имя',
+            last_name='Фамилия',
+        )
+        self.recipes = [
+            Recipe.objects.create(
+                name=f'Рецепт {number}',
+                text='Текст',
+                cooking_time=10,
+                image='recipes/images/recipe.png',
+                author=author,
+            )
+            for number in range(2)
+        ]
+        self.tag = Tag.objects.create(name='Завтрак', slug='breakfast')
+        self.index = RecipeIndex()
+        self.index.search()
+
+    def get_tagged_ids(self):
+        self.index.pending.clear()
+        bitmap = self.index.search(tag_ids=[self.tag.id])
+        return sorted(self.index.get_page_ids(bitmap, 0, 10))
+
+    def test_tag_change_is_read_from_log(self):
+        self.recipes[0].tags.add(self.tag)
+        self.assertEqual(self.get_tagged_ids(), [self.recipes[0].id])
+        self.tag.recipes.remove(self.recipes[0])
+        self.assertEqual(self.get_tagged_ids(), [])
+
+    @skipUnless(
+        connection.vendor == 'postgresql',
+        'Порядок фиксации отличается от порядка записей только '
+        'в PostgreSQL.',
+    )
+    def test_transaction_committed_later_is_not_skipped(self):
+        other = connections.create_connection(DEFAULT_DB_ALIAS)
+        self.addCleanup(other.close)
+        other.set_autocommit(False)
+        with other.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {Recipe.tags.through._meta.db_table} '
+                '(recipe_id, tag_id) VALUES (%s, %s)',
+                [self.recipes[0].id, self.tag.id],
+            )
+        # Изменение зафиксировано, но его запись журнала новее записи
+        # незавершённой транзакции и ждёт её завершения.
+        self.recipes[1].tags.add(self.tag)
+        self.assertEqual(self.get_tagged_ids(), [])
+        other.commit()
+        self.assertEqual(
+            self.get_tagged_ids(), [recipe.id for recipe in self.recipes]
+        )
+
+
+@override_settings(RECIPE_INDEX=True)
+class RecipeIndexMarkTests(TestCase):
+    """Изменение тэгов отмечает рецепты для обновления индекса."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(
+            username='author',
+            email='author@example.com',
+            password='password-123',
+            first_name='Имя',
+            last_name='Фамилия',
+        )
+        cls.recipes = [
+            Recipe.objects.create(
+                name=f'Рецепт {number}',
+                text='Текст',
+                cooking_time=10,
+                image='recipes/images/recipe.png',
+                author=author,
+            )
+            for number in range(2)
+        ]
+        cls.tag = Tag.objects.create(name='Завтрак', slug='breakfast')
+
+    def get_marked_ids(self, change):
+        with mock.patch('api.signals.recipe_index') as index:
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+        return sorted({
+            recipe_id
+            for call in index.mark.call_args_list
+            for recipe_id in call.args[0]
+        })
+
+    def test_tag_changes_mark_recipes(self):
+        first, second = self.recipes
+        for change, expected in (
+            (lambda: first.tags.add(self.tag), [first.id]),
+            (lambda: self.tag.recipes.add(second), [second.id]),
+            (lambda: self.tag.recipes.remove(second), [second.id]),
+            (lambda: self.tag.recipes.set([first, second]), [second.id]),
+            (lambda: self.tag.recipes.clear(), [first.id, second.id]),
+            (lambda: first.tags.set([self.tag]), [first.id]),
+            (lambda: first.tags.clear(), [first.id]),
+        ):
+            with self.subTest(expected=expected):
+                self.assertEqual(self.get_marked_ids(change), expected)
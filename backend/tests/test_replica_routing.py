@@ -0,0 +1,112 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.test import TransactionTestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from backend.routers import (
+    ReplicaRouter,
+    primary_written,
+    replica_reads_allowed,
+)
+from recipes.models import Recipe, Tag
+
+User = get_user_model()
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    Чтение с реплики и закрепление клиента за основной базой.
+
+    Роль реплики играет вторая база SQLite. В ней есть только таблица
+    тэгов со своим содержимым, поэтому по ответу /api/tags/ видно,
+    из какой базы он прочитан. TestCase не подходит: он держит
+    транзакцию, а внутри неё роутер всегда читает из основной базы.
+    """
+
+    databases = {'default', 'replica_1'}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with connections['replica_1'].schema_editor() as editor:
+            editor.create_model(Tag)
+
+    @classmethod
+    def tearDownClass(cls):
+        with connections['replica_1'].schema_editor() as editor:
+            editor.delete_model(Tag)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        Tag.objects.using('default').create(name='Основная', slug='primary')
+        # bulk_create не отправляет сигналы, которые писали бы журнал
+        # изменений, отсутствующий в реплике.
+        Tag.objects.using('replica_1').bulk_create(
+            [Tag(name='Реплика', slug='replica')]
+        )
+        self.user = User.objects.create_user(
+            username='author',
+            email='author@example.com',
+            password='password-123',
+            first_name='Имя',
+            last_name='Фамилия',
+        )
+        self.recipe = Recipe.objects.create(
+            name='Рецепт',
+            text='Текст',
+            cooking_time=10,
+            image='recipes/images/recipe.png',
+            author=self.user,
+        )
+        self.client = APIClient()
+        self.author_client = APIClient()
+        self.author_client.credentials(
+            HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user)}'
+        )
+
+    def tearDown(self):
+        with connections['replica_1'].cursor() as cursor:
+            cursor.execute(f'DELETE FROM {Tag._meta.db_table}')
+
+    def get_tag_slugs(self, client):
+        response = client.get('/api/tags/')
+        self.assertEqual(response.status_code, 200)
+        return [tag['slug'] for tag in response.json()]
+
+    def test_anonymous_reads_go_to_replica(self):
+        self.assertEqual(self.get_tag_slugs(self.client), ['replica'])
+
+    def test_writer_is_pinned_to_primary(self):
+        response = self.author_client.post(
+            f'/api/recipes/{self.recipe.id}/favorite/'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.get_tag_slugs(self.author_client), ['primary'])
+        self.assertEqual(self.get_tag_slugs(self.client), ['replica'])
+
+    def test_anonymous_write_does_not_pin_anonymous_readers(self):
+        response = self.client.post('/api/users/', {
+            'username': 'reader',
+            'email': 'reader@example.com',
+            'password': 'password-123',
+            'first_name': 'Имя',
+            'last_name': 'Фамилия',
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.get_tag_slugs(self.client), ['replica'])
+
+    def test_writes_and_transactions_use_primary(self):
+        router = ReplicaRouter()
+        token = replica_reads_allowed.set(True)
+        written_token = primary_written.set(False)
+        try:
+            self.assertEqual(router.db_for_read(Tag), 'replica_1')
+            with transaction.atomic():
+                self.assertEqual(router.db_for_read(Tag), 'default')
+            self.assertEqual(router.db_for_write(Tag), 'default')
+        finally:
+            replica_reads_allowed.reset(token)
+            primary_written.reset(written_token)
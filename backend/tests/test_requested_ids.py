@@ -0,0 +1,34 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+User = get_user_model()
+
+
+class RequestedIdsTests(TestCase):
+    """Выборка объектов по параметру ids."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='author',
+            email='author@example.com',
+            password='password-123',
+            first_name='Имя',
+            last_name='Фамилия',
+        )
+
+    def test_invalid_ids_are_rejected(self):
+        client = APIClient()
+        for path in ('/api/users/', '/api/recipes/'):
+            for ids in ('²', f'{self.user.id},٣', '-1', 'a', '9' * 5000):
+                with self.subTest(path=path, ids=ids[:10]):
+                    response = client.get(path, {'ids': ids})
+                    self.assertEqual(response.status_code, 400)
+
+    def test_missing_ids_are_reported(self):
+        response = APIClient().get(
+            '/api/users/', {'ids': f'{self.user.id},{2 ** 63 - 1}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['missing'], [2 ** 63 - 1])
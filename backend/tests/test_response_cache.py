@@ -0,0 +1,54 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api import caching
+from api.caching import get_response_cache_key
+from recipes.generation import get_recipes_generation
+
+
+@override_settings(REPLICA_DATABASES=[])
+class AnonymousResponseCacheTests(TestCase):
+    """Ответ анонимам собирает только один процесс."""
+
+    def setUp(self):
+        cache.clear()
+        self.keys = []
+
+    def lock_key(self, request, *args, **kwargs):
+        """Возвращает ключ ответа, заняв его, как другой процесс."""
+        key = get_response_cache_key(request, *args, **kwargs)
+        cache.add(f'{key}:lock', True, 30)
+        self.keys.append(key)
+        return key
+
+    def publish_entry(self, interval):
+        """Сохраняет ответ, как процесс, державший блокировку."""
+        cache.set(self.keys[0], {
+            'generation': get_recipes_generation(),
+            'content': b'{"cached": true}',
+            'content_type': 'application/json',
+        })
+
+    def test_concurrent_miss_waits_for_entry(self):
+        with mock.patch.object(
+            caching, 'get_response_cache_key', self.lock_key
+        ), mock.patch.object(
+            caching.time, 'sleep', side_effect=self.publish_entry
+        ) as sleep, self.assertNumQueries(0):
+            response = APIClient().get('/api/recipes/')
+        self.assertEqual(response.content, b'{"cached": true}')
+        sleep.assert_called_once()
+
+    def test_miss_is_built_after_lock_is_released(self):
+        def release(interval):
+            cache.delete(f'{self.keys[0]}:lock')
+
+        with mock.patch.object(
+            caching, 'get_response_cache_key', self.lock_key
+        ), mock.patch.object(caching.time, 'sleep', side_effect=release):
+            response = APIClient().get('/api/recipes/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 0)
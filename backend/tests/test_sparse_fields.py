@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.counters import recipe_counters
+from recipes.models import Recipe
+
+User = get_user_model()
+
+
+class SparseFieldsTests(TestCase):
+    """Выбор полей ответа параметрами fields и omit."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='author',
+            email='author@example.com',
+            password='password-123',
+            first_name='Имя',
+            last_name='Фамилия',
+        )
+        cls.recipe = Recipe.objects.create(
+            name='Рецепт',
+            text='Текст',
+            cooking_time=10,
+            image='recipes/images/recipe.png',
+            author=cls.user,
+        )
+
+    def setUp(self):
+        # Просмотры рецепта записываются в базу до конца теста.
+        self.addCleanup(recipe_counters.flush)
+
+    def test_selected_fields(self):
+        client = APIClient()
+        for path, get_item in (
+            ('/api/recipes/', lambda data: data['results'][0]),
+            (f'/api/recipes/{self.recipe.id}/', lambda data: data),
+            ('/api/users/', lambda data: data['results'][0]),
+            (f'/api/users/{self.user.id}/', lambda data: data),
+        ):
+            with self.subTest(path=path):
+                response = client.get(path, {'fields': 'id'})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(list(get_item(response.json())), ['id'])
+
+    def test_empty_selection_is_rejected(self):
+        client = APIClient()
+        for path in (
+            '/api/recipes/',
+            f'/api/recipes/{self.recipe.id}/',
+            '/api/users/',
+            f'/api/users/{self.user.id}/',
+        ):
+            for params in (
+                {'fields': ''},
+                {'fields': ' , '},
+                {'fields': 'id', 'omit': 'id'},
+            ):
+                with self.subTest(path=path, params=params):
+                    response = client.get(path, params)
+                    self.assertEqual(response.status_code, 400)
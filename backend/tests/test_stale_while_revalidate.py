@@ -0,0 +1,127 @@
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api import caching
+from recipes.models import Amount, Ingredient, Recipe
+
+User = get_user_model()
+
+
+class RecordedThread(threading.Thread):
+    """Поток, запоминающий себя, чтобы тест мог дождаться его."""
+
+    started = []
+
+    def start(self):
+        self.started.append(self)
+        super().start()
+
+
+@override_settings(REPLICA_DATABASES=[])
+class StaleWhileRevalidateTests(TransactionTestCase):
+    """
+    Кэш списка покупок и подписок с фоновым обновлением.
+
+    TestCase не подходит: фоновый поток работает в своём соединении
+    и не видит данных незафиксированной транзакции теста.
+    """
+
+    def setUp(self):
+        cache.clear()
+        RecordedThread.started.clear()
+        self.user = User.objects.create_user(
+            username='cook',
+            email='cook@example.com',
+            password='password-123',
+            first_name='Имя',
+            last_name='Фамилия',
+        )
+        self.recipes = []
+        for number in range(2):
+            recipe = Recipe.objects.create(
+                name=f'Рецепт {number}',
+                text='Текст',
+                cooking_time=10,
+                image='recipes/images/recipe.png',
+                author=self.user,
+            )
+            Amount.objects.create(
+                recipe=recipe,
+                ingredient=Ingredient.objects.create(
+                    name=f'продукт {number}', measurement_unit='г'
+                ),
+                amount=number + 1,
+            )
+            self.recipes.append(recipe)
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user)}'
+        )
+
+    def get_shopping_list(self):
+        response = self.client.get('/api/recipes/download_shopping_cart/')
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def add_to_cart(self, recipe):
+        response = self.client.post(f'/api/recipes/{recipe.id}/shopping_cart/')
+        self.assertEqual(response.status_code, 201)
+
+    def test_own_cart_change_is_visible_at_once(self):
+        self.add_to_cart(self.recipes[0])
+        self.assertEqual(self.get_shopping_list(), 'продукт 0 (г) — 1')
+        self.add_to_cart(self.recipes[1])
+        self.assertEqual(
+            self.get_shopping_list(), 'продукт 0 (г) — 1\nпродукт 1 (г) — 2'
+        )
+
+    def get_stale_then_refreshed(self, get):
+        """Возвращает устаревший ответ и ответ после фонового обновления."""
+        with mock.patch.object(time, 'time', return_value=time.time() + 10):
+            with mock.patch.object(
+                caching.threading, 'Thread', RecordedThread
+            ):
+                stale = get()
+            self.assertEqual(len(RecordedThread.started), 1)
+            RecordedThread.started[0].join()
+            return stale, get()
+
+    def test_stale_response_is_refreshed_in_background(self):
+        self.add_to_cart(self.recipes[0])
+        self.get_shopping_list()
+        # Изменение без сигналов, как правка рецепта другим
+        # пользователем, поколение корзины не меняет.
+        Amount.objects.filter(recipe=self.recipes[0]).update(amount=5)
+        self.assertEqual(
+            self.get_stale_then_refreshed(self.get_shopping_list),
+            ('продукт 0 (г) — 1', 'продукт 0 (г) — 5'),
+        )
+
+    def test_paginated_response_is_refreshed_in_background(self):
+        author = User.objects.create_user(
+            username='author',
+            email='author@example.com',
+            password='password-123',
+            first_name='Имя',
+            last_name='Фамилия',
+        )
+        response = self.client.post(f'/api/users/{author.id}/subscribe/')
+        self.assertEqual(response.status_code, 201)
+
+        def get_names():
+            response = self.client.get('/api/users/subscriptions/?limit=1')
+            self.assertEqual(response.status_code, 200)
+            return [user['first_name'] for user in response.json()['results']]
+
+        get_names()
+        User.objects.filter(id=author.id).update(first_name='Другое')
+        self.assertEqual(
+            self.get_stale_then_refreshed(get_names), (['Имя'], ['Другое'])
+        )
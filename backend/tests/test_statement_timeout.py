@@ -0,0 +1,60 @@
+from unittest import skipUnless
+
+from django.db import OperationalError, connection, transaction
+from django.test import TransactionTestCase
+
+from api.deadlines import is_query_canceled
+from backend.db import statement_timeout
+
+
+@skipUnless(
+    connection.vendor == 'postgresql',
+    'statement_timeout есть только в PostgreSQL.',
+)
+class StatementTimeoutTests(TransactionTestCase):
+    """
+    Предел времени запросов в блоке statement_timeout.
+
+    TestCase не подходит: его транзакция никогда не фиксируется,
+    а проверяется в том числе SET, выполненный в транзакции, которая
+    затем откатывается.
+    """
+
+    def get_timeout(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SHOW statement_timeout')
+            return cursor.fetchone()[0]
+
+    def rolled_back(self):
+        """Выполняет запрос в транзакции, которая затем откатывается."""
+        try:
+            with transaction.atomic():
+                self.get_timeout()
+                raise ValueError
+        except ValueError:
+            pass
+
+    def test_long_query_is_canceled(self):
+        with statement_timeout(50):
+            with self.assertRaises(OperationalError) as raised:
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT pg_sleep(1)')
+        self.assertTrue(is_query_canceled(raised.exception))
+        self.assertEqual(self.get_timeout(), '0')
+
+    def test_rolled_back_transaction_keeps_timeout(self):
+        with statement_timeout(50):
+            self.rolled_back()
+            self.assertEqual(self.get_timeout(), '50ms')
+            with self.assertRaises(OperationalError):
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT pg_sleep(1)')
+        self.assertEqual(self.get_timeout(), '0')
+
+    def test_committed_transaction_keeps_timeout(self):
+        with statement_timeout(50):
+            with transaction.atomic():
+                self.get_timeout()
+            with self.assertNumQueries(1):
+                self.assertEqual(self.get_timeout(), '50ms')
+        self.assertEqual(self.get_timeout(), '0')
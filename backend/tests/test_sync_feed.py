@@ -0,0 +1,166 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test import TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe, Tag
+from sync.models import ChangeLog
+
+User = get_user_model()
+
+
+@override_settings(REPLICA_DATABASES=[])
+class SyncTestCase(TransactionTestCase):
+    """
+    Чтение ленты изменений /api/sync/.
+
+    TestCase не подходит: на PostgreSQL его транзакция не завершена,
+    и лента не отдаёт записанные в ней изменения.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def get_changes(self, since=None, **params):
+        if since is not None:
+            params['since'] = since
+        response = self.client.get('/api/sync/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def get_tag_slugs(self, data):
+        return [tag['slug'] for tag in data['changes']['tags']['upserted']]
+
+    def create_tag(self, slug):
+        return Tag.objects.create(name=slug, slug=slug)
+
+
+class SyncFeedTests(SyncTestCase):
+    """Страницы и параметры ленты изменений."""
+
+    def test_pages_follow_since(self):
+        for slug in ('first', 'second', 'third'):
+            self.create_tag(slug)
+        data = self.get_changes(limit=2)
+        self.assertEqual(self.get_tag_slugs(data), ['first', 'second'])
+        self.assertTrue(data['has_more'])
+        data = self.get_changes(data['since'], limit=2)
+        self.assertEqual(self.get_tag_slugs(data), ['third'])
+        self.assertFalse(data['has_more'])
+        since = data['since']
+        data = self.get_changes(since)
+        self.assertEqual(self.get_tag_slugs(data), [])
+        self.assertEqual(data['since'], since)
+
+    def test_object_deleted_after_change_is_reported_deleted(self):
+        tag = self.create_tag('tag')
+        tag_id = tag.id
+        data = self.get_changes()
+        tag.delete()
+        data = self.get_changes(data['since'])
+        self.assertEqual(data['changes']['tags']['deleted'], [tag_id])
+
+    def test_recipe_tag_change_is_logged_as_recipe_change(self):
+        recipe = Recipe.objects.create(
+            name='Рецепт',
+            text='Текст',
+            cooking_time=10,
+            image='recipes/images/recipe.png',
+            author=User.objects.create_user(
+                username='author',
+                email='author@example.com',
+                password='password-123',
+                first_name='Имя',
+                last_name='Фамилия',
+            ),
+        )
+        tag = self.create_tag('tag')
+        data = self.get_changes()
+        for change in (
+            lambda: recipe.tags.add(tag),
+            lambda: tag.recipes.clear(),
+        ):
+            change()
+            data = self.get_changes(data['since'])
+            self.assertEqual(
+                [
+                    upserted['id']
+                    for upserted in data['changes']['recipes']['upserted']
+                ],
+                [recipe.id],
+            )
+
+    def test_invalid_params_are_rejected(self):
+        for params in (
+            {'since': '²'},
+            {'since': '1.²'},
+            {'since': '1'},
+            {'since': '9' * 30 + '.1'},
+            {'limit': '²'},
+            {'limit': '-1'},
+            {'limit': '9' * 5000},
+        ):
+            with self.subTest(params={
+                name: value[:20] for name, value in params.items()
+            }):
+                response = self.client.get('/api/sync/', params)
+                self.assertEqual(response.status_code, 400)
+
+
+@skipUnless(
+    connection.vendor == 'postgresql', 'Триггеры есть только в PostgreSQL.'
+)
+class SyncTriggerTests(SyncTestCase):
+    """Журнал, который пишут триггеры PostgreSQL."""
+
+    def test_entries_of_running_transaction_hold_back_the_feed(self):
+        other = connections.create_connection(DEFAULT_DB_ALIAS)
+        self.addCleanup(other.close)
+        other.set_autocommit(False)
+        with other.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {Tag._meta.db_table} (name, slug) '
+                f"VALUES ('running', 'running')"
+            )
+        # Транзакция начата позже, но зафиксирована раньше.
+        self.create_tag('committed')
+        data = self.get_changes()
+        self.assertEqual(self.get_tag_slugs(data), [])
+        other.commit()
+        data = self.get_changes(data['since'])
+        self.assertEqual(
+            sorted(self.get_tag_slugs(data)), ['committed', 'running']
+        )
+
+    def test_triggers_log_tracked_columns_and_bulk_changes(self):
+        author = User.objects.create_user(
+            username='author',
+            email='author@example.com',
+            password='password-123',
+            first_name='Имя',
+            last_name='Фамилия',
+        )
+        recipe = Recipe.objects.create(
+            name='Рецепт',
+            text='Текст',
+            cooking_time=10,
+            image='recipes/images/recipe.png',
+            author=author,
+        )
+        entries = ChangeLog.objects.filter(model='recipes')
+        self.assertEqual(entries.count(), 1)
+        self.assertGreater(entries.get().xid, 0)
+        Recipe.objects.filter(id=recipe.id).update(views_count=10)
+        self.assertEqual(entries.count(), 1)
+        Recipe.objects.filter(id=recipe.id).update(name='Новое имя')
+        Recipe.objects.filter(id=recipe.id)._raw_delete(DEFAULT_DB_ALIAS)
+        self.assertEqual(
+            list(entries.order_by('id').values_list('object_id', 'action')),
+            [
+                (recipe.id, ChangeLog.Action.UPSERT),
+                (recipe.id, ChangeLog.Action.UPSERT),
+                (recipe.id, ChangeLog.Action.DELETE),
+            ],
+        )
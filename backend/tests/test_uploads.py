@@ -0,0 +1,34 @@
+import base64
+import os
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from api import uploads
+
+
+class DecodeBase64ImageTests(SimpleTestCase):
+    """Декодирование изображений из data URI по частям."""
+
+    def test_whitespace_does_not_shift_chunks(self):
+        raw = os.urandom(1001)
+        encoded = base64.b64encode(raw).decode()
+        variants = (
+            encoded,
+            base64.encodebytes(raw).decode(),
+            ' \r\n'.join(
+                encoded[index:index + 3]
+                for index in range(0, len(encoded), 3)
+            ),
+        )
+        for chunk_size in (4, 7, 64):
+            for data in variants:
+                with self.subTest(chunk_size=chunk_size, data=data[:20]):
+                    with mock.patch.object(
+                        uploads, 'BASE64_DECODE_CHUNK', chunk_size
+                    ):
+                        file = uploads.decode_base64_image(
+                            'data:image/png;base64,' + data
+                        )
+                    self.assertEqual(file.read(), raw)
+                    file.close()
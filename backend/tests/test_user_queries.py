@@ -0,0 +1,108 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe
+from users.models import Follow
+
+User = get_user_model()
+
+
+class UserQueryBudgetTests(TestCase):
+    """
+    Число запросов эндпоинтов пользователей не зависит от их числа.
+
+    Список при любом размере страницы от 1 до 100 выполняет один
+    запрос количества и один запрос страницы (на PostgreSQL ещё
+    оценку числа строк из pg_class), а пользователь и текущий
+    пользователь читаются одним запросом. Токен клиента заранее
+    попадает в кэш аутентификации, а количество списка перед каждым
+    замером в кэше отсутствует.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.bulk_create(
+            User(
+                username=f'user{number}',
+                email=f'user{number}@example.com',
+                first_name='Имя',
+                last_name='Фамилия',
+            )
+            for number in range(110)
+        )
+        users = list(User.objects.order_by('id'))
+        cls.reader = users[0]
+        for user in users[1:20]:
+            Follow.objects.create(user=cls.reader, is_following=user)
+            Follow.objects.create(user=user, is_following=cls.reader)
+            Recipe.objects.create(
+                name=f'Рецепт {user.username}',
+                text='Текст',
+                cooking_time=10,
+                image='recipes/images/recipe.png',
+                author=user,
+            )
+        cls.ids = ','.join(str(user.id) for user in users[:100])
+        cls.token = Token.objects.create(user=cls.reader)
+
+    def setUp(self):
+        self.anonymous = APIClient()
+        self.authenticated = APIClient()
+        self.authenticated.credentials(
+            HTTP_AUTHORIZATION=f'Token {self.token}'
+        )
+        self.clear_cache()
+
+    def clear_cache(self):
+        """Очищает кэш, оставляя в нём только токен клиента."""
+        cache.clear()
+        self.get(self.authenticated, '/api/users/me/')
+
+    def get(self, client, path, data=None):
+        response = client.get(path, data)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_list_page_sizes(self):
+        queries = 3 if connection.vendor == 'postgresql' else 2
+        for client in (self.anonymous, self.authenticated):
+            for include in ('', 'recipes_count,followers_count'):
+                for limit in range(1, 101):
+                    with self.subTest(
+                        client=client is self.authenticated,
+                        include=include,
+                        limit=limit,
+                    ):
+                        self.clear_cache()
+                        with self.assertNumQueries(queries):
+                            data = self.get(client, '/api/users/', {
+                                'limit': limit, 'include': include
+                            })
+                        self.assertEqual(len(data['results']), limit)
+
+    def test_list_by_ids(self):
+        for client in (self.anonymous, self.authenticated):
+            with self.subTest(client=client is self.authenticated):
+                with self.assertNumQueries(1):
+                    data = self.get(client, '/api/users/', {
+                        'ids': self.ids,
+                        'include': 'recipes_count,followers_count',
+                    })
+                self.assertEqual(data['count'], 100)
+
+    def test_retrieve_and_me(self):
+        for client, path in (
+            (self.anonymous, f'/api/users/{self.reader.id}/'),
+            (self.authenticated, f'/api/users/{self.reader.id}/'),
+            (self.authenticated, '/api/users/me/'),
+        ):
+            with self.subTest(path=path):
+                with self.assertNumQueries(1):
+                    data = self.get(client, path, {
+                        'include': 'recipes_count,followers_count'
+                    })
+                self.assertEqual(data['followers_count'], 19)
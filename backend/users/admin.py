@@ -2,6 +2,11 @@ from django.contrib import admin
 from django.contrib.auth import get_user_model
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
+from backend.expressions import count_subquery
+from backend.pagination import EstimatedCountPaginator
+from jobs.queue import enqueue_on_commit
+from recipes.deletion import purge_users
+from recipes.models import Recipe
 from users.models import Follow
 User = get_user_model()
 
@@ -14,6 +19,13 @@ class UserInline(admin.StackedInline):
     model = Follow
     fk_name = 'is_following'
     extra = 0
+    autocomplete_fields = ('user',)
+
+    def get_queryset(self, request):
+        """Загружает подписчиков вместе с подписками."""
+        return super().get_queryset(request).select_related(
+            'user', 'is_following'
+        )
 
 
 @admin.register(User)
@@ -31,9 +43,26 @@ class UserAdmin(BaseUserAdmin):
         'followers_count',
         'recipes_count',
     )
-    search_fields = ('email', 'first_name', )
+    search_fields = ('email', 'first_name', 'username')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ('purge_selected',)
+
+    def get_queryset(self, request):
+        """
+        Добавляет к пользователям количество подписчиков и рецептов.
 
-    @admin.display(description='Подписчики')
+        :param request: Текущий запрос.
+        :return: Аннотированный queryset пользователей.
+        """
+        return super().get_queryset(request).annotate(
+            followers_count=count_subquery(
+                Follow.objects.all(), 'is_following'
+            ),
+            recipes_count=count_subquery(Recipe.objects.all(), 'author'),
+        )
+
+    @admin.display(description='Подписчики', ordering='followers_count')
     def followers_count(self, obj):
         """
         Количество подписчиков у пользователя.
@@ -41,9 +70,9 @@ class UserAdmin(BaseUserAdmin):
         :param obj: Экземпляр пользователя.
         :return: Количество подписчиков.
         """
-        return obj.is_following.count()
+        return obj.followers_count
 
-    @admin.display(description='Всего рецептов')
+    @admin.display(description='Всего рецептов', ordering='recipes_count')
     def recipes_count(self, obj):
         """
         Общее количество рецептов, созданных пользователем.
@@ -51,7 +80,30 @@ class UserAdmin(BaseUserAdmin):
         :param obj: Экземпляр пользователя.
         :return: Количество рецептов.
         """
-        return obj.recipes.count()
+        return obj.recipes_count
+
+    @admin.action(
+        description='Удалить выбранных пользователей в фоне',
+        permissions=('delete',),
+    )
+    def purge_selected(self, request, queryset):
+        """
+        Ставит удаление выбранных пользователей в фоновую очередь.
+
+        Текущий пользователь из удаления исключается.
+
+        :param request: Текущий запрос.
+        :param queryset: Выбранные пользователи.
+        """
+        ids = list(
+            queryset.exclude(pk=request.user.pk)
+            .order_by().values_list('id', flat=True)
+        )
+        enqueue_on_commit(purge_users, [ids])
+        self.message_user(
+            request,
+            f'Удаление пользователей ({len(ids)}) поставлено в очередь.'
+        )
 
 
 @admin.register(Follow)
@@ -61,6 +113,10 @@ class FollowAdmin(admin.ModelAdmin):
     Настраивает отображение списка подписок.
     """
     list_display = ('user', 'is_following')
+    list_select_related = ('user', 'is_following')
+    autocomplete_fields = ('user', 'is_following')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 admin.site.empty_value_display = '(None)'
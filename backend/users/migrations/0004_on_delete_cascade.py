@@ -0,0 +1,23 @@
+# Generated by Django 3.2.16 on 2026-10-19 09:05
+
+from django.db import migrations
+
+from backend.db import on_delete_cascade
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_auto_20250330_2001'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='user',
+            options={'ordering': ('username',), 'verbose_name': 'Пользователь', 'verbose_name_plural': 'Пользователи'},
+        ),
+        on_delete_cascade(
+            ('users', 'follow', 'user'),
+            ('users', 'follow', 'is_following'),
+        ),
+    ]
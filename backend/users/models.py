@@ -5,6 +5,9 @@ from django.db import models
 
 from backend.constant import LENGTH_USERNAME, TEXT_LENGTH
 
+# Поля пользователя, которые выводятся в рецептах как данные автора.
+AUTHOR_FIELDS = ('email', 'username', 'first_name', 'last_name', 'avatar')
+
 
 class User(AbstractUser):
     """Модель пользователей, расширяющая стандартную модель AbstractUser."""
@@ -61,6 +64,36 @@ class User(AbstractUser):
         """Возвращает строковое представление пользователя."""
         return self.username
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминает загруженные из базы данные автора."""
+        instance = super().from_db(db, field_names, values)
+        instance.loaded_author = instance.get_author_data()
+        return instance
+
+    def get_author_data(self):
+        """Возвращает загруженные поля AUTHOR_FIELDS."""
+        deferred = self.get_deferred_fields()
+        return {
+            field: str(getattr(self, field))
+            for field in AUTHOR_FIELDS if field not in deferred
+        }
+
+    def author_changed(self):
+        """
+        Проверяет, изменились ли данные автора с момента загрузки.
+
+        Для пользователя, созданного не из базы, изменение
+        предполагается. После проверки текущие данные считаются
+        загруженными.
+        """
+        loaded = getattr(self, 'loaded_author', None)
+        self.loaded_author = self.get_author_data()
+        return loaded is None or any(
+            self.loaded_author.get(field, value) != value
+            for field, value in loaded.items()
+        )
+
 
 class Follow(models.Model):
     """Модель подписок, представляющая отношения между пользователями."""